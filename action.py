@@ -55,7 +55,7 @@ class MOVE(Action):
 
         # This can raise two exceptions: GameOver / InvalidMove
         # These two exceptions will be handled in the board.
-        board._board.move_pawn(self.player, *self.position)
+        board._move_pawn(self.player, self.position)
 
 
 class BLOCK(Action):
@@ -86,12 +86,9 @@ class BLOCK(Action):
         if IS_DEBUG:  # Logging for debugging
             self._logger.debug(f'Calling BLOCK construction on edge {self.edge}.')
 
-        assert board._fence_count[self.player] > 0, f'{self.player} has no fences left.'
-
-        # This can raise two exceptions: GameOver / InvalidMove
+        # This can raise two exceptions: GameOver / InvalidFence
         # These two exceptions will be handled in the board.
-        board._board.place_fence(*self.edge, self.orientation)
-        board._fence_count[self.player] -= 1
+        board._place_fence(self.player, self.edge, self.orientation)
 
 
 # Export actions only
@@ -76,6 +76,7 @@ class Agent:  # Do not change the name of this class!
 
         :param board: The game board with current state.
         :param time_limit: The time limit for the search. Datetime.now() should have lower timestamp value than this.
+            It is a clock.Deadline (a float), which also provides remaining(), expired() and a soft limit.
         :return: The next MOVE or list of three BLOCKs.
             That is, you should either return MOVE() action or [BLOCK(), BLOCK(), BLOCK()].
         """
@@ -98,6 +99,7 @@ class Agent:  # Do not change the name of this class!
 
         :param board: The game board with initial game setup.
         :param time_limit: The time limit for the search. Datetime.now() should have lower timestamp value than this.
+            It is a clock.Deadline (a float), which also provides remaining(), expired() and a soft limit.
         :return: The next move.
         """
         raise NotImplementedError()
@@ -123,6 +125,7 @@ class Agent:  # Do not change the name of this class!
 
         :param board: The game board with current state.
         :param time_limit: The time limit for the search. Datetime.now() should have lower timestamp value than this.
+            It is a clock.Deadline (a float), which also provides remaining(), expired() and a soft limit.
         :return: The next move.
         """
         raise NotImplementedError()
@@ -74,6 +74,7 @@ class Agent:  # Do not change the name of this class!
 
         :param board: The game board with current state.
         :param time_limit: The time limit for the search. Datetime.now() should have lower timestamp value than this.
+            It is a clock.Deadline (a float), which also provides remaining(), expired() and a soft limit.
         :return: The next MOVE or list of three BLOCKs.
             That is, you should either return MOVE() action or [BLOCK(), BLOCK(), BLOCK()].
         """
@@ -100,6 +101,7 @@ class Agent:  # Do not change the name of this class!
 
         :param board: The game board with initial game setup.
         :param time_limit: The time limit for the search. Datetime.now() should have lower timestamp value than this.
+            It is a clock.Deadline (a float), which also provides remaining(), expired() and a soft limit.
         :return: The next move.
         """
         return [BLOCK(self.player, edge=(1,1), orientation='horizontal'),
@@ -128,6 +130,7 @@ class Agent:  # Do not change the name of this class!
 
         :param board: The game board with current state.
         :param time_limit: The time limit for the search. Datetime.now() should have lower timestamp value than this.
+            It is a clock.Deadline (a float), which also provides remaining(), expired() and a soft limit.
         :return: The next move.
         """
 
@@ -0,0 +1,106 @@
+# Type specification for Python code
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+# Import compact state representation
+from state import BoardState
+
+
+class BeliefState:
+    """
+    Set of states that the game can be in, deduplicated by the Zobrist key of each state.
+
+    States are stored as compact BoardState objects, once for each distinct state.
+    If `counts` is True, the belief state also keeps how many ways (e.g., opponent actions) lead to each state.
+    Otherwise, every state counts as 1, and no memory is spent for multiplicity.
+
+    Usage:
+        - `belief = BeliefState([state])` creates a belief state.
+        - `belief = board.expand_belief(belief, action)` computes the belief state after an action.
+        - `for state in belief:` iterates over distinct states, and `belief.count(state)` gives its multiplicity.
+    """
+
+    __slots__ = ('_states', '_counts')
+
+    def __init__(self, states: Iterable[Union[BoardState, dict]] = (), counts: bool = False):
+        """
+        :param states: States to add (BoardState or state dictionary)
+        :param counts: True if multiplicity of each state should be kept.
+        """
+        #: [PRIVATE] Distinct states: {Zobrist key: state}
+        self._states: Dict[int, BoardState] = {}
+        #: [PRIVATE] Multiplicity of each state: {Zobrist key: count} (None if multiplicity is not kept)
+        self._counts: Optional[Dict[int, int]] = {} if counts else None
+
+        for state in states:
+            self.add(state)
+
+    @property
+    def has_counts(self) -> bool:
+        """
+        :return: True if multiplicity of each state is kept.
+        """
+        return self._counts is not None
+
+    def add(self, state: Union[BoardState, dict], count: int = 1):
+        """
+        Add a state. If the same state is already in the belief state, only its multiplicity increases.
+
+        :param state: State to add (BoardState or state dictionary)
+        :param count: Multiplicity to add. Ignored if multiplicity is not kept.
+        """
+        state = BoardState.from_dict(state)
+        key = state.key
+        if key not in self._states:
+            self._states[key] = state
+        if self._counts is not None:
+            self._counts[key] = self._counts.get(key, 0) + count
+
+    def count(self, state: Union[BoardState, int]) -> int:
+        """
+        :param state: State or its Zobrist key
+        :return: Multiplicity of the state. (0 if the state is not in the belief state, 1 if multiplicity is not kept)
+        """
+        key = state if isinstance(state, int) else state.key
+        if key not in self._states:
+            return 0
+        return self._counts[key] if self._counts is not None else 1
+
+    def total(self) -> int:
+        """
+        :return: Sum of multiplicities. (Same as len() if multiplicity is not kept)
+        """
+        return sum(self._counts.values()) if self._counts is not None else len(self._states)
+
+    def items(self) -> Iterator[Tuple[BoardState, int]]:
+        """
+        :return: Iterator of (state, multiplicity)
+        """
+        for key, state in self._states.items():
+            yield state, (self._counts[key] if self._counts is not None else 1)
+
+    def keys(self) -> Iterable[int]:
+        """
+        :return: Zobrist keys of the states
+        """
+        return self._states.keys()
+
+    def __contains__(self, state) -> bool:
+        key = state if isinstance(state, int) else BoardState.from_dict(state).key
+        return key in self._states
+
+    def __iter__(self) -> Iterator[BoardState]:
+        return iter(self._states.values())
+
+    def __len__(self):
+        return len(self._states)
+
+    def __eq__(self, other):
+        return isinstance(other, BeliefState) and self._states.keys() == other._states.keys() \
+            and (self._counts or {}) == (other._counts or {})
+
+    def __repr__(self):
+        return f'BeliefState({len(self)} states' + (f', total {self.total()})' if self.has_counts else ')')
+
+
+# Export the belief state class
+__all__ = ['BeliefState']
@@ -0,0 +1,258 @@
+# Parser for arguments
+from argparse import ArgumentParser
+# Package for reading and writing baselines
+import json
+# Package for randomness and seed control
+import random
+# Package for file handling
+from pathlib import Path
+# Package for time management
+from time import perf_counter
+# Package for tracing memory allocated by Python objects
+import tracemalloc
+# Type specification for Python code
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Import some exceptions of the game
+from pyquoridor.exceptions import GameOver
+
+# Import action specifications
+from action import Action, MOVE, BLOCK
+# Import the board
+from board import GameBoard, ENGINE
+# Import compact state representation
+from state import BoardState, BOARD_SIZE, PLAYERS, square_index
+
+#: Default file of the baseline
+BASELINE_FILE = './benchmark_baseline.json'
+
+
+class Position(NamedTuple):
+    """
+    A position of the corpus, with actions that can be applied to it.
+    """
+    state: BoardState  # Board state
+    other: BoardState  # Another state of the corpus, for switching the board between two states
+    player: str  # Player to act
+    move: Action  # A legal move of the player
+    fence: Optional[Action]  # A legal fence of the player (None if no fence can be placed)
+    turns: Tuple[tuple, tuple]  # Two adjacent squares, for get_move_turns
+
+
+def build_corpus(board: GameBoard, size: int, seed: int) -> List[Position]:
+    """
+    Generate a fixed corpus of positions. The number of fences cycles through 0 to 20.
+
+    :param board: Board used for generating positions
+    :param size: The number of positions
+    :param seed: Random seed
+    :return: List of positions
+    """
+    rng = random.Random(seed)
+    states = []
+    for i in range(size):
+        # Pawns are not put on goal lines, so that the game does not end.
+        black = square_index(rng.randrange(1, BOARD_SIZE), rng.randrange(BOARD_SIZE))
+        white = black
+        while white == black:
+            white = square_index(rng.randrange(BOARD_SIZE - 1), rng.randrange(BOARD_SIZE))
+        board.set_to_state(BoardState(0, 0, black, white, 10, 10, rng.choice(PLAYERS), rng.choice(PLAYERS)))
+
+        for j in range(i % 21):
+            player = PLAYERS[j % 2]
+            fences = board.get_applicable_fences(player)
+            if fences:
+                board.apply(BLOCK(player, *rng.choice(fences)))
+        states.append(board.get_state())
+
+    corpus = []
+    for i, state in enumerate(states):
+        board.set_to_state(state)
+        player = state.current_player
+        fences = board.get_applicable_fences(player)
+        row, col = state.pawn(player)
+        corpus.append(Position(
+            state=state,
+            other=states[(i + 1) % len(states)],
+            player=player,
+            move=MOVE(player, rng.choice(board.get_applicable_moves(player))),
+            fence=BLOCK(player, *rng.choice(fences)) if fences else None,
+            turns=((row, col), (row, col + 1) if col + 1 < BOARD_SIZE else (row, col - 1))
+        ))
+    return corpus
+
+
+def _apply_and_undo(board: GameBoard, action: Optional[Action]):
+    if action is not None:
+        board.apply(action)
+        board.undo()
+
+
+def _execute(board: GameBoard, action: Optional[Action]):
+    try:
+        if action is not None:
+            action(board)
+    except GameOver:  # The move reached the goal line.
+        pass
+
+
+#: Benchmark cases: name -> (setup, operation). Setup runs before each operation, and is not measured.
+CASES: Dict[str, Tuple[Callable, Callable]] = {
+    'simulate_action(MOVE)': (
+        lambda b, p: None,
+        lambda b, p: b.simulate_action(p.state, p.move)),
+    'simulate_action(BLOCK)': (
+        lambda b, p: None,
+        lambda b, p: b.simulate_action(p.state, p.fence) if p.fence else b.set_to_state(p.state)),
+    'set_to_state': (
+        lambda b, p: b.set_to_state(p.other),
+        lambda b, p: b.set_to_state(p.state)),
+    'get_applicable_moves': (
+        lambda b, p: b.set_to_state(p.state),
+        lambda b, p: b.get_applicable_moves(p.player)),
+    'get_applicable_fences': (
+        lambda b, p: b.set_to_state(p.state),
+        lambda b, p: b.get_applicable_fences(p.player)),
+    'get_state': (
+        lambda b, p: b.set_to_state(p.state) or b.apply(p.move),
+        lambda b, p: b.get_state()),
+    '_save_state': (
+        lambda b, p: b.set_to_state(p.state),
+        lambda b, p: b._save_state()),
+    '_restore_state': (
+        lambda b, p: b.set_to_state(p.other),
+        lambda b, p: b._restore_state(p.state)),
+    'apply+undo(MOVE)': (
+        lambda b, p: b.set_to_state(p.state),
+        lambda b, p: _apply_and_undo(b, p.move)),
+    'apply+undo(BLOCK)': (
+        lambda b, p: b.set_to_state(p.state),
+        lambda b, p: _apply_and_undo(b, p.fence)),
+    'MOVE(board)': (
+        lambda b, p: b.set_to_state(p.state),
+        lambda b, p: _execute(b, p.move)),
+    'BLOCK(board)': (
+        lambda b, p: b.set_to_state(p.state),
+        lambda b, p: _execute(b, p.fence)),
+    'get_move_turns': (
+        lambda b, p: None,
+        lambda b, p: b.get_move_turns(*p.turns)),
+}
+
+
+def measure(board: GameBoard, corpus: List[Position], rounds: int) -> Dict[str, Dict[str, float]]:
+    """
+    Measure all cases over the corpus.
+
+    :param board: Board to measure
+    :param corpus: List of positions
+    :param rounds: The number of passes over the corpus. The fastest pass is reported.
+    :return: Dictionary of case name -> {'ops_per_sec': ..., 'peak_bytes_per_op': ...}
+        peak_bytes_per_op is the average peak of memory traced by tracemalloc while an operation runs,
+        above the memory traced before it. It is not the number of allocations: tracemalloc only gives sizes.
+    """
+    results = {}
+    for name, (setup, operation) in CASES.items():
+        best = float('inf')
+        for r in range(rounds + 1):
+            elapsed = 0.0
+            for position in corpus:
+                setup(board, position)
+                begin = perf_counter()
+                operation(board, position)
+                elapsed += perf_counter() - begin
+            if r > 0:  # The first pass warms up caches, and is not reported.
+                best = min(best, elapsed)
+
+        # Peak memory is measured in a separate pass, as tracing slows down every allocation.
+        peak = 0
+        tracemalloc.start()
+        for position in corpus:
+            setup(board, position)
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            operation(board, position)
+            peak += tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+
+        results[name] = {
+            'ops_per_sec': len(corpus) / best if best > 0 else float('inf'),
+            'peak_bytes_per_op': peak / len(corpus)
+        }
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) \
+        -> List[str]:
+    """
+    Compare results with a baseline.
+
+    :param threshold: Allowed ratio of regression, e.g., 0.2 allows 20% less ops/sec or 20% more peak bytes/op.
+    :return: List of messages for regressed cases
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        speed, base_speed = result['ops_per_sec'], baseline[name]['ops_per_sec']
+        if speed < base_speed * (1 - threshold):
+            regressions.append(f'{name}: {speed:,.0f} ops/sec < baseline {base_speed:,.0f} ops/sec')
+
+        # Differences of a few bytes are ignored, as they come from the interpreter rather than the code.
+        peak, base_peak = result['peak_bytes_per_op'], baseline[name]['peak_bytes_per_op']
+        if peak > base_peak * (1 + threshold) + 64:
+            regressions.append(f'{name}: {peak:,.0f} peak B/op > baseline {base_peak:,.0f} peak B/op')
+    return regressions
+
+
+def _print_results(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]]):
+    print(f' {"Case":24s} | {"ops/sec":>12s} {"PeakB/op":>10s} | {"vs. baseline":>12s}')
+    print('=' * 26 + '|' + '=' * 24 + '|' + '=' * 14)
+    for name, result in results.items():
+        change = ''
+        if baseline and name in baseline:
+            change = f'{result["ops_per_sec"] / baseline[name]["ops_per_sec"] - 1:+12.1%}'
+        print(f' {name:24s} | {result["ops_per_sec"]:12,.0f} {result["peak_bytes_per_op"]:10,.0f} | {change:>12s}')
+
+
+# Main function
+if __name__ == '__main__':
+    argparser = ArgumentParser(description='Micro-benchmark of GameBoard hot paths.')
+    argparser.add_argument('-n', '--positions', type=int, default=210,
+                           help='The number of positions in the corpus')
+    argparser.add_argument('-r', '--rounds', type=int, default=5,
+                           help='The number of passes over the corpus. The fastest pass is reported.')
+    argparser.add_argument('-s', '--seed', type=int, default=57456,
+                           help='Random seed of the corpus')
+    argparser.add_argument('--save', type=str, nargs='?', const=BASELINE_FILE, default=None,
+                           help=f'Save the results as a baseline (default file: {BASELINE_FILE})')
+    argparser.add_argument('--compare', type=str, nargs='?', const=BASELINE_FILE, default=None,
+                           help=f'Compare the results with a baseline, and fail if any case regresses '
+                                f'(default file: {BASELINE_FILE})')
+    argparser.add_argument('-t', '--threshold', type=float, default=0.2,
+                           help='Allowed ratio of regression when comparing with a baseline')
+    argparser.add_argument('--native', action='store_true', dest='native',
+                           help='Use the array-backed game engine instead of pyquoridor')
+    args = argparser.parse_args()
+
+    game = GameBoard()
+    game._initialize()
+    print(f'Building a corpus of {args.positions} positions (seed={args.seed}, engine={ENGINE})...')
+    positions = build_corpus(game, args.positions, args.seed)
+    measured = measure(game, positions, args.rounds)
+
+    base = json.loads(Path(args.compare).read_text()) if args.compare else None
+    _print_results(measured, base)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(measured, indent=2))
+        print(f'Baseline saved to {args.save}.')
+
+    if base is not None:
+        failures = compare(measured, base, args.threshold)
+        for message in failures:
+            print(f'[REGRESSION] {message}')
+        if failures:
+            exit(1)
+        print(f'No regression beyond {args.threshold:.0%}.')
@@ -1,31 +1,44 @@
 # Logging method for board execution
 import logging
-# Library for OS environment
-import os
 import random
 import sys
-# Object-level deep copy method
-from copy import deepcopy
 # Random number generators
 from random import randint as random_integer
 # Type specification for Python code
-from typing import Tuple, List, Literal
+from typing import Iterable, Tuple, List, Literal, Optional, Union
 
-# Process information class: for memory usage tracking
-from psutil import Process as PUInfo, NoSuchProcess
+# Package for numeric arrays
+import numpy as np
 # Import some class definitions that implements the Settlers of Catan game.
-from pyquoridor.board import Board
 from pyquoridor.exceptions import GameOver, InvalidFence  # InvalidFence 추가
 from pyquoridor.square import MAX_COL, MAX_ROW
 
 # Import action specifications
-from action import Action, BLOCK
-# Import some utilities
-from util import print_board
+from action import Action, MOVE, BLOCK
+# Import belief states
+from belief import BeliefState
+# Import distance computation
+from distance import GoalDistances, cutting_fences, fence_cuts_path
+# Import endgame solver
+from endgame import EndgameSolver, EndgameResult
+# Import game engines
+from engine import ENGINES, INITIAL_ROWS, PyquoridorEngine, ArrayEngine
+# Import memory usage tracker
+from memory import MemoryTracker
+# Import compact state representation
+from state import BoardState, fence_index, square_index, iterate_bits, zobrist_key, FENCE_GRID_SIZE, BOARD_SIZE, \
+    PLAYERS, ZOBRIST_PAWN, ZOBRIST_FENCE, ZOBRIST_FENCES_LEFT, ZOBRIST_CURRENT_PLAYER
 
 #: True if the program run with 'DEBUG' environment variable.
 IS_DEBUG = '--debug' in sys.argv
 IS_RUN = 'fixed_evaluation' in sys.argv[0]
+#: Game engine of GameBoard. Run with '--native' to use the array-backed engine instead of pyquoridor.
+ENGINE = 'native' if '--native' in sys.argv else 'pyquoridor'
+
+#: [PRIVATE] Action objects shared by tables of legal actions. (See GameBoard.get_legal_actions)
+_BLOCK_POOL = {p: {((r, c), o): BLOCK(p, (r, c), o) for r in range(FENCE_GRID_SIZE) for c in range(FENCE_GRID_SIZE)
+                   for o in ('horizontal', 'vertical')} for p in PLAYERS}
+_MOVE_POOL = {p: {(r, c): MOVE(p, (r, c)) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)} for p in PLAYERS}
 
 
 class GameBoard:
@@ -34,7 +47,9 @@ class GameBoard:
     By interacting with Board, you can expect what will happen afterward.
     """
     #: [PRIVATE] The game instance running currently. Don't access this directly in your agent code!
-    _board: Board = None
+    _board: Union[PyquoridorEngine, ArrayEngine] = None
+    #: [PRIVATE] Name of the engine for the game instance. (Key of engine.ENGINES)
+    _engine = ENGINE
     #: [PRIVATE] Your side (black/white). Don't access this directly in your agent code!
     _player_side = 'black'
     #: [PRIVATE] The current player's index.
@@ -45,15 +60,37 @@ class GameBoard:
     _current = None
     #: [PRIVATE] Logger instance for Board's function calls
     _logger = logging.getLogger('GameBoard')
-    #: [PRIVATE] Memory usage tracker
-    _process_info = None
-    #: [PRIVATE] Fields for computing maximum memory usage. Don't access this directly in your agent code!
-    _init_memory = 0
-    _max_memory = 0
+    #: [PRIVATE] Memory usage tracker. Don't access this directly in your agent code!
+    _memory: MemoryTracker = None
+    #: [PRIVATE] Sampling configuration of the memory usage tracker. (See configure_memory_tracking)
+    _memory_sampling = {}
     #: [PRIVATE] Random seed generator
     _rng = random.Random(2938)
     #: [PRIVATE] Remaining amount of fences unused.
     _fence_count = {'black': 10, 'white': 10}
+    #: [PRIVATE] Bitboards of placed fences, indexed by fence center (bit = row * 8 + col).
+    _fence_bits = {'h': 0, 'v': 0}
+    #: [PRIVATE] Stack of records for reverting actions executed by apply().
+    _history = None
+    #: [PRIVATE] Zobrist key of the current board, updated incrementally.
+    _zobrist = 0
+    #: [PRIVATE] Turns required to move between (r, c) and (r + 1, c). Array of shape (8, 9).
+    _vertical_turns = None
+    #: [PRIVATE] Turns required to move between (r, c) and (r, c + 1). Array of shape (9, 8).
+    _horizontal_turns = None
+    #: [PRIVATE] Goal-distance fields of both players, maintained incrementally once asked. (None if not asked yet)
+    _distances = None
+    #: [PRIVATE] Fences cutting paths for a configuration: ((fence bitboards, pawn squares), {(fence, 'h'/'v'): player})
+    _cutting_cache = None
+    #: [PRIVATE] Endgame solver for the fences of the last solved position. (None if not asked yet)
+    _endgame: EndgameSolver = None
+    #: [PRIVATE] Tables of actions for recent states: {(Zobrist key, player): (legal actions, candidates, indices of
+    #: candidates cutting paths)}. Candidates are all fences without overlap and moves. (See get_legal_actions)
+    _legal_cache = None
+    #: [PRIVATE] Actions of the random opponent of Part III: {(Zobrist key, player, seed): action or None}
+    _random_cache = None
+    #: [PRIVATE] Maximum number of entries in _legal_cache and _random_cache. The oldest one is dropped when full.
+    _LEGAL_CACHE_SIZE = 4096
 
     def _initialize(self, start_with_random_fence: int = 0):
         """
@@ -61,80 +98,144 @@ class GameBoard:
         [WARN] Don't access this method in your agent code.
         """
         # Initialize process tracker
-        self._process_info = PUInfo(os.getpid())
+        if self._memory is not None:
+            self._memory.close()
+        self._memory = MemoryTracker(**self._memory_sampling)
+        self._memory.reset()
 
         if IS_DEBUG:  # Logging for debug
             self._logger.debug('Initializing a new game board...')
         
         # Initialize a new game board
-        self._board = Board()
+        self._board = ENGINES[self._engine]()
         self._fence_count = {'black': 10, 'white': 10}
+        self._fence_bits = {'h': 0, 'v': 0}
+        self._history = []
 
-        self._vertical_turns = [[self._rng.randint(1, 5) for _ in range(9)] for _ in range(8)]
-        self._horizontal_turns = [[self._rng.randint(1, 5) for _ in range(8)] for _ in range(9)]
+        self._set_edge_turns(*self._draw_edge_turns(self._rng))
+        self._cutting_cache = None
+        self._legal_cache = {}
+        self._random_cache = {}
+        self._endgame = None
 
         # Initialize board renderer for debugging purposes
         if IS_DEBUG:  # Logging for debug
-            self._logger.debug('Rendered board: \n' + self._unique_game_state_identifier())
-            self._logger.debug('\n' + print_board(self._board))
+            self._logger.debug('Rendered board: \n' + self._board.render())
 
         # Pick a starting point randomly.
         self._player_side = random.choice(['black', 'white'])
-        self._current_player = 'black'
+        self._current_player = 'white'  # White moves first, as in the evaluators of parts III and IV.
         if IS_DEBUG:  # Logging for debug
             self._logger.debug(f'You\'re player {self._player_side}')
 
-        for p in ['black', 'white']:
-            row = self._board.pawns[p].square.row
-            col = random_integer(0, MAX_COL - 1)
-            self._board.pawns[p].move(self._board.get_square_or_none(row, col))
-
-        # Update position information with a new starting point
-        for pawn in self._board.pawns.values():
-            pawn.square.reset_neighbours()
+        self._board.set_pawns({p: (INITIAL_ROWS[p], random_integer(0, MAX_COL - 1)) for p in ['black', 'white']})
 
-        for pawn in self._board.pawns.values():
-            self._board.update_neighbours(pawn.square)
+        # Compute Zobrist key of the board without fences. Fences will update the key.
+        self._zobrist = zobrist_key(0, 0, square_index(*self._board.pawn('black')),
+                                    square_index(*self._board.pawn('white')),
+                                    self._fence_count['black'], self._fence_count['white'],
+                                    self._player_side, self._current_player)
 
         # Set random fences
         assert start_with_random_fence < 5, 'Do not use start_with_random_fence >= 5'
         for _ in range(start_with_random_fence):
-            for p in self._board.pawns.keys():
-                fences = self.get_applicable_fences(p)
+            for p in ['white', 'black']:
+                # Draw from every fence without overlap, and draw again if the fence cuts a path.
+                # The random generator is used in the same way as the retry loop of previous versions,
+                # so the same seed gives the same problem.
+                fences = self._fence_candidates()
+                cutting = self._get_cutting_fences()
                 while fences:
                     fence, orientation = self._rng.choice(fences)
-                    try:
+                    if (fence_index(*fence), orientation[0]) not in cutting:
                         BLOCK(p, fence, orientation)(self)
                         break
-                    except InvalidFence:
-                        fences.remove((fence, orientation))
-                        continue
-                    except:
-                        raise
+                    fences.remove((fence, orientation))
 
         if IS_DEBUG:  # Logging for debug
             self._logger.debug('After moving initial position: \n' + self._unique_game_state_identifier())
-            self._logger.debug('\n' + print_board(self._board))
+            self._logger.debug('\n' + self._board.render())
 
         # Store initial state representation
         self._initial = self._save_state()
-        self._current = deepcopy(self._initial)
+        self._current = self._initial
 
         # Update memory usage
         self._update_memory_usage()
 
+    @staticmethod
+    def _draw_edge_turns(rng: random.Random) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Helper function to draw random turns of edges. Each edge requires 1 to 5 turns.
+
+        :param rng: Random number generator to draw from
+        :return: Tuple of (vertical, horizontal) arrays, in the same format as get_edge_turns()
+        """
+        vertical = np.array([[rng.randint(1, 5) for _ in range(9)] for _ in range(8)])
+        horizontal = np.array([[rng.randint(1, 5) for _ in range(8)] for _ in range(9)])
+        return vertical, horizontal
+
+    def _set_edge_turns(self, vertical, horizontal):
+        """
+        Helper function to set turns of edges. Distance maps will be computed again with the new turns.
+        """
+        self._vertical_turns = np.array(vertical)
+        self._horizontal_turns = np.array(horizontal)
+        self._vertical_turns.setflags(write=False)
+        self._horizontal_turns.setflags(write=False)
+        self._distances = None
+
     def get_move_turns(self, current_pos: tuple, next_pos: tuple) -> int:
         """Return the number of turns required to move between adjacent positions"""
         row1, col1 = current_pos
         row2, col2 = next_pos
         if col1 == col2:
             min_row = min(row1, row2)
-            return self._vertical_turns[min_row][col1]
+            return int(self._vertical_turns[min_row, col1])
         elif row1 == row2:
             min_col = min(col1, col2)
-            return self._horizontal_turns[row1][min_col]
+            return int(self._horizontal_turns[row1, min_col])
         else:
             return float('inf')
+
+    def get_edge_turns(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the number of turns required to move through each edge, as read-only arrays.
+
+        :return: Tuple of (vertical, horizontal) arrays.
+            vertical[r, c] is for moving between (r, c) and (r + 1, c). Shape (8, 9).
+            horizontal[r, c] is for moving between (r, c) and (r, c + 1). Shape (9, 8).
+        """
+        return self._vertical_turns, self._horizontal_turns
+
+    def get_distance_map(self, player: Literal['black', 'white'] = None) -> np.ndarray:
+        """
+        Return the cost-to-goal of every square for the current fence configuration.
+        Each value is the minimum number of turns required to reach the goal line of the player from that square,
+        considering fences and edge turns but ignoring pawns.
+        Once asked, the maps are maintained incrementally whenever fences are placed or removed.
+
+        :param player: Player name. black or white. (You can ask your player ID by calling get_player_index())
+        :return: Read-only array of shape (9, 9). Squares that cannot reach the goal line have infinity.
+        """
+        player = self._current_player if player is None else player
+        if self._distances is None:
+            self._distances = GoalDistances(self._vertical_turns, self._horizontal_turns,
+                                            self._fence_bits['h'], self._fence_bits['v'])
+        return self._distances.distance_map(player)
+
+    def get_path_cost(self, player: Literal['black', 'white'] = None) -> float:
+        """
+        Return the minimum number of turns required for the player's pawn to reach its goal line,
+        considering fences and edge turns but ignoring the other pawn.
+
+        :param player: Player name. black or white. (You can ask your player ID by calling get_player_index())
+        :return: Minimum number of turns. Infinity if the goal line cannot be reached.
+        """
+        player = self._current_player if player is None else player
+        if self._distances is None:
+            self.get_distance_map(player)
+        return self._distances.distance(player, *self._board.pawn(player))
     
     def print_turns(self):
         """Print the required turns for each edge in a visual format"""
@@ -151,37 +252,57 @@ class GameBoard:
                     row += f"{self._vertical_turns[i][j]}    "
                 print(row)
         
+    def configure_memory_tracking(self, every: int = None, interval: float = 0, high_water_mark: bool = True):
+        """
+        Change how memory usage is sampled. ONLY for evaluation purposes.
+        [WARN] Don't access this method in your agent code.
+
+        :param every: Read memory usage once every this number of board calls.
+            (Default: 64 if the kernel's high-water mark is available, otherwise 1)
+        :param interval: Read memory usage every this number of milliseconds, in a background thread. (0 = no thread)
+        :param high_water_mark: True if the kernel's high-water mark (VmHWM, Linux only) should report peaks.
+        """
+        self._memory_sampling = dict(every=every, interval=interval, high_water_mark=high_water_mark)
+        if self._memory is not None:
+            self._memory.close()
+        self._memory = MemoryTracker(**self._memory_sampling)
+        self._memory.reset()
+
     def reset_memory_usage(self):
         """
         Reset memory usage
         """
-        self._init_memory = 0
-        self._max_memory = 0
-        self._update_memory_usage()
+        self._memory.reset()
 
-    def set_to_state(self, specific_state=None, is_initial: bool = False):
+    def set_to_state(self, specific_state: Union[BoardState, dict] = None, is_initial: bool = False):
         """
         Restore the board to the initial state for repeated evaluation.
-        :param specific_state: A state representation which the board reset to
+        :param specific_state: A state representation which the board reset to. (BoardState or state dictionary)
+            An initial state dictionary may also specify turns of edges, as 'vertical_turns' and 'horizontal_turns'.
         :param is_initial: True if this is an initial state to begin evaluation
         """
         assert specific_state is not None or not is_initial
         if specific_state is None:
             specific_state = self._initial
+        if is_initial and isinstance(specific_state, dict) and 'vertical_turns' in specific_state:
+            self._set_edge_turns(specific_state['vertical_turns'], specific_state['horizontal_turns'])
+        specific_state = BoardState.from_dict(specific_state)
         if is_initial:
             self._initial = specific_state
-            self._current = deepcopy(self._initial)
-            self._rng.seed(hash(self._initial['state_id']))  # Use state_id as hash seed.
+            self._current = self._initial
+            self._rng.seed(self._initial.key)  # Use Zobrist key as seed, which is the same across processes.
 
-        # Restore the board to the given state.
+        # Restore the board to the given state. Actions applied before cannot be reverted anymore.
         self._restore_state(specific_state)
+        self._current = specific_state
+        self._history = []
 
         # Update memory usage
         self._update_memory_usage()
 
         if IS_DEBUG:  # Logging for debug
             self._logger.debug('State has been set as follows: \n' + self._unique_game_state_identifier())
-            self._logger.debug('\n' + print_board(self._board))
+            self._logger.debug('\n' + self._board.render())
 
     def is_game_end(self):
         """
@@ -189,38 +310,55 @@ class GameBoard:
 
         :return: True if the game ends at the given state
         """
-        is_game_end = self._board.game_finished()
+        is_game_end = self._board.is_game_end()
         if IS_DEBUG:  # Logging for debug
             self._logger.debug(f'Querying whether the game ends in this state... Answer = {is_game_end}')
         return is_game_end
 
-    def get_state(self) -> dict:
+    def get_state(self, copy: bool = False) -> Union[BoardState, dict]:
         """
         Get the current board state
         현재 state 반환
 
-        :return: A copy of the current board state dictionary
+        :param copy: True if you want to modify the returned state. Then, a new state dictionary will be returned.
+        :return: The current board state, which is read-only. (BoardState)
+            Or, a new state dictionary if copy=True.
         """
         if IS_DEBUG:  # Logging for debug
             self._logger.debug('Querying current state...')
 
         # Check whether the game has been initialized or not.
-        assert self._current is not None, 'The board should be initialized. Did you run the evaluation code properly?'
-        # Return the initial state representation as a copy.
-        return deepcopy(self._current)
+        assert self._board is not None, 'The board should be initialized. Did you run the evaluation code properly?'
+        if self._current is None:  # Board has been changed by apply()
+            self._current = self._save_state()
 
-    def get_initial_state(self) -> dict:
+        # States are immutable, so the state can be returned without copying.
+        return self._current.to_dict() if copy else self._current
+
+    def get_initial_state(self, copy: bool = False) -> Union[BoardState, dict]:
         """
         Get the initial board state
-        :return: A copy of the initial board state dictionary
+        :param copy: True if you want to modify the returned state. Then, a new state dictionary will be returned.
+        :return: The initial board state, which is read-only. (BoardState)
+            Or, a new state dictionary if copy=True.
         """
         if IS_DEBUG:  # Logging for debug
             self._logger.debug('Querying initial state...')
 
         # Check whether the game has been initialized or not.
         assert self._initial is not None, 'The board should be initialized. Did you run the evaluation code properly?'
-        # Return the initial state representation as a copy.
-        return deepcopy(self._initial)
+        # States are immutable, so the state can be returned without copying.
+        return self._initial.to_dict() if copy else self._initial
+
+    def get_state_key(self) -> int:
+        """
+        Get the 64-bit Zobrist key of the current board, which is updated incrementally on each action.
+        The key includes the player to move, which passes to the opponent whenever apply() or simulate_action()
+        executes an action. Two states having the same key can be treated as identical. (Same as `get_state().key`)
+
+        :return: Zobrist key of the current board
+        """
+        return self._zobrist
 
     def get_player_id(self) -> Literal['black', 'white']:
         """
@@ -246,10 +384,7 @@ class GameBoard:
 
         # Read all applicable positions
         player = self._current_player if player is None else player
-        applicable_positions = sorted([
-            (square.row, square.col)
-            for square in self._board.valid_pawn_moves(player, check_winner=False)
-        ])
+        applicable_positions = sorted(self._board.pawn_moves(player))
 
         # Update memory usage
         self._update_memory_usage()
@@ -263,7 +398,8 @@ class GameBoard:
     def get_applicable_fences(self, player: Literal['black', 'white'] = None)\
             -> List[Tuple[Tuple[int, int], Literal['horizontal', 'vertical']]]:
         """
-        Get the list of applicable fences
+        Get the list of applicable fences.
+        Fences that block the path of a pawn to its goal line are excluded, so every fence in the list can be placed.
 
         :param player: Player name. black or white. (You can ask your player ID by calling get_player_index())
         :return: A copy of the list of applicable fence coordinates with its orientation (horizontal or vertical).
@@ -279,19 +415,9 @@ class GameBoard:
                 self._logger.debug(f'{player} used all fences.')
             return []
 
-        applicable_fences = []
-        for r in range(MAX_ROW - 1):
-            for c in range(MAX_COL - 1):
-                # Pass positions whose center of a grid.
-                if self._board.fence_center_grid[r, c]:
-                    continue
-
-                if not self._board.fence_exists(r, c, 'h'):
-                    applicable_fences.append(((r, c), 'horizontal'))
-                if not self._board.fence_exists(r, c, 'v'):
-                    applicable_fences.append(((r, c), 'vertical'))
-
-        applicable_fences = sorted(applicable_fences)
+        cutting = self._get_cutting_fences()
+        applicable_fences = [(edge, orientation) for edge, orientation in self._fence_candidates()
+                             if (fence_index(*edge), orientation[0]) not in cutting]
 
         # Update memory usage
         self._update_memory_usage()
@@ -302,36 +428,218 @@ class GameBoard:
         # Return applicable positions as list of tuples.
         return applicable_fences
 
+    def get_legal_actions(self, state: Union[BoardState, dict] = None, player: Literal['black', 'white'] = None)\
+            -> Tuple[Action, ...]:
+        """
+        Get the table of legal actions at a state.
+        Order of actions: applicable moves first, and then applicable fences, each in the order of
+        get_applicable_moves() and get_applicable_fences(). expand() generates successors in the same order.
+        A table is computed once per state and player, and action objects are shared. Don't modify them.
+
+        Usage:
+            - `actions = board.get_legal_actions(state, board.get_opponent_id())` lists the opponent's choices.
+            - `actions[i]` is the i-th legal action, which can be simulated without raising InvalidFence.
+
+        :param state: State to query. (BoardState or state dictionary) If None, the current state of the board.
+        :param player: Player who acts. black or white. If None, the current player of the state acts.
+        :return: Tuple of legal actions. The board may be moved to the given state.
+        """
+        return self._action_table(state, player)[0]
+
+    def _random_action(self, state: Union[BoardState, dict], player: Literal['black', 'white'], seed: int) \
+            -> Optional[Action]:
+        """
+        Pick the action of the random opponent of Part III. ONLY for evaluation purposes.
+        [WARN] Don't access this method in your agent code.
+
+        The opponent lists every fence without overlap (including fences that cut paths) and then every move,
+        picks `seed % n` of the list, and picks again from the rest if the action cuts a path,
+        in the same way as the retry loop of previous versions. The picked action is cached per state and seed.
+
+        :param state: State where the opponent acts. (BoardState or state dictionary)
+        :param player: Player of the opponent. black or white.
+        :param seed: Random seed given by the problem
+        :return: Action to execute, or None if no action can be executed. The board may be moved to the given state.
+        """
+        state = BoardState.from_dict(state)
+        cache_key = (state.key, player, seed)
+        if self._random_cache is None:
+            self._random_cache = {}
+        if cache_key not in self._random_cache:
+            _, candidates, cutting = self._action_table(state, player)
+            action = None
+            remaining = list(range(len(candidates)))
+            while remaining:
+                index = remaining.pop(seed % len(remaining))
+                if index not in cutting:
+                    action = candidates[index]
+                    break
+
+            if len(self._random_cache) >= self._LEGAL_CACHE_SIZE:
+                del self._random_cache[next(iter(self._random_cache))]
+            self._random_cache[cache_key] = action
+
+        return self._random_cache[cache_key]
+
+    def _action_table(self, state: Union[BoardState, dict] = None, player: Literal['black', 'white'] = None) \
+            -> Tuple[Tuple[Action, ...], Tuple[Action, ...], frozenset]:
+        """
+        Helper function to build tables of actions at a state, once per state and player.
+
+        :return: Tuple of (legal actions, candidates, indices of candidates cutting paths).
+            Legal actions are in the order of get_legal_actions(). Candidates are all fences without overlap
+            and then all moves, in sorted order, as the random opponent of Part III lists them.
+        """
+        if state is not None:
+            state = BoardState.from_dict(state)
+            key = state.key
+            player = state.current_player if player is None else player
+        else:
+            key = self._zobrist
+            player = self._current_player if player is None else player
+
+        if self._legal_cache is None:
+            self._legal_cache = {}
+        tables = self._legal_cache.get((key, player))
+        if tables is None:
+            if state is not None:
+                self.set_to_state(state)
+            fences = self._fence_candidates() if self._fence_count[player] > 0 else []
+            cutting = self._get_cutting_fences()
+            candidates = tuple([_BLOCK_POOL[player][fence] for fence in fences]
+                               + [_MOVE_POOL[player][position] for position in self.get_applicable_moves(player)])
+            illegal = frozenset(i for i, (edge, orientation) in enumerate(fences)
+                                if (fence_index(*edge), orientation[0]) in cutting)
+            legal = candidates[len(fences):] + tuple(action for i, action in enumerate(candidates[:len(fences)])
+                                                      if i not in illegal)
+            tables = (legal, candidates, illegal)
+
+            if len(self._legal_cache) >= self._LEGAL_CACHE_SIZE:
+                del self._legal_cache[next(iter(self._legal_cache))]
+            self._legal_cache[(key, player)] = tables
+
+        return tables
+
+    def _fence_candidates(self) -> List[Tuple[Tuple[int, int], Literal['horizontal', 'vertical']]]:
+        """
+        Helper function to list fences that do not overlap placed fences, in sorted order.
+        Fences cutting paths of pawns are included. (See get_applicable_fences)
+        """
+        candidates = []
+        for r in range(MAX_ROW - 1):
+            for c in range(MAX_COL - 1):
+                # Pass positions whose center of a grid.
+                if self._fence_overlaps(r, c, ''):
+                    continue
+
+                if not self._fence_overlaps(r, c, 'h'):
+                    candidates.append(((r, c), 'horizontal'))
+                if not self._fence_overlaps(r, c, 'v'):
+                    candidates.append(((r, c), 'vertical'))
+
+        return sorted(candidates)
+
+    def _get_cutting_fences(self) -> dict:
+        """
+        Helper function to find fences that cut paths of pawns, once per configuration of fences and pawns.
+        """
+        pawns = {p: square_index(*self._board.pawn(p)) for p in ['black', 'white']}
+        config = (self._fence_bits['h'], self._fence_bits['v'], pawns['black'], pawns['white'])
+        if self._cutting_cache is None or self._cutting_cache[0] != config:
+            self._cutting_cache = (config, cutting_fences(self._fence_bits['h'], self._fence_bits['v'], pawns))
+        return self._cutting_cache[1]
+
+    def _fence_overlaps(self, row: int, col: int, orientation: str) -> bool:
+        """
+        Helper function to check whether a fence overlaps placed fences.
+        If orientation is empty, only the fence center is checked.
+        """
+        bit = fence_index(row, col)
+        horizontal, vertical = self._fence_bits['h'], self._fence_bits['v']
+        if (horizontal | vertical) >> bit & 1:
+            return True
+        if orientation == 'h':  # Horizontal fences on (row, col - 1) and (row, col + 1) share an edge.
+            return bool((col > 0 and horizontal >> (bit - 1) & 1)
+                        or (col < FENCE_GRID_SIZE - 1 and horizontal >> (bit + 1) & 1))
+        if orientation == 'v':  # Vertical fences on (row - 1, col) and (row + 1, col) share an edge.
+            return bool((row > 0 and vertical >> (bit - FENCE_GRID_SIZE) & 1)
+                        or (row < FENCE_GRID_SIZE - 1 and vertical >> (bit + FENCE_GRID_SIZE) & 1))
+        return False
+
     def get_current_memory_usage(self):
         """
         :return: Current memory usage for the process having this board
         """
-        try:
-            usage = self._process_info.memory_info().rss
-            if self._init_memory == 0:
-                self._init_memory = usage
-            return usage
-        except NoSuchProcess:
-            if self._max_memory >= 0:
-                self._logger.warning('As tracking the process has been failed, '
-                                     'I turned off memory usage tracking ability.')
-                self._max_memory = -1
-            return -1
+        return self._memory.current()
 
     def get_max_memory_usage(self):
         """
         :return: Maximum memory usage for the process having this board
         """
-        return max(0, self._max_memory - self._init_memory)
+        return self._memory.peak()
 
     def _update_memory_usage(self):
         """
-        [PRIVATE] updating maximum memory usage
+        [PRIVATE] updating maximum memory usage. Memory is read only once every few calls. (See MemoryTracker)
         """
-        if self._max_memory >= 0:
-            self._max_memory = max(self._max_memory, self.get_current_memory_usage())
+        self._memory.tick()
 
-    def simulate_action(self, state: dict = None, *actions: Action) -> dict:
+    def apply(self, action: Action):
+        """
+        Execute an action on the current board, in place, and remember how to revert it.
+        Unlike simulate_action, this does not restore the board from a state and does not copy states.
+        Only the squares touched by the action are changed, so a search can walk down the game tree
+        with apply() and walk back up with undo().
+
+        Usage:
+            - `board.apply(action)` executes `action` on top of the current board
+            - `board.undo()` reverts the last applied action
+            - Calling `simulate_action` or `set_to_state` discards all revertible actions.
+
+        :param action: Action to execute. InvalidMove/InvalidFence are raised as they are, without changing the board.
+            After the action, the opponent of `action.player` is the player to move.
+        """
+        if IS_DEBUG:  # Logging for debug
+            self._logger.debug(f'Applying {action}...')
+
+        # Remember everything that the action can change.
+        record = (action, self._board.pawn(action.player), self._current, self._current_player)
+
+        try:
+            action(self)
+        except GameOver as e:
+            # The winning move is still executed; raise only when the game had ended before this action.
+            if not e.last_move:
+                raise
+
+        self._pass_turn(action.player)
+        self._history.append(record)
+        # The current state will be re-computed when someone asks for it.
+        self._current = None
+
+        # Update memory usage
+        self._update_memory_usage()
+
+    def undo(self):
+        """
+        Revert the last action executed by apply().
+        """
+        assert self._history, 'There is no applied action to revert.'
+        action, position, current, current_player = self._history.pop()
+
+        if IS_DEBUG:  # Logging for debug
+            self._logger.debug(f'Reverting {action}...')
+
+        if isinstance(action, BLOCK):
+            self._remove_fence(action.player, action.edge, action.orientation)
+        else:
+            self._relocate_pawn(action.player, position)
+        self._set_current_player(current_player)
+
+        self._current = current
+
+    def simulate_action(self, state: Union[BoardState, dict] = None, *actions: Action,
+                        copy: bool = False) -> Union[BoardState, dict]:
         """
         Simulate given actions.
 
@@ -341,9 +649,12 @@ class GameBoard:
             - ...
             - `simulate_action(state, *action_list)` will execute actions in the order specified in the `action_list`
 
-        :param state: State where the simulation starts from. If None, the simulation starts from the initial state.
-        :param actions: Actions to simulate or execute.
-        :return: The last state after simulating all actions
+        :param state: State where the simulation starts from. (BoardState or state dictionary)
+            If None, the simulation starts from the initial state.
+        :param actions: Actions to simulate or execute. After each action, the opponent of its player is to move.
+        :param copy: True if you want to modify the returned state. Then, a new state dictionary will be returned.
+        :return: The last state after simulating all actions, which is read-only. (BoardState)
+            Or, a new state dictionary if copy=True.
         """
         if IS_DEBUG:  # Logging for debug
             self._logger.debug(f'------- SIMULATION START: {actions} -------')
@@ -355,25 +666,165 @@ class GameBoard:
             # Run actions through calling each action object. If error occurs, raise as it is (except for GameOver)
             try:
                 act(self)
-            except GameOver:
+            except GameOver as e:
+                if e.last_move:  # The winning move is executed.
+                    self._pass_turn(act.player)
                 break
+            self._pass_turn(act.player)
 
             # Break the loop if the game ends within executing actions.
             if self.is_game_end():
                 break
 
-        # Copy the current state to return
+        # Save the current state to return
         self._current = self._save_state()
 
         if IS_DEBUG:  # Logging for debug
             self._logger.debug('State has been changed to: \n' + self._unique_game_state_identifier())
-            self._logger.debug('\n' + print_board(self._board))
+            self._logger.debug('\n' + self._board.render())
             self._logger.debug('------- SIMULATION ENDS -------')
 
         # Update memory usage
         self._update_memory_usage()
 
-        return deepcopy(self._current)
+        return self._current.to_dict() if copy else self._current
+
+    def expand(self, state: Union[BoardState, dict] = None, player: Literal['black', 'white'] = None)\
+            -> List[Tuple[Action, BoardState]]:
+        """
+        Generate all successors of a state, by restoring the board only once.
+        Successors are computed from the given state directly, instead of simulating each action on the board.
+
+        Usage:
+            - `for action, child in board.expand(state):` iterates over children of a search node.
+
+        :param state: State to expand. (BoardState or state dictionary) If None, the initial state is expanded.
+        :param player: Player who acts. black or white. If None, the current player acts.
+        :return: List of (action, successor state), in the order of get_legal_actions(). Successor states are
+            read-only, and the opponent of the player is to move in them, as in simulate_action().
+            Empty if the game already ends at the given state. The board is left at the given state.
+        """
+        self.set_to_state(state)
+        if self.is_game_end():
+            return []
+
+        parent = self.get_state()
+        player = self._current_player if player is None else player
+        opponent = 'white' if player == 'black' else 'black'
+        is_black = player == 'black'
+        source = parent.black_pawn if is_black else parent.white_pawn
+        # Every successor passes the turn to the opponent.
+        turn = ZOBRIST_CURRENT_PLAYER[parent.current_player] ^ ZOBRIST_CURRENT_PLAYER[opponent]
+        successors = []
+
+        for position in self.get_applicable_moves(player):
+            target = square_index(*position)
+            key = parent.key ^ turn ^ ZOBRIST_PAWN[player][source] ^ ZOBRIST_PAWN[player][target]
+            successors.append((MOVE(player, position), BoardState(
+                parent.horizontal, parent.vertical,
+                target if is_black else parent.black_pawn, parent.white_pawn if is_black else target,
+                parent.black_fences, parent.white_fences,
+                parent.player_id, opponent, key
+            )))
+
+        count = parent.fences_left(player)
+        for edge, orientation in self.get_applicable_fences(player):
+            bit = fence_index(*edge)
+            o = orientation[0]
+            key = (parent.key ^ turn ^ ZOBRIST_FENCE[o][bit]
+                   ^ ZOBRIST_FENCES_LEFT[player][count] ^ ZOBRIST_FENCES_LEFT[player][count - 1])
+            successors.append((BLOCK(player, edge, orientation), BoardState(
+                parent.horizontal | (1 << bit) if o == 'h' else parent.horizontal,
+                parent.vertical | (1 << bit) if o == 'v' else parent.vertical,
+                parent.black_pawn, parent.white_pawn,
+                count - 1 if is_black else parent.black_fences, parent.white_fences if is_black else count - 1,
+                parent.player_id, opponent, key
+            )))
+
+        if IS_DEBUG:  # Logging for debug
+            self._logger.debug(f'Expanded {len(successors)} successors of {parent!r}')
+
+        return successors
+
+    def expand_belief(self, belief: Union[BeliefState, Iterable[Union[BoardState, dict]]], action: Optional[Action],
+                      player: Literal['black', 'white'] = None, respond: bool = True, counts: bool = None)\
+            -> BeliefState:
+        """
+        Compute the belief state after executing an action on every state of a belief state,
+        followed by every legal reply of the opponent (See get_legal_actions).
+        States where the game already ends are kept as they are, and the opponent does not reply after the game ends.
+        Successors are deduplicated by their Zobrist keys, as many replies lead to the same state.
+
+        Usage:
+            - `belief = board.expand_belief([state], None)` lists states after the opponent moves first.
+            - `belief = board.expand_belief(belief, action)` computes the belief state after our action and a reply.
+            - `board.expand_belief(belief, action, counts=True)` also counts how many replies lead to each state.
+
+        :param belief: Belief state, or an iterable of states (BoardState or state dictionary)
+        :param action: Action to execute on each state. If None, only the opponent acts.
+        :param player: Player who executes the action. black or white. If None, your player acts.
+        :param respond: True if the opponent replies after the action. Use False for the last action of a plan.
+        :param counts: True if multiplicity should be kept. Multiplicities of the given belief state are multiplied by
+            the number of ways to reach each successor. If None, follows the given belief state.
+        :return: Successor belief state. InvalidMove/InvalidFence are raised if the action cannot be executed
+            on one of the states. The board is left at one of the states.
+        """
+        if not isinstance(belief, BeliefState):
+            belief = BeliefState(belief, counts=bool(counts))
+        counts = belief.has_counts if counts is None else counts
+        player = self._player_side if player is None else player
+        opponent = 'white' if player == 'black' else 'black'
+
+        successors = BeliefState(counts=counts)
+        for state, count in belief.items():
+            self.set_to_state(state)
+            if self.is_game_end():
+                successors.add(state, count)
+                continue
+
+            if action is not None:
+                self.apply(action)
+                state = self.get_state()
+
+            replies = self.expand(state, opponent) if respond else []
+            if not replies:  # The game ends after the action.
+                successors.add(state, count)
+            for _, child in replies:
+                successors.add(child, count)
+
+        if IS_DEBUG:  # Logging for debug
+            self._logger.debug(f'Expanded {belief!r} by {action} into {successors!r}')
+
+        return successors
+
+    def solve_endgame(self, state: Union[BoardState, dict] = None, player: Literal['black', 'white'] = None) \
+            -> Optional[EndgameResult]:
+        """
+        Solve a position exactly, when both players have no fences left.
+        Then the game is a race of pawns, and its outcome with perfect play is known (See endgame.EndgameSolver).
+        All positions with the same fences are solved at once, so later calls with the same fences are lookups.
+
+        Usage:
+            - `result = board.solve_endgame(state, player)`; if it is not None, a search can stop here
+              and use `result.winner` (None for a draw), `result.plies`, and `result.best_move`.
+
+        :param state: State to solve. (BoardState or state dictionary) If None, the current state of the board.
+        :param player: Player to move. black or white. If None, `state.current_player` moves: it is white in an
+            initial state, and the turn passes to the opponent on each action of apply(), simulate_action() and
+            expand(). Pass the player explicitly for states built by hand.
+        :return: EndgameResult, or None if a player still has fences. The board is not changed.
+        """
+        state = self.get_state() if state is None else BoardState.from_dict(state)
+        if state.black_fences > 0 or state.white_fences > 0:
+            return None
+
+        if self._endgame is None or self._endgame.fences != (state.horizontal, state.vertical):
+            if IS_DEBUG:  # Logging for debug
+                self._logger.debug('Solving endgame positions for the current fences...')
+            self._endgame = EndgameSolver(state.horizontal, state.vertical)
+
+        player = state.current_player if player is None else player
+        return self._endgame.solve(state.black_pawn, state.white_pawn, player)
 
     def _unique_game_state_identifier(self) -> str:
         """
@@ -383,65 +834,141 @@ class GameBoard:
         :return: String of game identifier
         """
 
-        return self._board.partial_FEN()
+        return self.get_state().partial_FEN()
 
-    def _save_state(self) -> dict:
+    def _save_state(self) -> BoardState:
         """
-        Helper function for saving the current state representation as a python dictionary from the game board.
+        Helper function for saving the current state representation as a compact state from the game board.
 
-        :return: State representation of a game (in basic python objects)
+        :return: State representation of a game (BoardState, which can be converted to a python dictionary)
         """
+        return BoardState(
+            horizontal=self._fence_bits['h'],
+            vertical=self._fence_bits['v'],
+            black_pawn=square_index(*self._board.pawn('black')),
+            white_pawn=square_index(*self._board.pawn('white')),
+            black_fences=self._fence_count['black'],
+            white_fences=self._fence_count['white'],
+            player_id=self._player_side,  # The agent's Player ID
+            current_player=self._current_player,  # Currently playing Player's ID
+            key=self._zobrist  # Zobrist key, which identifies the state
+        )
 
-        return {
-            'state_id': self._unique_game_state_identifier(),
-            # Unique identifier for the game state. If this is the same, then the state will be equivalent.
-            'player_id': self._player_side,  # The agent's Player ID
-            'current_player': self._current_player,  # Currently playing Player's ID
-            'board': {  # Information about the current board
-                'fence_center': self._board.fence_center_grid.argwhere().tolist(),
-                'horizontal_fences': self._board.horizontal_fence_grid.argwhere().tolist(),
-                'vertical_fences': self._board.vertical_fence_grid.argwhere().tolist(),
-            },
-            'player': {
-                p: {  # Information about the current player
-                    'pawn': list(self._board.pawns[p].square.location),
-                    'fences_left': self._fence_count[p]
-                }
-                for p in ['black', 'white']
-            }
-        }
-
-    def _restore_state(self, state: dict):
+    def _restore_state(self, state: Union[BoardState, dict]):
         """
         Helper function to restore board state to given state representation.
+        Only fences that differ between the board and the state are placed or removed.
+        """
+        state = BoardState.from_dict(state)
+
+        # Restore fences, by comparing the fences on the board with the fences in the state.
+        # Remove fences first, as a new fence may share an edge or a center with a removed one.
+        target = {'h': state.horizontal, 'v': state.vertical}
+        for o in 'hv':
+            for bit in iterate_bits(self._fence_bits[o] & ~target[o]):
+                self._board.remove_fence(*divmod(bit, FENCE_GRID_SIZE), o)
+                if self._distances is not None:
+                    self._distances.unblock(*divmod(bit, FENCE_GRID_SIZE), o)
+        for o in 'hv':
+            for bit in iterate_bits(target[o] & ~self._fence_bits[o]):
+                self._board.place_fence(*divmod(bit, FENCE_GRID_SIZE), o)
+                if self._distances is not None:
+                    self._distances.block(*divmod(bit, FENCE_GRID_SIZE), o)
+        self._fence_bits = target
+
+        # Set players
+        self._board.set_pawns({p: state.pawn(p) for p in ['black', 'white']})
+        for p in ['black', 'white']:
+            self._fence_count[p] = state.fences_left(p)
+
+        self._player_side = state.player_id
+        self._current_player = state.current_player
+        self._zobrist = state.key
+
+    def _set_current_player(self, player: Literal['black', 'white']):
+        """
+        Helper function to change the player to move, with its bit-string of the Zobrist key.
         """
-        # Clear everything
-        self._board.fence_center_grid.grid[:, :] = False
-        self._board.horizontal_fence_grid[:, :] = False
-        self._board.vertical_fence_grid[:, :] = False
+        if player != self._current_player:
+            self._zobrist ^= ZOBRIST_CURRENT_PLAYER[self._current_player] ^ ZOBRIST_CURRENT_PLAYER[player]
+            self._current_player = player
 
-        # Set players first
-        for p in ['black', 'white']:
-            self._board.pawns[p].move(self._board.get_square_or_none(*state['player'][p]['pawn']))
-            self._fence_count[p] = state['player'][p]['fences_left']
-
-        # Recover fences
-        for r, c in state['board']['fence_center']:
-            self._board.fence_center_grid[r, c] = True
-        for r, c in state['board']['horizontal_fences']:
-            self._board.horizontal_fence_grid[r, c] = True
-        for r, c in state['board']['vertical_fences']:
-            self._board.vertical_fence_grid[r, c] = True
-
-        # Recover route-related information
-        for pawn in self._board.pawns.values():
-            pawn.square.reset_neighbours()
-
-        for pawn in self._board.pawns.values():
-            self._board.update_neighbours(pawn.square)
-
-        self._player_side = state['player_id']
-        self._current_player = state['current_player']
+    def _pass_turn(self, player: Literal['black', 'white']):
+        """
+        Helper function to give the turn to the opponent of the player who has just acted.
+        """
+        self._set_current_player('white' if player == 'black' else 'black')
+
+    def _move_pawn(self, player: Literal['black', 'white'], position: Tuple[int, int]):
+        """
+        Helper function to move a pawn following the game rule. Called by MOVE action.
+        The order of turns is managed by the evaluator, so the turn counter of pyquoridor is not checked.
+        """
+        source = self._board.pawn(player)
+        try:
+            self._board.move_pawn(player, position)
+        finally:
+            target = self._board.pawn(player)
+            if target != source:
+                self._zobrist ^= ZOBRIST_PAWN[player][square_index(*source)] ^ ZOBRIST_PAWN[player][square_index(*target)]
+
+    def _place_fence(self, player: Literal['black', 'white'], edge: Tuple[int, int], orientation: str):
+        """
+        Helper function to place a fence following the game rule. Called by BLOCK action.
+        """
+        assert self._fence_count[player] > 0, f'{player} has no fences left.'
+        self._board.check_winner()
+
+        row, col = edge
+        if not (0 <= row < MAX_ROW - 1 and 0 <= col < MAX_COL - 1):
+            raise InvalidFence(f'Invalid fence ({row}, {col}): Fence out of bounds')
+        if self._fence_overlaps(row, col, orientation[0]):
+            raise InvalidFence(f'Invalid fence ({row}, {col}): Fence overlap')
+
+        # Check paths without trial placement. Use the analysis of get_applicable_fences() if available.
+        pawns = {p: square_index(*self._board.pawn(p)) for p in ['black', 'white']}
+        config = (self._fence_bits['h'], self._fence_bits['v'], pawns['black'], pawns['white'])
+        if self._cutting_cache is not None and self._cutting_cache[0] == config:
+            blocked = self._cutting_cache[1].get((fence_index(row, col), orientation[0]))
+        else:
+            blocked = fence_cuts_path(self._fence_bits['h'], self._fence_bits['v'], pawns, row, col, orientation)
+        if blocked is not None:
+            raise InvalidFence(f'Invalid fence ({row}, {col}): Fence blocks {blocked} pawn path')
+
+        # Fence counts are managed by this board, as pyquoridor counts fences by its turn counter.
+        self._board.place_fence(row, col, orientation[0])
+        self._fence_count[player] -= 1
+        self._fence_bits[orientation[0]] |= 1 << fence_index(*edge)
+        self._zobrist ^= (ZOBRIST_FENCE[orientation[0]][fence_index(*edge)]
+                          ^ ZOBRIST_FENCES_LEFT[player][self._fence_count[player] + 1]
+                          ^ ZOBRIST_FENCES_LEFT[player][self._fence_count[player]])
+        if self._distances is not None:
+            # Repair only the squares whose shortest paths crossed the new fence.
+            self._distances.block(*edge, orientation[0])
+
+    def _remove_fence(self, player: Literal['black', 'white'], edge: Tuple[int, int], orientation: str):
+        """
+        Helper function to revert a fence placed by the given player.
+        """
+        self._board.remove_fence(*edge, orientation[0])
+        self._fence_count[player] += 1
+        self._fence_bits[orientation[0]] &= ~(1 << fence_index(*edge))
+        self._zobrist ^= (ZOBRIST_FENCE[orientation[0]][fence_index(*edge)]
+                          ^ ZOBRIST_FENCES_LEFT[player][self._fence_count[player] - 1]
+                          ^ ZOBRIST_FENCES_LEFT[player][self._fence_count[player]])
+        if self._distances is not None:
+            self._distances.unblock(*edge, orientation[0])
+
+    def _relocate_pawn(self, player: Literal['black', 'white'], position: Tuple[int, int]):
+        """
+        Helper function to put a pawn on the given square, without checking the game rule.
+        """
+        source = self._board.pawn(player)
+        if source == position:
+            return
+
+        self._board.set_pawns({player: position})
+        self._zobrist ^= ZOBRIST_PAWN[player][square_index(*source)] ^ ZOBRIST_PAWN[player][square_index(*position)]
 
 
 # Export only GameBoard and RESOURCES.
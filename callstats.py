@@ -0,0 +1,168 @@
+# Package for wrapping methods
+from functools import wraps
+# Package for time management
+from time import perf_counter
+# Type specification for Python code
+from typing import Dict, Iterable, List
+
+# Import search methods of agents
+from profiler import SEARCH_METHODS
+
+#: Public methods of GameBoard, which are counted.
+BOARD_METHODS = ('simulate_action', 'expand', 'apply', 'undo', 'set_to_state', 'is_game_end',
+                 'get_state', 'get_initial_state', 'get_state_key', 'get_player_id', 'get_opponent_id',
+                 'get_applicable_moves', 'get_applicable_fences', 'get_move_turns', 'get_edge_turns',
+                 'get_distance_map', 'get_path_cost', 'get_legal_actions', 'expand_belief',
+                 'solve_endgame')
+#: Number of latency buckets. Bucket 0 counts calls under 1 microsecond, and bucket k counts calls
+#: in [2^(k-1), 2^k) microseconds. The last bucket also counts every slower call.
+BUCKETS = 24
+
+
+def bucket_bound(bucket: int) -> int:
+    """
+    :return: Upper bound of a latency bucket, in microseconds
+    """
+    return 1 << bucket
+
+
+def histogram_percentile(histogram: List[int], ratio: float) -> int:
+    """
+    :param histogram: Latency histogram of a method (See CallStats.summary)
+    :param ratio: Ratio of calls, e.g., 0.5 for the median and 0.99 for the 99th percentile
+    :return: Upper bound of the bucket containing the percentile, in microseconds (0 if no calls)
+    """
+    total = sum(histogram)
+    if total == 0:
+        return 0
+
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen >= ratio * total:
+            return bucket_bound(bucket)
+    return bucket_bound(len(histogram) - 1)
+
+
+class CallStats:
+    """
+    Counts calls of GameBoard methods and records their latency histograms, while an agent searches.
+
+    Only calls made by the agent are counted: recording is turned on inside the search methods of the agent,
+    and calls made by the board itself (e.g., set_to_state inside simulate_action) are included in the outer call.
+    Methods of the board class are replaced only when instrument() is called, so boards cost nothing otherwise.
+
+    Usage:
+        - `stats = CallStats()` and `stats.instrument(GameBoard)` replaces methods of the class.
+        - `stats.record_methods(agent)` turns on recording while the search methods of the agent run.
+        - `stats.summary()` returns {method: {'calls': ..., 'seconds': ..., 'histogram': [...]}}.
+    """
+
+    def __init__(self):
+        #: Number of calls for each method
+        self.calls: Dict[str, int] = {}
+        #: Total seconds spent in each method
+        self.seconds: Dict[str, float] = {}
+        #: Latency histogram of each method (See BUCKETS)
+        self.histograms: Dict[str, List[int]] = {}
+        #: [PRIVATE] Depth of running search methods, and depth of running board calls.
+        self._searching = 0
+        self._depth = 0
+
+    def reset(self):
+        self.calls.clear()
+        self.seconds.clear()
+        self.histograms.clear()
+
+    def _record(self, name: str, elapsed: float):
+        """
+        [PRIVATE] Record a call of a method.
+        """
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+        if name not in self.histograms:
+            self.histograms[name] = [0] * BUCKETS
+        self.histograms[name][min(int(elapsed * 1E6).bit_length(), BUCKETS - 1)] += 1
+
+    def _wrap_board(self, name: str, method):
+        """
+        [PRIVATE] Wrap a method of the board, so that outermost calls during search are recorded.
+        """
+        @wraps(method)
+        def counted(*args, **kwargs):
+            if self._searching == 0 or self._depth > 0:
+                return method(*args, **kwargs)
+
+            self._depth += 1
+            begin = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._record(name, perf_counter() - begin)
+                self._depth -= 1
+
+        return counted
+
+    def _wrap_search(self, method):
+        """
+        [PRIVATE] Wrap a search method of an agent, so that board calls inside it are recorded.
+        """
+        @wraps(method)
+        def searching(*args, **kwargs):
+            self._searching += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._searching -= 1
+
+        return searching
+
+    def instrument(self, board_class, methods: Iterable[str] = BOARD_METHODS):
+        """
+        Replace public methods of the board class with counted ones. Every board of this process is affected.
+        """
+        for name in methods:
+            method = getattr(board_class, name, None)
+            if callable(method) and not hasattr(method, '__wrapped__'):
+                setattr(board_class, name, self._wrap_board(name, method))
+
+    def record_methods(self, agent, methods: Iterable[str] = SEARCH_METHODS):
+        """
+        Turn on recording while the search methods of an agent run. Only the given agent instance is changed.
+        """
+        for name in methods:
+            method = getattr(agent, name, None)
+            if callable(method):
+                setattr(agent, name, self._wrap_search(method))
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        :return: Dictionary of method name -> {'calls': number of calls, 'seconds': total seconds,
+            'histogram': latency histogram without trailing empty buckets}, sorted by total seconds (descending).
+        """
+        result = {}
+        for name in sorted(self.calls, key=lambda n: -self.seconds[n]):
+            histogram = self.histograms[name]
+            last = max(b for b, count in enumerate(histogram) if count > 0)
+            result[name] = {'calls': self.calls[name], 'seconds': self.seconds[name],
+                            'histogram': histogram[:last + 1]}
+        return result
+
+
+def total_calls(summary: Dict[str, dict]) -> int:
+    """
+    :return: Number of board calls in a summary (See CallStats.summary)
+    """
+    return sum(record['calls'] for record in summary.values())
+
+
+def total_seconds(summary: Dict[str, dict]) -> float:
+    """
+    :return: Seconds spent in board calls in a summary (See CallStats.summary)
+    """
+    return sum(record['seconds'] for record in summary.values())
+
+
+# Export call statistics
+__all__ = ['CallStats', 'BOARD_METHODS', 'BUCKETS',
+           'bucket_bound', 'histogram_percentile', 'total_calls', 'total_seconds']
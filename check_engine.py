@@ -0,0 +1,259 @@
+# Parser for arguments
+from argparse import ArgumentParser
+# Queue for breadth-first search
+from collections import deque
+# Package for multiprocessing (positions will be checked with multiprocessing)
+from multiprocessing import cpu_count, get_context, get_all_start_methods
+# Package for randomness and seed control
+import random
+# Package for time management
+from time import time
+# Type specification for Python code
+from typing import List, Literal, Tuple
+
+# Import some exceptions of the game
+from pyquoridor.exceptions import GameOver, InvalidMove, InvalidFence, InvalidSquare
+
+# Import action specifications
+from action import MOVE, BLOCK
+# Import the board and its engines
+from board import GameBoard
+# Import distance computation
+from distance import goal_row
+# Import game engines
+from engine import ArrayEngine
+# Import compact state representation
+from state import BoardState, BOARD_SIZE, PLAYERS, fence_index, square_index
+
+#: Context for starting worker processes. Forked workers share modules already imported by this process.
+CONTEXT = get_context('fork' if 'fork' in get_all_start_methods() else 'spawn')
+#: Number of positions checked by a worker at once
+CHUNK_SIZE = 250
+
+
+def _make_board(engine: str) -> GameBoard:
+    """
+    Create a board which uses the given engine.
+    """
+    board = GameBoard()
+    board._engine = engine
+    board._initialize()
+    return board
+
+
+def _random_position(rng: random.Random, reference: GameBoard) -> BoardState:
+    """
+    Generate a random position. Pawns are put side by side frequently, to check jumps.
+    """
+    black = rng.randrange(BOARD_SIZE ** 2)
+    if rng.random() < 0.5:
+        row, col = divmod(black, BOARD_SIZE)
+        row, col = rng.choice([(row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)])
+        white = square_index(row, col) if 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE else black
+    else:
+        white = rng.randrange(BOARD_SIZE ** 2)
+    while white == black:
+        white = rng.randrange(BOARD_SIZE ** 2)
+
+    reference.set_to_state(BoardState(0, 0, black, white, 10, 10, rng.choice(PLAYERS), 'black'))
+    if reference.is_game_end():  # Fences cannot be placed after the game ends.
+        return reference.get_state()
+
+    for _ in range(rng.randint(0, 20)):
+        player = rng.choice(PLAYERS)
+        fences = reference.get_applicable_fences(player) if reference.get_state().fences_left(player) else []
+        if fences:
+            reference.apply(BLOCK(player, *rng.choice(fences)))
+    return reference.get_state()
+
+
+def _observe(board: GameBoard) -> dict:
+    """
+    Collect everything that should be the same between engines.
+    """
+    return {
+        'state': board.get_state(),
+        'game_end': board.is_game_end(),
+        'render': board._board.render(),
+        'moves': {p: board.get_applicable_moves(p) for p in PLAYERS},
+        'fences': {p: board.get_applicable_fences(p) for p in PLAYERS}
+    }
+
+
+def _act(board: GameBoard, action) -> str:
+    """
+    Apply an action and return the name of the exception raised. (Empty if the action was applied.)
+    """
+    try:
+        board.apply(action)
+        return ''
+    except (GameOver, InvalidMove, InvalidFence, InvalidSquare) as e:
+        return type(e).__name__
+
+
+def _reaches_goal(engine: ArrayEngine, player: Literal['black', 'white']) -> bool:
+    """
+    Check whether the pawn of the player can walk to its goal line, only by moves that the engine generates.
+    Paths ignore pawns in the game rule, so the other pawn walks together on the same square and never stands
+    in the way. Pawns are put back after the search.
+    """
+    positions = {p: engine.pawn(p) for p in PLAYERS}
+    source = positions[player]
+    goal = goal_row(player)
+    visited = {source}
+    queue = deque([source])
+    try:
+        while queue:
+            square = queue.popleft()
+            if square[0] == goal:
+                return True
+
+            engine.set_pawns({p: square for p in PLAYERS})
+            for target in engine.pawn_moves(player):
+                if target not in visited:
+                    visited.add(target)
+                    queue.append(target)
+        return False
+    finally:
+        engine.set_pawns(positions)
+
+
+def _check_fences(boards: dict) -> List[str]:
+    """
+    Place every fence without overlap directly on the engines, and compare whether it cuts a path of a pawn
+    with InvalidFence of pyquoridor's own trial placement. The verdict of the board (without trial placement) is
+    also compared, and the engines should be the same as before after each fence is removed.
+
+    :return: List of mismatches. (Empty if engines agree with pyquoridor.)
+    """
+    reference = boards['pyquoridor']._board._board  # The Board of pyquoridor, which checks paths by itself.
+    native = boards['native']._board
+    cutting = boards['native']._get_cutting_fences()
+    renders = {engine: board._board.render() for engine, board in boards.items()}
+    mismatches = []
+
+    for (row, col), orientation in boards['native']._fence_candidates():
+        o = orientation[0]
+        try:
+            reference.try_place_fence(row, col, o, run_BFS=True, remove=True)
+            expected = True
+        except InvalidFence:
+            expected = False
+
+        native.place_fence(row, col, o)
+        actual = all(_reaches_goal(native, p) for p in PLAYERS)
+        native.remove_fence(row, col, o)
+        by_board = (fence_index(row, col), o) not in cutting
+
+        if not expected == actual == by_board:
+            mismatches.append(f'  fence ({row}, {col}, {o}): pyquoridor={expected} native={actual} board={by_board}')
+        for engine, board in boards.items():
+            if board._board.render() != renders[engine]:
+                mismatches.append(f'  fence ({row}, {col}, {o}): {engine} engine changed after removing the fence')
+                renders[engine] = board._board.render()
+    return mismatches
+
+
+def _check_chunk(chunk: Tuple[int, int]) -> Tuple[int, int, List[str]]:
+    """
+    Compare the native engine with pyquoridor on a chunk of random positions. Each chunk has its own seed.
+
+    :param chunk: Tuple of (the number of positions, random seed of the chunk)
+    :return: Tuple of (the number of positions, the number of positions where engines differ, report lines)
+    """
+    positions, seed = chunk
+    rng = random.Random(seed)
+    reference = _make_board('pyquoridor')
+    boards = {engine: _make_board(engine) for engine in ('pyquoridor', 'native')}
+    mismatches = 0
+    report = []
+
+    for _ in range(positions):
+        state = _random_position(rng, reference)
+        for board in boards.values():
+            board.set_to_state(state)
+        lines = _check_fences(boards) if not boards['pyquoridor'].is_game_end() else []
+
+        # Pick a random action: a legal move, a legal fence, or a random (possibly illegal) square.
+        player = rng.choice(PLAYERS)
+        kind = rng.random()
+        moves = boards['pyquoridor'].get_applicable_moves(player)
+        if kind < 0.5 and moves:
+            action = MOVE(player, rng.choice(moves))
+        elif kind < 0.8 or state.fences_left(player) == 0:
+            action = MOVE(player, (rng.randint(-1, BOARD_SIZE), rng.randint(-1, BOARD_SIZE)))
+        else:
+            action = BLOCK(player, (rng.randrange(BOARD_SIZE - 1), rng.randrange(BOARD_SIZE - 1)),
+                           rng.choice(['horizontal', 'vertical']))
+
+        observed = {}
+        for engine, board in boards.items():
+            before = _observe(board)
+            error = _act(board, action)
+            after = _observe(board)
+            if not error:
+                board.undo()
+            observed[engine] = (before, error, after, _observe(board))
+
+        if observed['pyquoridor'] != observed['native']:
+            for step, name in enumerate(['before', 'error', 'after', 'reverted']):
+                expected, actual = observed['pyquoridor'][step], observed['native'][step]
+                if step == 1 and expected != actual:
+                    lines.append(f'  {name}: pyquoridor={expected!r} native={actual!r}')
+                elif step != 1:
+                    for key in expected:
+                        if expected[key] != actual[key]:
+                            lines.append(f'  {name} / {key}:\n    pyquoridor={expected[key]!r}\n'
+                                         f'    native={actual[key]!r}')
+
+        if lines:
+            mismatches += 1
+            report.append(f'[MISMATCH] {state!r} / {action}')
+            report.extend(lines)
+
+    return positions, mismatches, report
+
+
+def check(positions: int, seed: int, workers: int = 1) -> int:
+    """
+    Compare the native engine with pyquoridor on random positions.
+    On each position, every fence without overlap is placed on the engines and checked against pyquoridor,
+    and then a random action is applied and reverted on both engines.
+
+    :param positions: The number of random positions to check
+    :param seed: Random seed
+    :param workers: The number of worker processes
+    :return: The number of positions where two engines differ
+    """
+    chunks = [(min(CHUNK_SIZE, positions - begin), seed + i)
+              for i, begin in enumerate(range(0, positions, CHUNK_SIZE))]
+    checked = 0
+    mismatches = 0
+    begin = time()
+
+    with CONTEXT.Pool(max(1, workers)) as pool:
+        for count, found, report in pool.imap_unordered(_check_chunk, chunks):
+            checked += count
+            mismatches += found
+            for line in report:
+                print(line)
+            print(f'Checked {checked}/{positions} positions ({time() - begin:.1f} sec), {mismatches} mismatches.',
+                  end='\r')
+
+    print(f'\nChecked {checked} positions in {time() - begin:.1f} sec with {workers} workers. '
+          f'{mismatches} mismatches found.')
+    return mismatches
+
+
+# Main function
+if __name__ == '__main__':
+    argparser = ArgumentParser(description='Differential check of the native engine against pyquoridor.')
+    argparser.add_argument('-n', '--positions', type=int, default=10000,
+                           help='The number of random positions to check')
+    argparser.add_argument('-s', '--seed', type=int, default=57456,
+                           help='Random seed')
+    argparser.add_argument('-w', '--workers', type=int, default=cpu_count(),
+                           help='The number of worker processes (default: all cores)')
+    args = argparser.parse_args()
+
+    exit(1 if check(args.positions, args.seed, args.workers) else 0)
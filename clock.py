@@ -0,0 +1,185 @@
+# Package for time management
+from time import time
+# Type specification for Python code
+from typing import Optional
+
+
+class Deadline(float):
+    """
+    Time limit of a search, which agents receive as `time_limit` in parts II-IV.
+
+    A deadline is a float: its value is the hard time limit (a timestamp of time.time()),
+    so `time() < time_limit` works as before. It also provides:
+    - remaining(): seconds left before the hard limit.
+    - expired(): a cheap check for inner loops. It reads the clock only once every `check_every` calls.
+    - Soft limit: the time by which a search should return to get the best score (e.g., 5 seconds in part IV).
+      Start a new iteration (e.g., a deeper iteration of iterative deepening) only if soft_expired() is False.
+    - budget(): a shorter deadline for a part of the search.
+
+    Usage:
+        - `while not time_limit.expired(): ...` loops until (just before) the hard limit.
+        - `if time_limit.soft_remaining() > last_iteration_time: ...` decides whether to search deeper.
+    """
+
+    #: Default number of expired() calls between reading the clock
+    DEFAULT_CHECK_EVERY = 256
+
+    def __new__(cls, hard: float, soft: Optional[float] = None, margin: float = 0.05,
+                check_every: int = DEFAULT_CHECK_EVERY):
+        """
+        :param hard: Hard time limit, as a timestamp of time.time(). Searches running over it fail.
+        :param soft: Soft time limit, as a timestamp. (None = same as the hard limit)
+        :param margin: Seconds before the hard limit at which expired() becomes True, for returning the answer.
+        :param check_every: Number of expired() calls between reading the clock.
+        """
+        deadline = super().__new__(cls, hard)
+        #: Timestamp when the deadline was created
+        deadline.start = time()
+        #: Soft time limit (timestamp)
+        deadline.soft = min(hard, soft) if soft is not None else hard
+        #: [PRIVATE] Configuration and state of expired()
+        deadline._margin = margin
+        deadline._every = max(1, check_every)
+        deadline._countdown = 0
+        deadline._expired = False
+        return deadline
+
+    def __reduce__(self):
+        return Deadline, (float(self), self.soft, self._margin, self._every)
+
+    @classmethod
+    def after(cls, seconds: float, soft_seconds: Optional[float] = None, **kwargs) -> 'Deadline':
+        """
+        :param seconds: Seconds from now until the hard limit
+        :param soft_seconds: Seconds from now until the soft limit (None = same as the hard limit)
+        :return: A deadline starting from now
+        """
+        now = time()
+        return cls(now + seconds, now + soft_seconds if soft_seconds is not None else None, **kwargs)
+
+    def remaining(self) -> float:
+        """
+        :return: Seconds left before the hard limit (0 if passed)
+        """
+        return max(0.0, float(self) - time())
+
+    def soft_remaining(self) -> float:
+        """
+        :return: Seconds left before the soft limit (0 if passed)
+        """
+        return max(0.0, self.soft - time())
+
+    def elapsed(self) -> float:
+        """
+        :return: Seconds passed since the deadline was created
+        """
+        return time() - self.start
+
+    def expired(self) -> bool:
+        """
+        Check whether the search should stop now, i.e., the hard limit (minus the margin) has passed.
+        The clock is read only once every `check_every` calls, and an expired deadline stays expired.
+        """
+        if self._expired:
+            return True
+
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self._every
+            self._expired = time() >= float(self) - self._margin
+        return self._expired
+
+    def soft_expired(self) -> bool:
+        """
+        Check whether the soft limit has passed. The clock is read on every call, so call this once per iteration.
+        """
+        return time() >= self.soft
+
+    def budget(self, seconds: float = None, ratio: float = None) -> 'Deadline':
+        """
+        Make a deadline for a part of the search, which never goes beyond this deadline.
+
+        :param seconds: Seconds from now for the part
+        :param ratio: Ratio of the remaining time before the soft limit, for the part
+        :return: A new deadline, whose hard and soft limits are the earlier of this one and the budget.
+        """
+        now = time()
+        limit = float(self)
+        if seconds is not None:
+            limit = min(limit, now + seconds)
+        if ratio is not None:
+            limit = min(limit, now + max(0.0, self.soft - now) * ratio)
+        return Deadline(min(float(self), limit + self._margin), min(self.soft, limit), self._margin, self._every)
+
+
+class TurnBudget:
+    """
+    Allocates time to the turns of a game in part IV, where each turn has its own time limit.
+
+    A share of the game budget is given to each turn, by the number of moves expected until the game ends,
+    so that early turns do not use up the budget. A turn never gets more than `per_turn` seconds,
+    nor more than the time limit given by the evaluator.
+
+    Usage:
+        - `self.budget = TurnBudget(per_turn=5)` in the constructor of the agent.
+        - `deadline = self.budget.start_turn(time_limit, moves_left=...)` at the beginning of adversarial_search.
+        - `self.budget.end_turn()` before returning the action.
+    """
+
+    def __init__(self, per_turn: float, total: Optional[float] = None, minimum: float = 0.01):
+        """
+        :param per_turn: Maximum seconds of a turn (e.g., 5 seconds, to reach the intermediate stage of part IV)
+        :param total: Seconds for the whole game. (None = no budget for the game; every turn gets per_turn)
+        :param minimum: Minimum seconds of a turn
+        """
+        #: Configuration of the budget
+        self.per_turn = per_turn
+        self.total = total
+        self.minimum = minimum
+        #: Seconds used by finished turns, and the number of finished turns
+        self.used = 0.0
+        self.turns = 0
+        #: [PRIVATE] Deadline of the current turn (None if no turn is running)
+        self._current: Optional[Deadline] = None
+
+    def allot(self, moves_left: int = 1) -> float:
+        """
+        :param moves_left: The number of moves the agent expects to play, including this turn.
+        :return: Seconds for the next turn
+        """
+        seconds = self.per_turn
+        if self.total is not None:
+            seconds = min(seconds, max(0.0, self.total - self.used) / max(1, moves_left))
+        return max(self.minimum, seconds)
+
+    def start_turn(self, time_limit: float, moves_left: int = 1) -> Deadline:
+        """
+        Begin a turn.
+
+        :param time_limit: Time limit given to adversarial_search
+        :param moves_left: The number of moves the agent expects to play, including this turn.
+            (e.g., the length of the shortest path to the goal)
+        :return: Deadline of this turn. Its soft limit is the allotted time, and its hard limit is the earlier of
+            the allotted time and the evaluator's limit.
+        """
+        seconds = self.allot(moves_left)
+        evaluator = time_limit if isinstance(time_limit, Deadline) else Deadline(time_limit)
+        self._current = evaluator.budget(seconds=seconds)
+        return self._current
+
+    def end_turn(self) -> float:
+        """
+        Finish the current turn.
+
+        :return: Seconds used by the turn
+        """
+        assert self._current is not None, 'No turn is running. Call start_turn() first.'
+        seconds = self._current.elapsed()
+        self.used += seconds
+        self.turns += 1
+        self._current = None
+        return seconds
+
+
+# Export clock classes
+__all__ = ['Deadline', 'TurnBudget']
@@ -0,0 +1,162 @@
+# Parser for arguments
+from argparse import ArgumentParser
+# Package for memory-mapping files
+import mmap
+# Package for randomness and seed control
+import random
+# Package for reading and writing binary records
+import struct
+# Package for file handling
+from pathlib import Path
+# Type specification for Python code
+from typing import List, Union
+
+# Import the board
+from board import GameBoard
+# Import compact state representation
+from state import BoardState, BOARD_SIZE, FENCE_GRID_SIZE
+
+#: Number of starting fences for each problem.
+STARTING_FENCES = {
+    1: 4,
+    2: 4,
+    3: 2,
+    4: 0
+}
+#: Version of the corpus format. Increase this when the format or the way of generating problems changes.
+CORPUS_VERSION = 3
+#: Default file of the corpus for each part
+CORPUS_FILE = './corpus_part{}_v' + str(CORPUS_VERSION) + '.bin'
+
+#: [PRIVATE] Header of the file: magic, version, part, number of problems, bytes of each record
+_HEADER = struct.Struct('<4sHHII')
+_MAGIC = b'QCRP'
+#: [PRIVATE] Bytes of edge-turn tables: vertical (8 x 9) and horizontal (9 x 8) edges, 1 byte per edge
+_TURN_BYTES = 2 * FENCE_GRID_SIZE * BOARD_SIZE
+#: [PRIVATE] Random action indices of part 3: 4 unsigned integers
+_INDICES = struct.Struct('<4I')
+#: [PRIVATE] Bytes of each record: state, edge turns, random action indices
+_RECORD_BYTES = BoardState.BYTES + _TURN_BYTES + _INDICES.size
+
+
+def make_problem(generator: GameBoard, part: int) -> dict:
+    """
+    Generate a new problem for a part.
+    The global random module is used in the same way as evaluate.py always did, so a seed gives the same problems.
+
+    :param generator: Board used for generating problems
+    :param part: Challenge part number
+    :return: Initial state dictionary, with edge turns ('vertical_turns', 'horizontal_turns')
+        and 'random_action_indices' (part 3 only).
+    """
+    generator._initialize(start_with_random_fence=STARTING_FENCES[part])
+    problem = generator.get_initial_state(copy=True)
+
+    # Edge turns are the next draws of the board's generator, as boards of evaluation processes used to draw them.
+    rng = random.Random()
+    rng.setstate(GameBoard._rng.getstate())
+    vertical, horizontal = GameBoard._draw_edge_turns(rng)
+    problem['vertical_turns'] = vertical.tolist()
+    problem['horizontal_turns'] = horizontal.tolist()
+
+    # Add random information for Part 3.
+    if part == 3:
+        problem['random_action_indices'] = [random.randint(0, 65536) for _ in range(4)]
+    return problem
+
+
+def _encode(problem: dict) -> bytes:
+    turns = [t for row in problem['vertical_turns'] for t in row] + \
+            [t for row in problem['horizontal_turns'] for t in row]
+    return (BoardState.from_dict(problem).to_bytes() + bytes(turns)
+            + _INDICES.pack(*problem.get('random_action_indices', [0, 0, 0, 0])))
+
+
+def write_corpus(path: Union[str, Path], part: int, problems: List[dict]):
+    """
+    Write problems to a corpus file.
+
+    :param path: Path of the file
+    :param part: Challenge part number
+    :param problems: Problems generated by make_problem
+    """
+    with Path(path).open('wb') as fp:
+        fp.write(_HEADER.pack(_MAGIC, CORPUS_VERSION, part, len(problems), _RECORD_BYTES))
+        for problem in problems:
+            fp.write(_encode(problem))
+
+
+class ProblemCorpus:
+    """
+    Read-only corpus of problems, memory-mapped from a file written by write_corpus.
+    Only the records asked are read from the disk.
+
+    Usage:
+        - `corpus = ProblemCorpus('corpus_part1_v1.bin')`
+        - `corpus[t]` returns the problem of trial t, in the same format as make_problem.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        #: [PRIVATE] File and its memory map
+        self._file = Path(path).open('rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, part, count, record = _HEADER.unpack_from(self._data, 0)
+        assert magic == _MAGIC, f'{path} is not a problem corpus.'
+        assert version == CORPUS_VERSION, \
+            f'{path} has version {version}, but version {CORPUS_VERSION} is required. Please generate it again.'
+        assert record == _RECORD_BYTES and len(self._data) >= _HEADER.size + count * record, \
+            f'{path} is broken. Please generate it again.'
+
+        #: Challenge part number of the problems
+        self.part = part
+        #: [PRIVATE] Number of problems
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, trial: int) -> dict:
+        if not 0 <= trial < self._count:
+            raise IndexError(f'Trial {trial} is out of range (corpus of {self._count} problems)')
+
+        offset = _HEADER.size + trial * _RECORD_BYTES
+        record = self._data[offset:offset + _RECORD_BYTES]
+        turns = record[BoardState.BYTES:BoardState.BYTES + _TURN_BYTES]
+        half = FENCE_GRID_SIZE * BOARD_SIZE
+
+        problem = BoardState.from_bytes(record).to_dict()
+        problem['vertical_turns'] = [list(turns[r * BOARD_SIZE:(r + 1) * BOARD_SIZE]) for r in range(FENCE_GRID_SIZE)]
+        problem['horizontal_turns'] = [list(turns[half + r * FENCE_GRID_SIZE:half + (r + 1) * FENCE_GRID_SIZE])
+                                       for r in range(BOARD_SIZE)]
+        if self.part == 3:
+            problem['random_action_indices'] = list(_INDICES.unpack_from(record, BoardState.BYTES + _TURN_BYTES))
+        return problem
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+
+# Export corpus functions
+__all__ = ['ProblemCorpus', 'make_problem', 'write_corpus', 'STARTING_FENCES', 'CORPUS_VERSION', 'CORPUS_FILE']
+
+
+# Main function
+if __name__ == '__main__':
+    argparser = ArgumentParser(description='Generate a corpus of problems for evaluate.py --corpus.')
+    argparser.add_argument('-p', '-part', '--part', type=int, choices=[1, 2, 3, 4], required=True,
+                           help='Challenge Part ID: 1, 2, 3, 4.')
+    argparser.add_argument('-n', '--problems', type=int, default=1000,
+                           help='The number of problems to generate')
+    argparser.add_argument('-s', '--seed', type=int, default=42,
+                           help='Random seed')
+    argparser.add_argument('-o', '--output', type=str, default=None,
+                           help=f'Path of the corpus file (default: {CORPUS_FILE.format("[PART]")})')
+    args = argparser.parse_args()
+
+    output = args.output or CORPUS_FILE.format(args.part)
+    random.seed(args.seed)
+    board = GameBoard()
+    write_corpus(output, args.part, [make_problem(board, args.part) for _ in range(args.problems)])
+    print(f'{args.problems} problems of part {args.part} are written to {output}.')
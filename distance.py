@@ -0,0 +1,392 @@
+# Queue for breadth-first search
+from collections import deque
+# Priority queue for Dijkstra's algorithm
+from heapq import heappush, heappop
+# Type specification for Python code
+from typing import Literal, Tuple, List, Iterator, Optional, Set, Dict
+
+# Package for numeric arrays
+import numpy as np
+
+# Import compact state representation
+from state import BOARD_SIZE, FENCE_GRID_SIZE, PLAYERS, iterate_bits
+
+#: Distance of squares that cannot reach the goal line
+UNREACHABLE = float('inf')
+
+
+def goal_row(player: Literal['black', 'white']) -> int:
+    """
+    :return: Row of the goal line of the given player
+    """
+    return BOARD_SIZE - 1 if player == 'white' else 0
+
+
+def edge_costs(vertical_turns: np.ndarray, horizontal_turns: np.ndarray,
+               horizontal_fences: int, vertical_fences: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the cost of each edge, considering fences.
+
+    :param vertical_turns: Turns required to move between (r, c) and (r + 1, c). Array of shape (8, 9).
+    :param horizontal_turns: Turns required to move between (r, c) and (r, c + 1). Array of shape (9, 8).
+    :param horizontal_fences: Bitboard of horizontal fence centers
+    :param vertical_fences: Bitboard of vertical fence centers
+    :return: Tuple of edge cost arrays (vertical, horizontal), in the same shape of the given turn arrays.
+        Blocked edges have infinite cost.
+    """
+    vertical_cost = vertical_turns.astype(float)
+    horizontal_cost = horizontal_turns.astype(float)
+
+    # A horizontal fence at (r, c) blocks moves between row r and r + 1, at column c and c + 1.
+    for i in iterate_bits(horizontal_fences):
+        r, c = divmod(i, FENCE_GRID_SIZE)
+        vertical_cost[r, c:c + 2] = UNREACHABLE
+    # A vertical fence at (r, c) blocks moves between column c and c + 1, at row r and r + 1.
+    for i in iterate_bits(vertical_fences):
+        r, c = divmod(i, FENCE_GRID_SIZE)
+        horizontal_cost[r:r + 2, c] = UNREACHABLE
+
+    return vertical_cost, horizontal_cost
+
+
+def goal_distance_map(player: Literal['black', 'white'],
+                      vertical_cost: np.ndarray, horizontal_cost: np.ndarray) -> np.ndarray:
+    """
+    Compute the cost-to-goal of every square for a player, by running Dijkstra's algorithm from the whole goal line.
+    Pawns are ignored, i.e., only fences and edge costs are considered.
+
+    :param player: Player whose goal line will be used
+    :param vertical_cost: Cost of moving between (r, c) and (r + 1, c). Array of shape (8, 9).
+    :param horizontal_cost: Cost of moving between (r, c) and (r, c + 1). Array of shape (9, 8).
+    :return: Read-only array of shape (9, 9). Squares that cannot reach the goal line have UNREACHABLE.
+    """
+    vertical = vertical_cost.tolist()
+    horizontal = horizontal_cost.tolist()
+
+    distance = [[UNREACHABLE] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+    row = goal_row(player)
+    queue = []
+    for col in range(BOARD_SIZE):
+        distance[row][col] = 0
+        queue.append((0, row, col))
+
+    while queue:
+        d, r, c = heappop(queue)
+        if d > distance[r][c]:
+            continue
+
+        neighbours = []
+        if r + 1 < BOARD_SIZE:
+            neighbours.append((r + 1, c, vertical[r][c]))
+        if r > 0:
+            neighbours.append((r - 1, c, vertical[r - 1][c]))
+        if c + 1 < BOARD_SIZE:
+            neighbours.append((r, c + 1, horizontal[r][c]))
+        if c > 0:
+            neighbours.append((r, c - 1, horizontal[r][c - 1]))
+
+        for nr, nc, cost in neighbours:
+            nd = d + cost
+            if nd < distance[nr][nc]:
+                distance[nr][nc] = nd
+                heappush(queue, (nd, nr, nc))
+
+    distance = np.array(distance)
+    distance.setflags(write=False)
+    return distance
+
+
+def fence_edges(row: int, col: int, orientation: str) -> List[Tuple[str, int, int]]:
+    """
+    :return: Edges blocked by a fence, as a list of (edge type, row, col).
+        Edge type 'v' is between (row, col) and (row + 1, col), and 'h' is between (row, col) and (row, col + 1).
+    """
+    if orientation[0] == 'h':
+        return [('v', row, col), ('v', row, col + 1)]
+    return [('h', row, col), ('h', row + 1, col)]
+
+
+class GoalDistances:
+    """
+    Goal-distance fields of both players, maintained incrementally when fences are placed or removed.
+
+    - When a fence is placed, only the squares whose shortest paths used the blocked edges are repaired.
+      (The squares which lost every shortest path are collected first, then Dijkstra's algorithm runs within them.)
+    - When a fence is removed, distances can only decrease. Dijkstra's algorithm runs from the reopened edges.
+    As distance fields are unique, removing a fence restores exactly the field before placing it.
+    """
+
+    def __init__(self, vertical_turns: np.ndarray, horizontal_turns: np.ndarray,
+                 horizontal_fences: int, vertical_fences: int):
+        """
+        Compute distance fields from scratch.
+
+        :param vertical_turns: Turns required to move between (r, c) and (r + 1, c). Array of shape (8, 9).
+        :param horizontal_turns: Turns required to move between (r, c) and (r, c + 1). Array of shape (9, 8).
+        :param horizontal_fences: Bitboard of horizontal fence centers
+        :param vertical_fences: Bitboard of vertical fence centers
+        """
+        self._turns = {'v': vertical_turns.tolist(), 'h': horizontal_turns.tolist()}
+        vertical_cost, horizontal_cost = edge_costs(vertical_turns, horizontal_turns,
+                                                    horizontal_fences, vertical_fences)
+        #: [PRIVATE] Current edge costs, with infinity on blocked edges
+        self._cost = {'v': vertical_cost.tolist(), 'h': horizontal_cost.tolist()}
+        #: [PRIVATE] Distance fields of each player, as a flat list (index = row * 9 + col)
+        self._distance = {p: goal_distance_map(p, vertical_cost, horizontal_cost).flatten().tolist()
+                          for p in PLAYERS}
+        #: [PRIVATE] Read-only array of distance fields, created when asked
+        self._maps = {}
+
+    def distance_map(self, player: Literal['black', 'white']) -> np.ndarray:
+        """
+        :return: Read-only array of shape (9, 9) of the player's cost-to-goal.
+        """
+        if player not in self._maps:
+            distance = np.array(self._distance[player]).reshape(BOARD_SIZE, BOARD_SIZE)
+            distance.setflags(write=False)
+            self._maps[player] = distance
+        return self._maps[player]
+
+    def distance(self, player: Literal['black', 'white'], row: int, col: int) -> float:
+        """
+        :return: The player's cost-to-goal of the given square.
+        """
+        return self._distance[player][row * BOARD_SIZE + col]
+
+    def _neighbours(self, i: int) -> Iterator[Tuple[int, float]]:
+        """
+        :return: Iterator of (adjacent square index, edge cost) through edges not blocked.
+        """
+        r, c = divmod(i, BOARD_SIZE)
+        vertical, horizontal = self._cost['v'], self._cost['h']
+        if r + 1 < BOARD_SIZE and vertical[r][c] < UNREACHABLE:
+            yield i + BOARD_SIZE, vertical[r][c]
+        if r > 0 and vertical[r - 1][c] < UNREACHABLE:
+            yield i - BOARD_SIZE, vertical[r - 1][c]
+        if c + 1 < BOARD_SIZE and horizontal[r][c] < UNREACHABLE:
+            yield i + 1, horizontal[r][c]
+        if c > 0 and horizontal[r][c - 1] < UNREACHABLE:
+            yield i - 1, horizontal[r][c - 1]
+
+    @staticmethod
+    def _endpoints(edge: str, row: int, col: int) -> Tuple[int, int]:
+        i = row * BOARD_SIZE + col
+        return i, i + (BOARD_SIZE if edge == 'v' else 1)
+
+    def block(self, row: int, col: int, orientation: str):
+        """
+        Update distance fields after placing a fence.
+        """
+        edges = fence_edges(row, col, orientation)
+        costs = []
+        for edge, r, c in edges:
+            costs.append(self._cost[edge][r][c])
+            self._cost[edge][r][c] = UNREACHABLE
+
+        for player in PLAYERS:
+            distance = self._distance[player]
+            goal = goal_row(player) * BOARD_SIZE
+
+            # Collect squares which lost all of their shortest paths.
+            work = []
+            for (edge, r, c), cost in zip(edges, costs):
+                a, b = self._endpoints(edge, r, c)
+                if distance[a] == distance[b] + cost:
+                    work.append(a)
+                if distance[b] == distance[a] + cost:
+                    work.append(b)
+
+            affected = set()
+            while work:
+                x = work.pop()
+                if x in affected or goal <= x < goal + BOARD_SIZE or distance[x] == UNREACHABLE:
+                    continue
+                if any(distance[x] == distance[y] + w for y, w in self._neighbours(x) if y not in affected):
+                    continue  # Another shortest path exists.
+
+                affected.add(x)
+                work.extend(z for z, w in self._neighbours(x) if distance[z] == distance[x] + w)
+
+            if not affected:
+                continue
+
+            # Repair the affected squares, starting from the squares not affected.
+            queue = []
+            for x in affected:
+                distance[x] = min((distance[y] + w for y, w in self._neighbours(x) if y not in affected),
+                                  default=UNREACHABLE)
+                if distance[x] < UNREACHABLE:
+                    queue.append((distance[x], x))
+            self._propagate(distance, queue, affected)
+            self._maps.pop(player, None)
+
+    def unblock(self, row: int, col: int, orientation: str):
+        """
+        Update distance fields after removing a fence.
+        """
+        edges = fence_edges(row, col, orientation)
+        for edge, r, c in edges:
+            self._cost[edge][r][c] = self._turns[edge][r][c]
+
+        for player in PLAYERS:
+            distance = self._distance[player]
+            queue = []
+            for edge, r, c in edges:
+                a, b = self._endpoints(edge, r, c)
+                cost = self._cost[edge][r][c]
+                if distance[b] + cost < distance[a]:
+                    distance[a] = distance[b] + cost
+                    queue.append((distance[a], a))
+                if distance[a] + cost < distance[b]:
+                    distance[b] = distance[a] + cost
+                    queue.append((distance[b], b))
+
+            if queue:
+                self._propagate(distance, queue)
+                self._maps.pop(player, None)
+
+    def _propagate(self, distance: list, queue: list, region: set = None):
+        """
+        Run Dijkstra's algorithm from the squares in the queue, updating only the squares in the region (if given).
+        """
+        queue.sort()
+        while queue:
+            d, x = heappop(queue)
+            if d > distance[x]:
+                continue
+            for y, w in self._neighbours(x):
+                if d + w < distance[y] and (region is None or y in region):
+                    distance[y] = d + w
+                    heappush(queue, (d + w, y))
+
+
+#: [PRIVATE] Adjacent squares of each square, as a tuple of (square index, edge id).
+#: Edge id is (smaller square index) * 2, plus 1 if the edge is between columns.
+_ADJACENT = tuple(
+    tuple((b, min(a, b) * 2 + int(abs(a - b) == 1))
+          for b, inside in ((a + BOARD_SIZE, a // BOARD_SIZE + 1 < BOARD_SIZE), (a - BOARD_SIZE, a >= BOARD_SIZE),
+                            (a + 1, a % BOARD_SIZE + 1 < BOARD_SIZE), (a - 1, a % BOARD_SIZE > 0))
+          if inside)
+    for a in range(BOARD_SIZE ** 2)
+)
+
+
+def _fence_edge_ids(bit: int, orientation: str) -> Tuple[int, int]:
+    """
+    :return: Edge ids blocked by a fence at the given fence index.
+    """
+    a = bit + bit // FENCE_GRID_SIZE  # Square index of the upper-left square of the fence
+    if orientation[0] == 'h':
+        return a * 2, (a + 1) * 2
+    return a * 2 + 1, (a + BOARD_SIZE) * 2 + 1
+
+
+def _blocked_edges(horizontal_fences: int, vertical_fences: int) -> Set[int]:
+    """
+    :return: Set of edge ids blocked by fences.
+    """
+    blocked = set()
+    for bit in iterate_bits(horizontal_fences):
+        blocked.update(_fence_edge_ids(bit, 'h'))
+    for bit in iterate_bits(vertical_fences):
+        blocked.update(_fence_edge_ids(bit, 'v'))
+    return blocked
+
+
+def _covering_fences(edge: int) -> Iterator[Tuple[int, str, int]]:
+    """
+    :return: Iterator of fences that block the given edge, as (fence index, orientation, the other blocked edge id).
+    """
+    a, between_columns = divmod(edge, 2)
+    r, c = divmod(a, BOARD_SIZE)
+    if not between_columns:  # Moving between rows: blocked by horizontal fences
+        if c < FENCE_GRID_SIZE:
+            yield r * FENCE_GRID_SIZE + c, 'h', edge + 2
+        if c > 0:
+            yield r * FENCE_GRID_SIZE + c - 1, 'h', edge - 2
+    else:  # Moving between columns: blocked by vertical fences
+        if r < FENCE_GRID_SIZE:
+            yield r * FENCE_GRID_SIZE + c, 'v', edge + 2 * BOARD_SIZE
+        if r > 0:
+            yield (r - 1) * FENCE_GRID_SIZE + c, 'v', edge - 2 * BOARD_SIZE
+
+
+def _goal_path(player: Literal['black', 'white'], source: int, blocked: Set[int]) -> Optional[Set[int]]:
+    """
+    Breadth-first search from a square to the goal line of the player. Pawns are ignored.
+
+    :return: Set of edge ids on a path to the goal line. None if the goal line cannot be reached.
+    """
+    goal = goal_row(player)
+    parent = {source: None}
+    queue = deque([source])
+    while queue:
+        a = queue.popleft()
+        if a // BOARD_SIZE == goal:
+            path = set()
+            while parent[a] is not None:
+                a, edge = parent[a]
+                path.add(edge)
+            return path
+
+        for b, edge in _ADJACENT[a]:
+            if b not in parent and edge not in blocked:
+                parent[b] = (a, edge)
+                queue.append(b)
+    return None
+
+
+def cutting_fences(horizontal_fences: int, vertical_fences: int,
+                   pawns: Dict[str, int]) -> Dict[Tuple[int, str], str]:
+    """
+    Find every fence position that would cut all paths of a pawn to its goal line.
+
+    A fence removes two edges, so it cuts the paths of a pawn only if those edges form a cut between the pawn and
+    its goal line. Any such cut contains an edge of the current path P. Thus, for each edge e on P, we search again
+    without e: if no path exists, e is a bridge and every fence on e cuts; otherwise, a fence blocking e and
+    another edge f cuts only if f lies on the new path and the pawn is isolated after removing both e and f.
+    Fences that do not touch P never cut paths, so only a handful of searches are needed per fence configuration.
+
+    :param horizontal_fences: Bitboard of horizontal fence centers
+    :param vertical_fences: Bitboard of vertical fence centers
+    :param pawns: Dictionary of square index of each player's pawn
+    :return: Dictionary from (fence index, orientation 'h' or 'v') to the name of a player whose path is cut.
+        Fences overlapping existing ones are not considered here.
+    """
+    blocked = _blocked_edges(horizontal_fences, vertical_fences)
+    cutting = {}
+    for player, source in pawns.items():
+        path = _goal_path(player, source, blocked)
+        if path is None:
+            continue
+
+        for edge in path:
+            detour = _goal_path(player, source, blocked | {edge})
+            for fence, orientation, other in _covering_fences(edge):
+                if (fence, orientation) in cutting:
+                    continue
+                if detour is None or (other in detour
+                                      and _goal_path(player, source, blocked | {edge, other}) is None):
+                    cutting[fence, orientation] = player
+    return cutting
+
+
+def fence_cuts_path(horizontal_fences: int, vertical_fences: int, pawns: Dict[str, int],
+                    row: int, col: int, orientation: str) -> Optional[str]:
+    """
+    Check whether a single fence would cut all paths of a pawn to its goal line.
+
+    :return: The name of a player whose path is cut by the fence. None if the fence does not cut any path.
+    """
+    blocked = _blocked_edges(horizontal_fences, vertical_fences)
+    blocked.update(_fence_edge_ids(row * FENCE_GRID_SIZE + col, orientation))
+
+    for player, source in pawns.items():
+        if _goal_path(player, source, blocked) is None:
+            return player
+    return None
+
+
+# Export functions for computing distances
+__all__ = ['UNREACHABLE', 'goal_row', 'edge_costs', 'goal_distance_map', 'fence_edges', 'GoalDistances',
+           'cutting_fences', 'fence_cuts_path']
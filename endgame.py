@@ -0,0 +1,171 @@
+# Compact arrays of primitive values
+from array import array
+# Named tuple for returning results, and a queue for retrograde analysis
+from collections import namedtuple, deque
+# Type specification for Python code
+from typing import List, Literal, Tuple
+
+# Import action specifications
+from action import MOVE
+# Import distance computation
+from distance import goal_row
+# Import game engines
+from engine import ArrayEngine
+# Import compact state representation
+from state import BOARD_SIZE, FENCE_GRID_SIZE, PLAYERS, iterate_bits
+
+#: Result of an endgame
+EndgameResult = namedtuple('EndgameResult',
+                           [
+                             'winner',  # Player who wins with perfect play. (None if neither can force a win)
+                             'plies',  # Number of moves until the game ends with perfect play. (None for a draw)
+                             'best_move'  # Best MOVE of the player to move. (None if the game ended or no move exists)
+                           ])
+
+#: [PRIVATE] Number of squares
+_SQUARES = BOARD_SIZE ** 2
+#: [PRIVATE] Values of positions, from the view of the player to move
+_UNKNOWN, _WIN, _LOSS = 0, 1, -1
+
+
+def _index(black: int, white: int, player: int) -> int:
+    """
+    [PRIVATE] Index of a position: squares of the pawns and the player to move (0 = black, 1 = white)
+    """
+    return (black * _SQUARES + white) * 2 + player
+
+
+class EndgameSolver:
+    """
+    Exact solver of positions where both players have no fences left, for a fixed set of fences.
+
+    Without fences to place, the game is a race of pawns: every move is one ply, whatever the edge turns are,
+    and pawns interact only by jumping over or standing in the way of each other.
+    The solver runs a retrograde analysis over every (black pawn, white pawn, player to move) once,
+    from the positions where a pawn has reached its goal line, so that each query is a lookup.
+    Positions that neither player can force to win are draws (e.g., both pawns are kept blocking each other).
+
+    Usage:
+        - `solver = EndgameSolver(horizontal, vertical)` for fence bitboards of the board.
+        - `solver.solve(black_square, white_square, 'black')` returns an EndgameResult.
+    """
+
+    def __init__(self, horizontal: int, vertical: int):
+        """
+        :param horizontal: Bitboard of horizontal fence centers
+        :param vertical: Bitboard of vertical fence centers
+        """
+        #: Fence bitboards of the solved positions
+        self.fences = (horizontal, vertical)
+
+        engine = ArrayEngine()
+        for bit in iterate_bits(horizontal):
+            engine.place_fence(*divmod(bit, FENCE_GRID_SIZE), 'h')
+        for bit in iterate_bits(vertical):
+            engine.place_fence(*divmod(bit, FENCE_GRID_SIZE), 'v')
+        #: [PRIVATE] Engine with the fences, used for generating pawn moves
+        self._engine = engine
+
+        size = _SQUARES * _SQUARES * 2
+        #: [PRIVATE] Value and distance (in plies) to the end of each position, from the view of the player to move
+        self._value = array('b', bytes(size))
+        self._plies = array('H', bytes(2 * size))
+        self._solve()
+
+    def _moves(self, black: int, white: int, player: int) -> List[int]:
+        """
+        [PRIVATE] Squares where the pawn of the player can move, including jumps. (Sorted)
+        """
+        self._engine.set_pawns({'black': divmod(black, BOARD_SIZE), 'white': divmod(white, BOARD_SIZE)})
+        return sorted(r * BOARD_SIZE + c for r, c in self._engine.pawn_moves(PLAYERS[player]))
+
+    def _successor(self, black: int, white: int, player: int, target: int) -> int:
+        """
+        [PRIVATE] Index of the position after the player moves to the target square.
+        """
+        return _index(target, white, 1) if player == 0 else _index(black, target, 0)
+
+    def _solve(self):
+        """
+        [PRIVATE] Retrograde analysis. Positions are resolved in the order of their distance to the end,
+        so a win takes the shortest way and a loss takes the longest way.
+        """
+        goals = (goal_row('black'), goal_row('white'))
+        predecessors = {}
+        remaining = array('B', bytes(_SQUARES * _SQUARES * 2))
+        queue = deque()
+
+        for black in range(_SQUARES):
+            for white in range(_SQUARES):
+                if black == white:
+                    continue
+                ended = [black // BOARD_SIZE == goals[0], white // BOARD_SIZE == goals[1]]
+                for player in (0, 1):
+                    i = _index(black, white, player)
+                    if any(ended):
+                        # The pawn on its goal line has won. The player to move has lost, unless it is that pawn.
+                        self._value[i] = _WIN if ended[player] else _LOSS
+                        queue.append(i)
+                        continue
+
+                    targets = self._moves(black, white, player)
+                    remaining[i] = len(targets)
+                    for target in targets:
+                        predecessors.setdefault(self._successor(black, white, player, target), []).append(i)
+
+        while queue:
+            i = queue.popleft()
+            value, plies = self._value[i], self._plies[i]
+            for p in predecessors.get(i, ()):
+                if self._value[p] != _UNKNOWN:
+                    continue
+                if value == _LOSS:  # Moving into a lost position of the opponent wins.
+                    self._value[p], self._plies[p] = _WIN, plies + 1
+                    queue.append(p)
+                else:
+                    remaining[p] -= 1
+                    if remaining[p] == 0:  # Every move leads to a win of the opponent.
+                        self._value[p], self._plies[p] = _LOSS, plies + 1
+                        queue.append(p)
+
+    def solve(self, black: int, white: int, player: Literal['black', 'white']) -> EndgameResult:
+        """
+        :param black: Square index of black pawn
+        :param white: Square index of white pawn
+        :param player: Player to move
+        :return: Outcome of the position with perfect play, and the best move of the player to move.
+        """
+        side = PLAYERS.index(player)
+        i = _index(black, white, side)
+        value = self._value[i]
+        winner = None if value == _UNKNOWN else (player if value == _WIN else PLAYERS[1 - side])
+        plies = None if value == _UNKNOWN else self._plies[i]
+
+        if black // BOARD_SIZE == goal_row('black') or white // BOARD_SIZE == goal_row('white'):
+            return EndgameResult(winner, plies, None)
+
+        # Win as soon as possible, lose as late as possible, or keep a draw.
+        best, best_key = None, None
+        for target in self._moves(black, white, side):
+            j = self._successor(black, white, side, target)
+            if value == _WIN:
+                key = self._plies[j] if self._value[j] == _LOSS else None
+            elif value == _LOSS:
+                key = -self._plies[j]
+            else:
+                key = 0 if self._value[j] == _UNKNOWN else None
+            if key is not None and (best_key is None or key < best_key):
+                best, best_key = target, key
+
+        return EndgameResult(winner, plies, MOVE(player, divmod(best, BOARD_SIZE)) if best is not None else None)
+
+    def solve_pawns(self, black: Tuple[int, int], white: Tuple[int, int], player: Literal['black', 'white']) \
+            -> EndgameResult:
+        """
+        Same as solve(), with (row, col) of the pawns.
+        """
+        return self.solve(black[0] * BOARD_SIZE + black[1], white[0] * BOARD_SIZE + white[1], player)
+
+
+# Export the solver and its result type
+__all__ = ['EndgameSolver', 'EndgameResult']
@@ -0,0 +1,268 @@
+# Type specification for Python code
+from typing import Dict, List, Literal, Tuple
+
+# Import some class definitions that implements the Quoridor game.
+from pyquoridor.board import Board
+from pyquoridor.exceptions import GameOver, InvalidMove, InvalidSquare
+
+# Import compact state representation
+from state import BOARD_SIZE, FENCE_GRID_SIZE, PLAYERS
+# Import some utilities
+from util import print_board
+
+#: Initial rows of the pawns, before the evaluator picks their columns.
+INITIAL_ROWS = {'black': BOARD_SIZE - 1, 'white': 0}
+#: [PRIVATE] Offsets of square index for each direction: up (row + 1), down (row - 1), right (col + 1), left (col - 1)
+_OFFSETS = (BOARD_SIZE, -BOARD_SIZE, 1, -1)
+#: [PRIVATE] Perpendicular directions of each direction, used for diagonal jumps.
+_PERPENDICULAR = ((2, 3), (2, 3), (0, 1), (0, 1))
+
+
+def _goal_row(player: Literal['black', 'white']) -> int:
+    return BOARD_SIZE - 1 if player == 'white' else 0
+
+
+class PyquoridorEngine:
+    """
+    Game engine which wraps the Board of pyquoridor.
+    The board keeps neighbour objects for each square, which should be rebuilt around pawns after changes.
+    """
+
+    def __init__(self):
+        #: [PRIVATE] The pyquoridor board
+        self._board = Board()
+
+    def pawn(self, player: Literal['black', 'white']) -> Tuple[int, int]:
+        """
+        :return: (row, col) of the player's pawn
+        """
+        return self._board.pawns[player].square.location
+
+    def set_pawns(self, positions: Dict[str, Tuple[int, int]]):
+        """
+        Put pawns on the given squares, without checking the game rule.
+        """
+        pawns = self._board.pawns
+        # Detach all pawns first, as two pawns may swap their squares.
+        for player in positions:
+            pawns[player].square.reset_neighbours()
+            pawns[player].square.set_pawn(None)
+        for player, position in positions.items():
+            square = self._board.get_square_or_none(*position)
+            pawns[player].square = square
+            square.set_pawn(pawns[player])
+
+        self._update_pawn_neighbours()
+
+    def move_pawn(self, player: Literal['black', 'white'], position: Tuple[int, int]):
+        """
+        Move a pawn following the game rule.
+        Raises InvalidMove if the move is not allowed, and GameOver if the game ends (before or by this move).
+        """
+        source = self._board.pawns[player].square
+        try:
+            # The order of turns is managed by the evaluator, so the turn counter of pyquoridor is not checked.
+            self._board.move_pawn(player, *position, check_player=False)
+        except GameOver as e:
+            if e.last_move:  # pyquoridor stops before rebuilding jump connections for the winning move.
+                self._update_pawn_neighbours()
+            raise
+        finally:
+            if self._board.pawns[player].square is not source:
+                # pyquoridor does not clear jump connections of the square that pawn left.
+                source.reset_neighbours()
+
+    def pawn_moves(self, player: Literal['black', 'white']) -> List[Tuple[int, int]]:
+        """
+        :return: List of (row, col) where the player's pawn can move. (Not sorted)
+        """
+        return [square.location for square in self._board.valid_pawn_moves(player, check_winner=False)]
+
+    def place_fence(self, row: int, col: int, orientation: Literal['h', 'v']):
+        """
+        Place a fence, without checking the game rule. The caller should check overlaps and paths.
+        """
+        self._board._place_or_remove_fence(row, col, orientation, place=True)
+
+    def remove_fence(self, row: int, col: int, orientation: Literal['h', 'v']):
+        """
+        Remove a placed fence.
+        """
+        self._board._place_or_remove_fence(row, col, orientation, place=False)
+        # Removing a fence may change jump connections around pawns.
+        self._update_pawn_neighbours()
+
+    def is_game_end(self) -> bool:
+        return self._board.game_finished()
+
+    def check_winner(self):
+        """
+        Raise GameOver if a pawn is already on its goal line.
+        """
+        self._board.check_winner()
+
+    def render(self) -> str:
+        """
+        :return: Printable board for debugging
+        """
+        return print_board(self._board)
+
+    def _update_pawn_neighbours(self):
+        """
+        Helper function to rebuild jump connections around pawns.
+        """
+        for pawn in self._board.pawns.values():
+            pawn.square.reset_neighbours()
+
+        for pawn in self._board.pawns.values():
+            self._board.update_neighbours(pawn.square)
+
+
+class ArrayEngine:
+    """
+    Game engine which keeps the board as fixed-size arrays of integers.
+
+    - Each square has a bitmask of open directions (up, down, right, left), which fences clear.
+    - Pawns are square indices (row * 9 + col), so moves and jumps are computed from the two masks around pawns.
+    Nothing has to be rebuilt after changes. Results are the same as PyquoridorEngine. (See check_engine.py)
+    """
+
+    def __init__(self):
+        #: [PRIVATE] Bitmask of open directions of each square. Bit i is open for direction i of _OFFSETS.
+        self._open = []
+        for i in range(BOARD_SIZE ** 2):
+            r, c = divmod(i, BOARD_SIZE)
+            self._open.append(int(r + 1 < BOARD_SIZE) | int(r > 0) << 1 | int(c + 1 < BOARD_SIZE) << 2
+                              | int(c > 0) << 3)
+        #: [PRIVATE] Square index of each pawn
+        self._pawns = {p: INITIAL_ROWS[p] * BOARD_SIZE + BOARD_SIZE // 2 for p in PLAYERS}
+        #: [PRIVATE] Bitboards of fence centers (bit = row * 8 + col)
+        self._fences = {'h': 0, 'v': 0}
+
+    def pawn(self, player: Literal['black', 'white']) -> Tuple[int, int]:
+        """
+        :return: (row, col) of the player's pawn
+        """
+        return divmod(self._pawns[player], BOARD_SIZE)
+
+    def set_pawns(self, positions: Dict[str, Tuple[int, int]]):
+        """
+        Put pawns on the given squares, without checking the game rule.
+        """
+        for player, (row, col) in positions.items():
+            self._pawns[player] = row * BOARD_SIZE + col
+
+    def move_pawn(self, player: Literal['black', 'white'], position: Tuple[int, int]):
+        """
+        Move a pawn following the game rule.
+        Raises InvalidMove if the move is not allowed, and GameOver if the game ends (before or by this move).
+        """
+        self.check_winner()
+
+        row, col = position
+        if not (0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE):
+            raise InvalidSquare(f'Invalid square ({row}, {col})')
+        target = row * BOARD_SIZE + col
+        if target not in self._targets(player):
+            raise InvalidMove(f'Cannot move {player} pawn to square ({row}, {col})')
+
+        self._pawns[player] = target
+        if row == _goal_row(player):
+            raise GameOver(player, last_move=True, message=f'Player {player} wins the game')
+
+    def pawn_moves(self, player: Literal['black', 'white']) -> List[Tuple[int, int]]:
+        """
+        :return: List of (row, col) where the player's pawn can move. (Not sorted)
+        """
+        return [divmod(target, BOARD_SIZE) for target in self._targets(player)]
+
+    def _targets(self, player: Literal['black', 'white']) -> List[int]:
+        """
+        :return: List of square indices where the player's pawn can move, including jumps over the other pawn.
+        """
+        source = self._pawns[player]
+        other = self._pawns['white' if player == 'black' else 'black']
+        mask = self._open[source]
+        targets = []
+        for d in range(4):
+            if not mask >> d & 1:
+                continue
+
+            square = source + _OFFSETS[d]
+            if square != other:
+                targets.append(square)
+            elif self._open[other] >> d & 1:  # Straight jump, if no fence or border behind the other pawn.
+                targets.append(other + _OFFSETS[d])
+            else:  # Diagonal jumps
+                targets.extend(other + _OFFSETS[p] for p in _PERPENDICULAR[d] if self._open[other] >> p & 1)
+        return targets
+
+    def _fence_sides(self, row: int, col: int, orientation: Literal['h', 'v']) -> List[Tuple[int, int]]:
+        """
+        :return: List of (square index, direction) whose way is blocked by the fence.
+        """
+        a = row * BOARD_SIZE + col
+        if orientation == 'h':
+            return [(a, 0), (a + 1, 0), (a + BOARD_SIZE, 1), (a + BOARD_SIZE + 1, 1)]
+        return [(a, 2), (a + BOARD_SIZE, 2), (a + 1, 3), (a + BOARD_SIZE + 1, 3)]
+
+    def place_fence(self, row: int, col: int, orientation: Literal['h', 'v']):
+        """
+        Place a fence, without checking the game rule. The caller should check overlaps and paths.
+        """
+        for square, d in self._fence_sides(row, col, orientation):
+            self._open[square] &= ~(1 << d)
+        self._fences[orientation] |= 1 << (row * FENCE_GRID_SIZE + col)
+
+    def remove_fence(self, row: int, col: int, orientation: Literal['h', 'v']):
+        """
+        Remove a placed fence.
+        """
+        for square, d in self._fence_sides(row, col, orientation):
+            self._open[square] |= 1 << d
+        self._fences[orientation] &= ~(1 << (row * FENCE_GRID_SIZE + col))
+
+    def is_game_end(self) -> bool:
+        return any(self._pawns[p] // BOARD_SIZE == _goal_row(p) for p in PLAYERS)
+
+    def check_winner(self):
+        """
+        Raise GameOver if a pawn is already on its goal line.
+        """
+        for p in PLAYERS:
+            if self._pawns[p] // BOARD_SIZE == _goal_row(p):
+                raise GameOver(p, last_move=False, message=f'Player {p} wins the game')
+
+    def render(self) -> str:
+        """
+        :return: Printable board for debugging, in the same format with util.print_board
+        """
+        pawns = {square: player[0].upper() for player, square in self._pawns.items()}
+        output = ''
+        for y in range(BOARD_SIZE - 1, -1, -1):
+            row_fence_str = '  '
+            row_str = str(y) + ' :'
+            for x in range(BOARD_SIZE):
+                i = y * BOARD_SIZE + x
+                center = x > 0 and y < FENCE_GRID_SIZE and ((self._fences['h'] | self._fences['v'])
+                                                            >> (y * FENCE_GRID_SIZE + x - 1) & 1)
+                row_fence_str += '*' if center else ' '
+                row_fence_str += '. .' if y == BOARD_SIZE - 1 or self._open[i] & 1 else '---'
+                right_str = '·' if x == BOARD_SIZE - 1 or self._open[i] >> 2 & 1 else '|'
+                content = f' {pawns[i]} ' if i in pawns else '   '
+                row_str += f'{content}{right_str}'
+            output += row_fence_str + '\n'
+            output += row_str + '\n'
+        output += '  ' + (' ···' * BOARD_SIZE) + '\n'
+        output += '  ' + ''.join([f'  {i} ' for i in range(BOARD_SIZE)])
+        return output
+
+
+#: Available engines for GameBoard
+ENGINES = {
+    'pyquoridor': PyquoridorEngine,
+    'native': ArrayEngine
+}
+
+# Export engine classes
+__all__ = ['PyquoridorEngine', 'ArrayEngine', 'ENGINES', 'INITIAL_ROWS']
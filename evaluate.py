@@ -1,15 +1,17 @@
 # Parser for arguments
 from argparse import ArgumentParser
-# A dictionary class which can set the default value
-from collections import defaultdict
+# A dictionary class which can set the default value, and a queue for jobs
+from collections import defaultdict, deque
 # Package for multiprocessing (evaluation will be done with multiprocessing)
-from multiprocessing import cpu_count, Process
+from multiprocessing import cpu_count, get_context, get_all_start_methods
+# Function for waiting multiple processes and pipes at once
+from multiprocessing.connection import wait
 # Package for file handling
 from pathlib import Path
 # Package for randomness and seed control
-from random import seed, shuffle, randint
+from random import seed, shuffle
 # Package for time management
-from time import time, sleep
+from time import time
 # Package for typing
 from typing import List, Dict
 
@@ -20,6 +22,14 @@ import psutil as pu
 
 # Function for loading your agents
 from agents.load import get_all_agents
+# Package for storing evaluation results
+from results import ResultStore, problem_hash
+# Package for generating problems, or reading them from a corpus
+from corpus import ProblemCorpus, make_problem
+# Package for merging profiles
+from profiler import merge_profiles, profile_path, PROFILE_DIR
+# Package for summarizing board calls
+from callstats import total_calls, total_seconds
 # Package for problem definitions
 from evaluator import *
 from evaluator.util import MEGABYTES
@@ -28,14 +38,19 @@ from evaluator.util import MEGABYTES
 GAMES = 10
 #: Limit of execution. (60 minutes)
 TIME_LIMIT = 3600
+#: Limit of memory used by a job, as the increase of its worker's RSS since the job started. (in MB)
 MEMORY_LIMIT = 4096
-#: Number of starting fences for each problem.
-STARTING_FENCES = {
-    1: 4,
-    2: 4,
-    3: 2,
-    4: 0
-}
+#: A worker is replaced after this number of jobs, or when its RSS between jobs grew more than
+#: WORKER_GROWTH_LIMIT MB since it started. Memory and module globals left by earlier jobs do not pile up.
+WORKER_JOB_LIMIT = 10
+WORKER_GROWTH_LIMIT = 256
+#: Files for recording results of all jobs, and failures of each agent
+RESULTS_FILE = './results_part{}.jsonl'
+FAILURE_FILE = './failure_{}.txt'
+#: Context for starting worker processes. Forked workers share modules already imported by this process.
+CONTEXT = get_context('fork' if 'fork' in get_all_start_methods() else 'spawn')
+#: Interval of checking memory usage of running processes. (in seconds)
+MONITOR_INTERVAL = 1
 #: Note for metrics
 NOTE = {
     1: '                    * Outcome = Length of found path (smaller = better).\n'
@@ -71,11 +86,15 @@ def _print_table(trial, part, results: Dict[str, List[Performance]]):
     :param part: Challenge part number
     """
 
+    # Board calls are shown only when they are counted (--board-stats).
+    show_calls = any(r.calls is not None for rs in results.values() for r in rs)
+
     # Print header
     print('-' * 72)
     print(f'\nCurrent game trial: #{trial}')
-    print(f' AgentName    | FailRate Outcome MemoryUsg TimeSpent SearchActs | Score ')
-    print('=' * 14 + '|' + '=' * 49 + '|' + '=' * 7)
+    print(f' AgentName    | FailRate Outcome MemoryUsg TimeSpent SearchActs | Score '
+          + ('| BoardCalls BoardTime' if show_calls else ''))
+    print('=' * 14 + '|' + '=' * 49 + '|' + '=' * 7 + ('|' + '=' * 21 if show_calls else ''))
 
     for agent in sorted(results.keys()):
         # Compute mean score
@@ -92,6 +111,13 @@ def _print_table(trial, part, results: Dict[str, List[Performance]]):
                                   length=10, decimal=2)
         points = _nan_mean_string([r.point for r in results[agent]],
                                   length=5, decimal=3)
+        board_calls = ''
+        if show_calls:
+            calls = _nan_mean_string([total_calls(r.calls) for r in results[agent] if r.calls is not None],
+                                     length=10, decimal=1)
+            seconds = _nan_mean_string([total_seconds(r.calls) for r in results[agent] if r.calls is not None],
+                                       length=6, decimal=3)
+            board_calls = f' | {calls} {seconds}sec'
 
         # Get last item
         last = results[agent][-1]
@@ -99,46 +125,162 @@ def _print_table(trial, part, results: Dict[str, List[Performance]]):
         # Name print option
         key_print = agent if len(agent) < 13 else agent[:9] + '...'
 
-        print(f' {key_print:12s} | {failure} {outcome} {memory}MB {timespent}sec {search} | {points}')
+        last_calls = ''
+        if show_calls:
+            last_calls = (f' | {_nan_format(total_calls(last.calls) if last.calls is not None else None, 10, 1)} '
+                          f'{_nan_format(total_seconds(last.calls) if last.calls is not None else None, 6, 3)}sec')
+
+        print(f' {key_print:12s} | {failure} {outcome} {memory}MB {timespent}sec {search} | {points}{board_calls}')
         print(f'   +- lastRun | {"FAILURE " if last.failure is not None else " " * 8} '
               f'{_nan_format(last.outcome, 7, 2)} {_nan_format(last.memory, 7, 2)}MB '
               f'{_nan_format(last.time, 6, 2)}sec {_nan_format(last.search, 10, 2)} '
-              f'| {_nan_format(last.point, 5, 3)}')
+              f'| {_nan_format(last.point, 5, 3)}{last_calls}')
 
-        # Write-down the failures
-        with Path(f'./failure_{agent}.txt').open('w+t') as fp:
-            fp.write('\n-----------------\n'.join([r.failure for r in results[agent] if r.failure is not None]))
+        # Write-down the failure of this trial, after the failures of previous trials
+        if last.failure is not None:
+            with Path(FAILURE_FILE.format(agent)).open('a+t') as fp:
+                if fp.tell() > 0:
+                    fp.write('\n-----------------\n')
+                fp.write(last.failure)
 
     print(NOTE[part])
 
-def _read_result(res_queue):
+def _read_result(worker):
     """
-    Read evaluation result from the queue.
-    :param res_queue: Queue to read
+    Read evaluation result from a worker, if the worker finished its job.
+    :param worker: Worker to read
     """
     global last_execution
 
-    while not res_queue.empty():
-        agent_i, perf_i = res_queue.get()
-        if agent_i not in last_execution or last_execution[agent_i] is None:
-            last_execution[agent_i] = perf_i
+    if worker.agent is not None and worker.connection.poll():
+        agent_i, perf_i = worker.connection.recv()
+        key = (worker.trial, agent_i)
+        if key not in last_execution or last_execution[key] is None:
+            last_execution[key] = perf_i
+        worker.agent = None
+
+
+def _rss_mb(worker):
+    """
+    Read the resident set size of a worker.
+    :param worker: Worker to read
+    :return: RSS in MB, or None if the worker does not exist anymore.
+    """
+    try:
+        return pu.Process(worker.pid).memory_info().rss / MEGABYTES
+    except pu.NoSuchProcess:
+        return None
+
 
+def _monitor(worker, now, check_memory=True):
+    """
+    Check whether a running job exceeds the limits, and terminate its worker if so.
+    :param worker: A worker running a job
+    :param now: Current timestamp
+    :param check_memory: True if memory usage of the job should be checked. (Increase of RSS since the job started)
+    :return: True if the worker is still alive
+    """
+    global last_execution
 
-def _execute(part, prob, agent):
+    if not worker.is_alive():
+        return False
+
+    # Print running info
+    begin = worker.begin
+    print(f'Running "{worker.agent}" (trial #{worker.trial}) for {now - begin:4.0f}/{TIME_LIMIT} second(s).', end='\r')
+
+    # For each running process, check memory usage. (Also when it is about to be terminated, for the record)
+    # Memory is measured from the beginning of the job, so memory left by earlier jobs of the worker is not counted.
+    time_spent = now - begin
+    p_mb = 0
+    if check_memory or time_spent > TIME_LIMIT:
+        rss = _rss_mb(worker)
+        if rss is None:
+            return True
+        p_mb = max(0.0, rss - worker.base_mb)
+
+    # For each running process, check for timeout
+    if time_spent > TIME_LIMIT:
+        worker.terminate()
+        logging.error(f'[TIMEOUT] {worker.agent} / '
+                      f'Process is running more than {TIME_LIMIT} sec, from ts={begin}; now={time()}')
+        last_execution[(worker.trial, worker.agent)] = Performance(
+            failure=f'Process is running more than {TIME_LIMIT} sec, from ts={begin}; now={time()}',
+            memory=p_mb,
+            point=1,
+            search=None,
+            time=time_spent,
+            outcome=None
+        )
+        return False
+    elif p_mb > MEMORY_LIMIT:
+        worker.terminate()
+        logging.error(f'[MEM LIMIT] {worker.agent} / '
+                      f'Job consumed memory more than {MEMORY_LIMIT}MB (used: {p_mb}MB since the job started)')
+        last_execution[(worker.trial, worker.agent)] = Performance(
+            failure=f'Job consumed memory more than {MEMORY_LIMIT}MB (used: {p_mb}MB since the job started)',
+            memory=p_mb,
+            point=1,
+            search=None,
+            time=time_spent,
+            outcome=None
+        )
+        return False
+
+    return True
+
+
+def _start_worker(agents):
+    """
+    Start a long-lived worker process, which evaluates jobs sent by _execute.
+    Workers are forked (where available) from this process, so the modules imported here are already loaded.
+    This waits until the worker preloads agents, so that memory of its first job is measured after preloading.
+    :param agents: Agents to be preloaded by the worker
+    :return: A worker process
+    """
+    connection, worker_end = CONTEXT.Pipe()
+    worker = CONTEXT.Process(name=f'EvalWorker', target=evaluation_worker, args=(worker_end, agents), daemon=True)
+    worker.start()
+    worker_end.close()
+    connection.recv()  # Ready signal
+    worker.connection = connection  # Connection for sending jobs and receiving results
+    worker.agent = None  # Agent tag of the running job (None if idle)
+    worker.trial = None  # Trial number of the running job
+    worker.begin = None  # Timestamp when the running job started
+    worker.jobs = 0  # Number of jobs sent to the worker
+    worker.start_mb = _rss_mb(worker) or 0.0  # RSS when the worker became ready (in MB)
+    worker.base_mb = worker.start_mb  # RSS when the running job started (in MB)
+    return worker
+
+
+def _should_recycle(worker):
+    """
+    Check whether an idle worker should be replaced, so that the next job starts from a clean process.
+    :param worker: Idle worker
+    :return: True if the worker ran WORKER_JOB_LIMIT jobs, or its RSS grew more than WORKER_GROWTH_LIMIT MB.
     """
-    Execute an evaluation for an agent with given initial state.
+    rss = _rss_mb(worker)
+    return worker.jobs >= WORKER_JOB_LIMIT or rss is None or rss - worker.start_mb > WORKER_GROWTH_LIMIT
+
+
+def _execute(worker, part, trial, prob, agent):
+    """
+    Execute an evaluation for an agent with given initial state, on an idle worker.
+    :param worker: Idle worker
     :param part: Challenge part number
+    :param trial: Game trial number
     :param prob: Initial state for a problem
     :param agent: Agent
-    :return: A process
     """
     global last_execution
 
-    proc = Process(name=f'EvalProc', target=evaluate_algorithm, args=(agent, prob, part, process_results), daemon=True)
-    proc.start()
-    proc.agent = agent  # Make an agent tag for this process
-    last_execution[agent] = None
-    return proc
+    worker.base_mb = _rss_mb(worker) or 0.0  # The worker is idle and has collected garbage of the previous job.
+    worker.connection.send((agent, prob, part, trial))
+    worker.agent = agent  # Make an agent tag for this worker
+    worker.trial = trial
+    worker.begin = time()
+    worker.jobs += 1
+    last_execution[(trial, agent)] = None
 
 
 # Main function
@@ -150,6 +292,16 @@ if __name__ == '__main__':
                            help='Challenge Part ID: 1, 2, 3, 4. E.g., To check your code with Part III, use --part 3')
     argparser.add_argument('--debug', action='store_true', dest='debug',
                            help='Enable debug mode')
+    argparser.add_argument('--native', action='store_true', dest='native',
+                           help='Use the array-backed game engine instead of pyquoridor')
+    argparser.add_argument('--resume', action='store_true', dest='resume',
+                           help='Resume the previous evaluation, skipping jobs recorded in the results file')
+    argparser.add_argument('--profile', action='store_true', dest='profile',
+                           help='Profile search methods of agents, and write collapsed stacks for flame graphs')
+    argparser.add_argument('--corpus', type=str, default=None,
+                           help='Read problems from a corpus file generated by corpus.py, instead of generating them')
+    argparser.add_argument('--board-stats', action='store_true', dest='board_stats',
+                           help='Count GameBoard calls made by agents, and show them in the table')
     args = argparser.parse_args()
 
     # Problem generator for the same execution
@@ -162,109 +314,136 @@ if __name__ == '__main__':
     # Performance measures
     performances = defaultdict(list)
     last_execution = {}
+    # Results of all jobs, written as soon as each job finishes
+    store = ResultStore(RESULTS_FILE.format(args.part), resume=args.resume)
+    # Profiles of previous runs are removed, unless their jobs are resumed.
+    if args.profile and not args.resume:
+        for agent_i in all_agents:
+            for t in range(GAMES):
+                profile_path(agent_i, t).unlink(missing_ok=True)
+    # Failures are written again from the results, trial by trial.
+    for agent_i in all_agents:
+        Path(FAILURE_FILE.format(agent_i)).open('w+t').close()
 
-    # Start evaluation process (using multi-processing)
-    process_results = Queue(len(all_agents) * 2)
+    # Start evaluation workers (using multi-processing)
     process_count = max(cpu_count() - 2, 1)
+    workers = [_start_worker(all_agents) for _ in range(process_count)]
+
+    # Generate all problems first, so that workers do not wait for the slowest agent of each trial.
+    # (Problems and the order of jobs are the same as running trials one by one.)
+    problems = []
+    hashes = []
+    jobs = deque()
+    corpus = ProblemCorpus(args.corpus) if args.corpus else None
+    if corpus is not None:
+        assert corpus.part == args.part, f'The corpus has problems of part {corpus.part}, not part {args.part}.'
+        assert len(corpus) >= GAMES, f'The corpus has only {len(corpus)} problems, but {GAMES} are required.'
 
-    # Run multiple times
     for t in range(GAMES):
-        # Clear all previous results
-        last_execution.clear()
-        while not process_results.empty():
-            process_results.get()
-
-        # Generate new problem
-        prob_generator._initialize(start_with_random_fence=STARTING_FENCES[args.part])
-        prob_spec = prob_generator.get_initial_state()
-        logging.info(f'Trial {t} begins!')
-
-        # Add random information for Part 3.
-        if args.part == 3:
-            prob_spec['random_action_indices'] = [randint(0, 65536) for _ in range(4)]
-
-        # Execute agents
-        processes = []
+        # Read or generate new problem (with edge turns, and random information for Part 3)
+        prob_spec = corpus[t] if corpus is not None else make_problem(prob_generator, args.part)
+        problems.append(prob_spec)
+        hashes.append(problem_hash(prob_spec))
+
+        # Queue jobs of agents
         agents_to_run = all_agents.copy()
         shuffle(agents_to_run)
-
-        while agents_to_run or processes:
-            # If there is a room for new execution, execute new thing.
-            if agents_to_run and len(processes) < process_count:
-                alg = agents_to_run.pop()
-                processes.append((_execute(args.part, prob_spec, alg), time()))
-
-            new_proc_list = []
-            for p, begin in processes:
-                if not p.is_alive():
-                    continue
-
-                # Print running info
-                now = time()
-                print(f'Running "{p.agent}" for {now - begin:4.0f}/{TIME_LIMIT} second(s).', end='\r')
-
-                # For each running process, check memory usage
-                try:
-                    p_mb = pu.Process(p.pid).memory_info().rss / MEGABYTES
-                except pu.NoSuchProcess:
-                    new_proc_list.append((p, begin))
-                    p_mb = 0
-
-                # For each running process, check for timeout
-                time_spent = now - begin
-                if time_spent > TIME_LIMIT:
-                    p.terminate()
-                    logging.error(f'[TIMEOUT] {p.agent} / '
-                                  f'Process is running more than {TIME_LIMIT} sec, from ts={begin}; now={time()}')
-                    last_execution[p.agent] = Performance(
-                        failure=f'Process is running more than {TIME_LIMIT} sec, from ts={begin}; now={time()}',
-                        memory=p_mb,
-                        point=1,
+        jobs.extend((t, agent) for agent in reversed(agents_to_run))
+
+    # Number of unfinished jobs in each trial, and the next trial to be printed
+    remaining = [len(all_agents)] * GAMES
+    next_trial = 0
+
+    # Skip jobs finished in the previous run.
+    for t, agent in list(jobs):
+        stored = store.get(args.part, t, hashes[t], agent)
+        if stored is not None:
+            jobs.remove((t, agent))
+            last_execution[(t, agent)] = stored
+            remaining[t] -= 1
+    if args.resume:
+        logging.info(f'Resuming evaluation: {len(store)} job(s) recorded, {len(jobs)} job(s) left.')
+
+    next_check = time()
+    while next_trial < GAMES:
+        # If there is an idle worker, execute new things.
+        for w in workers:
+            if jobs and w.agent is None:
+                t, agent = jobs.popleft()
+                if all((t, a) not in last_execution for a in all_agents):
+                    logging.info(f'Trial {t} begins!')
+                _execute(w, args.part, t, problems[t], agent)
+
+        # Sleep until a job ends, a worker dies, or a time limit/memory check is due.
+        running = [w for w in workers if w.agent is not None]
+        if running:
+            deadline = min([next_check] + [w.begin + TIME_LIMIT for w in running])
+            wait([w.connection for w in running] + [w.sentinel for w in running],
+                 timeout=max(0.0, deadline - time()))
+
+        # Check time limits always, and memory usage on its own timer.
+        now = time()
+        check_memory = now >= next_check
+        if check_memory:
+            next_check = now + MONITOR_INTERVAL
+        for i, w in enumerate(workers):
+            if w.agent is None:
+                continue
+
+            # Read result from the worker
+            trial, agent = w.trial, w.agent
+            _read_result(w)
+            if w.agent is not None and not _monitor(w, now, check_memory):
+                # The job failed with the worker. Replace it with a new worker.
+                w.join()
+                workers[i] = _start_worker(all_agents)
+            elif w.agent is not None:
+                continue
+            elif _should_recycle(w):
+                # Replace the worker, so that memory and module globals left by its jobs do not affect later jobs.
+                if w.is_alive():
+                    w.connection.send(None)
+                w.join()
+                workers[i] = _start_worker(all_agents)
+
+            # Record the result. (Jobs without results will run again when resumed.)
+            remaining[trial] -= 1
+            if last_execution.get((trial, agent)) is not None:
+                store.append(args.part, trial, hashes[trial], agent, last_execution[(trial, agent)])
+
+        # Print results of finished trials, in the order of trials.
+        while next_trial < GAMES and remaining[next_trial] == 0:
+            t = next_trial
+            next_trial += 1
+            logging.info(f'Reading results at Trial {t}')
+
+            # Merge last execution result to results
+            for agent_i in all_agents:
+                last = last_execution.get((t, agent_i))
+                if last is not None:
+                    performances[agent_i].append(last)
+                else:  # Last execution failed
+                    performances[agent_i].append(Performance(
+                        failure='No execution data found!',
+                        memory=-1,
+                        time=0,
+                        outcome=None,
                         search=None,
-                        time=time_spent,
-                        outcome=None
-                    )
-                elif p_mb > MEMORY_LIMIT:
-                    p.terminate()
-                    logging.error(f'[MEM LIMIT] {p.agent} / '
-                                  f'Process consumed memory more than {MEMORY_LIMIT}MB (used: {p_mb}MB)')
-                    last_execution[p.agent] = Performance(
-                        failure=f'Process consumed memory more than {MEMORY_LIMIT}MB (used: {p_mb}MB)',
-                        memory=p_mb,
-                        point=1,
-                        search=None,
-                        time=time_spent,
-                        outcome=None
-                    )
-                else:
-                    new_proc_list.append((p, begin))
-
-            # Prepare for the next round
-            processes = new_proc_list
-            # Read result from queue
-            _read_result(process_results)
-
-            # Wait for one seconds
-            sleep(1)
-
-        # Read results finally
-        logging.info(f'Reading results at Trial {t}')
-        _read_result(process_results)
-
-        # Merge last execution result to results
-        for agent_i in all_agents:
-            last = last_execution[agent_i]
-            if last is not None:
-                performances[agent_i].append(last_execution[agent_i])
-            else:  # Last execution failed
-                performances[agent_i].append(Performance(
-                    failure='No execution data found!',
-                    memory=-1,
-                    time=0,
-                    outcome=None,
-                    search=None,
-                    point=1
-                ))
-
-        # Sort the results for each performance criteria and give ranks to agents
-        _print_table(t, args.part, performances)
+                        point=1
+                    ))
+
+            # Sort the results for each performance criteria and give ranks to agents
+            _print_table(t, args.part, performances)
+
+    # Stop workers
+    for w in workers:
+        w.connection.send(None)
+    for w in workers:
+        w.join()
+    store.close()
+
+    # Merge profiles of all agents and trials
+    if args.profile:
+        merged_path = Path(PROFILE_DIR) / f'merged_part{args.part}.folded'
+        samples = merge_profiles({a: [profile_path(a, t) for t in range(GAMES)] for a in all_agents}, merged_path)
+        print(f'Profiles are merged into {merged_path} ({samples} samples).')
@@ -4,11 +4,20 @@ import logging
 from importlib import import_module
 # Package for multiprocessing (evaluation will be done with multiprocessing)
 from multiprocessing import Queue
+from multiprocessing.connection import Connection
+# Package for cleaning up memory between jobs
+import gc
 # Package for writing exceptions
 from traceback import format_exc
+# Package for reading program arguments
+import sys
 
 # Package for problem definitions
 from board import GameBoard, IS_RUN, IS_DEBUG
+# Package for profiling agents
+from profiler import StackSampler, profile_methods, profile_path
+# Package for counting board calls of agents
+from callstats import CallStats, histogram_percentile, total_calls, total_seconds
 # Package for supporting evaluation
 from .util import Performance
 from .part1 import execute_heuristic_search
@@ -16,6 +25,16 @@ from .part2 import execute_local_search
 from .part3 import execute_belief_state_search
 from .part4 import execute_adversarial_search
 
+#: True if the program run with '--profile' option. Search methods of agents will be profiled.
+IS_PROFILE = '--profile' in sys.argv
+#: True if the program run with '--board-stats' option. Board calls made by agents will be counted.
+IS_BOARD_STATS = '--board-stats' in sys.argv
+
+#: [PRIVATE] Statistics of board calls, shared by all evaluations of this process. (None if not counted)
+_BOARD_STATS = None
+if IS_BOARD_STATS:
+    _BOARD_STATS = CallStats()
+    _BOARD_STATS.instrument(GameBoard)
 
 
 def evaluate_algorithm(agent_name, initial_state, problem_id,
@@ -27,6 +46,49 @@ def evaluate_algorithm(agent_name, initial_state, problem_id,
     :param problem_id: Problem ID (1, 2, 3, or 4)
     :param result_queue: A multiprocessing Queue to return the execution result.
     """
+    result_queue.put((agent_name, _run_evaluation(agent_name, initial_state, problem_id)))
+
+
+def evaluation_worker(connection: Connection, agent_names: list):
+    """
+    Run evaluations repeatedly, as a long-lived worker process.
+    Modules of agents are loaded once, and the worker sends True when it is ready. Then each job receives
+    (agent_name, initial_state, problem_id, trial) through the connection and sends back (agent_name, performance).
+    The worker stops when it receives None.
+    :param connection: A multiprocessing Connection to the main process
+    :param agent_names: Agents to be loaded before running jobs
+    """
+    # Preload agent modules, so that jobs do not pay for imports.
+    for agent_name in agent_names:
+        try:
+            import_module(f'agents.{agent_name}')
+        except Exception:
+            pass  # The failure will be reported by the job of that agent.
+    # Memory of the first job is measured from here, after preloading.
+    connection.send(True)
+
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+
+        agent_name, initial_state, problem_id, trial = job
+        performance = _run_evaluation(agent_name, initial_state, problem_id, trial)
+        # Free the objects of this job before sending the result, so that the worker is idle and clean
+        # when the main process reads its memory usage at the beginning of the next job.
+        gc.collect()
+        connection.send((agent_name, performance))
+
+
+def _run_evaluation(agent_name, initial_state, problem_id, trial=0):
+    """
+    Run the evaluation for an agent in the current process.
+    :param agent_name: Agent to be evaluated
+    :param initial_state: Initial state for the test
+    :param problem_id: Problem ID (1, 2, 3, or 4)
+    :param trial: Game trial number, used for naming profile files
+    :return: Performance of the agent
+    """
     # Initialize logger
     if not IS_RUN:
         logging.basicConfig(level=logging.DEBUG if IS_DEBUG else logging.INFO,
@@ -50,11 +112,18 @@ def evaluate_algorithm(agent_name, initial_state, problem_id,
         # When agent loading fails, send the failure log to main process.
         failure = format_exc()
         logger.error('Loading failed!', exc_info=e)
-        result_queue.put(
-            (agent_name,
-             Performance(failure, outcome=None, time=None, search=None, memory=None))
-        )
-        return
+        return Performance(failure, outcome=None, time=None, search=None, memory=None, point=1)
+
+    # Profile search methods of the agent, if asked
+    sampler = None
+    if IS_PROFILE:
+        sampler = StackSampler()
+        profile_methods(agent, sampler)
+
+    # Count board calls made by the agent, if asked
+    if _BOARD_STATS is not None:
+        _BOARD_STATS.reset()
+        _BOARD_STATS.record_methods(agent)
 
     # Execute algorithm
     if problem_id == 1:
@@ -66,6 +135,23 @@ def evaluate_algorithm(agent_name, initial_state, problem_id,
     else:
         performance = execute_adversarial_search(agent, initial_state, logger)
 
+    if sampler is not None:
+        path = profile_path(agent_name, trial)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sampler.write(path)
+        logger.info(f'Profile of {agent_name} agent is written to {path}: {sampler.samples} samples, '
+                    f'{sampler.board_ratio():.1%} inside GameBoard and {1 - sampler.board_ratio():.1%} in agent code.')
+
+    if _BOARD_STATS is not None:
+        calls = _BOARD_STATS.summary()
+        performance = performance._replace(calls=calls)
+        logger.info(f'Board calls of {agent_name} agent: {total_calls(calls)} calls, '
+                    f'{total_seconds(calls):.3f} seconds in total. ' +
+                    ', '.join(f'{name} x{record["calls"]} ({record["seconds"]:.3f}s, '
+                              f'p50<{histogram_percentile(record["histogram"], 0.5)}us, '
+                              f'p99<{histogram_percentile(record["histogram"], 0.99)}us)'
+                              for name, record in calls.items()))
+
     if IS_DEBUG:
         logger.debug(f'Execution Result: {performance}.')
-    result_queue.put((agent_name, performance))
+    return performance
@@ -1,17 +1,18 @@
 import traceback
 from time import time
 from logging import Logger
-import psutil
-import os
 
 from pyquoridor.exceptions import InvalidMove, InvalidFence
 
 from action import Action, MOVE
 from board import GameBoard
+from memory import PeakMemory
 from .util import Performance, MEGABYTES, load_ta_agent
 
 HARD_TIME_LIMIT = 0
 HARD_MEMORY_LIMIT = 0
+#: Backend for measuring peak memory of search. (See memory.PeakMemory)
+MEMORY_BACKEND = 'rss'
 
 def calculate_total_turns(board: GameBoard, solution: list[Action]) -> int:
     if not solution:
@@ -24,8 +25,7 @@ def calculate_total_turns(board: GameBoard, solution: list[Action]) -> int:
         if isinstance(action, MOVE):
             if current_pos is None:
                 player = action.player
-                pawn_pos = board._board.pawns[player].square.location
-                current_pos = (pawn_pos[0], pawn_pos[1])
+                current_pos = board.get_state().pawn(player)
             
             next_pos = action.position
             turns = board.get_move_turns(current_pos, next_pos)
@@ -45,13 +45,9 @@ def execute_heuristic_search(agent, initial_state: dict, logger: Logger):
     if ta_agent is not None:
         agents['ta'] = ta_agent
 
-    process = psutil.Process(os.getpid())
-    
     # For each agent, execute the same problem.
     results = {}
     for k, a in agents.items():
-        initial_memory = process.memory_info().rss / MEGABYTES
-        
         # Initialize board and log initial memory size
         board.set_to_state(initial_state, is_initial=True)
         board.reset_memory_usage()
@@ -59,53 +55,34 @@ def execute_heuristic_search(agent, initial_state: dict, logger: Logger):
 
         solution = None
         failure = None
-        peak_memory = initial_memory 
+        meter = PeakMemory(MEMORY_BACKEND)
 
         # Start to search
         logger.info(f'Begin to search using {a.name} agent.')
         time_start = time()
         
         try:
-            def update_memory():
-                nonlocal peak_memory
-                try:
-                    current = process.memory_info().rss / MEGABYTES
-                    peak_memory = max(peak_memory, current)
-                except:
-                    pass
-            
-            import threading
-            stop_monitoring = False
-            
-            def memory_monitor():
-                while not stop_monitoring:
-                    update_memory()
-                    import time
-                    time.sleep(0.1)
-            
-            monitor_thread = threading.Thread(target=memory_monitor, daemon=True)
-            monitor_thread.start()
-            
-            solution = a.heuristic_search(board)
-            
-            stop_monitoring = True
-            monitor_thread.join(timeout=1.0)
-            
+            with meter:
+                solution = a.heuristic_search(board)
+
             assert isinstance(solution, list), \
                 'Solution should be a LIST of actions. The current outcome is not a list.'
             assert all(isinstance(s, Action) for s in solution), \
                 'Solution should be a list of ACTIONs. It contains an element which is not an ACTION.'
         except:
             failure = traceback.format_exc()
-        finally:
-            stop_monitoring = True
 
         # Compute how much time passed 
         time_end = time()
         time_delta = time_end - time_start  
 
-        board_memory = board.get_max_memory_usage() / MEGABYTES
-        memory_usage = max(board_memory, peak_memory - initial_memory)
+        # Compute how much memory used during search. Board's record is used if the backend is not available.
+        if meter.peak is not None:
+            memory_usage = meter.peak / MEGABYTES
+            logger.info(f'Memory usage of {a.name} agent ({meter.backend}): '
+                        f'peak {memory_usage:.2f}MB, current {meter.current / MEGABYTES:.2f}MB')
+        else:
+            memory_usage = board.get_max_memory_usage() / MEGABYTES
 
         if k == 'agent' and time_delta > HARD_TIME_LIMIT > 0:
             return Performance(
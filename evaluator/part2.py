@@ -6,9 +6,12 @@ from pyquoridor.exceptions import InvalidMove, InvalidFence
 
 from action import Action, MOVE, BLOCK
 from board import GameBoard
+from clock import Deadline
 from .util import Performance, MEGABYTES, load_ta_agent
 
 HARD_TIME_LIMIT = 300
+#: Time for reaching the intermediate stage. Agents receive it as the soft limit of their deadline.
+SOFT_TIME_LIMIT = 30
 HARD_MEMORY_LIMIT = 10
 
 
@@ -41,7 +44,7 @@ def execute_local_search(agent, initial_state: dict, logger: Logger):
         # Start to search
         logger.info(f'Begin to search using {a.name} agent.')
         time_start = time()
-        time_limit = time_start + HARD_TIME_LIMIT
+        time_limit = Deadline(time_start + HARD_TIME_LIMIT, soft=time_start + SOFT_TIME_LIMIT)
         try:
             while time() < time_limit:
                 move = a.local_search(board, time_limit=time_limit)
@@ -122,7 +125,7 @@ def execute_local_search(agent, initial_state: dict, logger: Logger):
         is_beating_ta_time = results['ta'].search >= res.search
 
     is_basic_stage = (res.failure is None) and is_beating_ta_outcome
-    is_intermediate_stage = is_basic_stage and (res.time <= 30) and (res.memory <= 5)
+    is_intermediate_stage = is_basic_stage and (res.time <= SOFT_TIME_LIMIT) and (res.memory <= 5)
     is_advanced_stage = is_intermediate_stage and is_beating_ta_time
     # TA computation time will be measured on online system.
 
@@ -5,37 +5,30 @@ from typing import Literal
 
 from pyquoridor.exceptions import InvalidMove, InvalidFence
 
-from action import Action, MOVE, BLOCK
+from action import Action
 from board import GameBoard
+from clock import Deadline
 from .util import Performance, MEGABYTES, load_ta_agent
 
 HARD_TIME_LIMIT = 600
+#: Time for reaching the intermediate stage. Agents receive it as the soft limit of their deadline.
+SOFT_TIME_LIMIT = 5
 HARD_MEMORY_LIMIT = 1024
 
 
 def execute_random_action(game: GameBoard, player: Literal['white', 'black'],
                           state: dict, seed: int):
-    fence_actions = [BLOCK(player, *f)
-                     for f in game.get_applicable_fences(player)]
-    move_actions = [MOVE(player, m)
-                    for m in game.get_applicable_moves(player)]
+    # The action is resolved once per state and seed, so the chosen action can be executed directly.
+    action = game._random_action(state, player, seed)
+    if action is None:
+        raise InvalidMove('No possible move left for random agent!')
 
-    actions = fence_actions + move_actions
-    while len(actions) > 0:
-        try:
-            action = actions[seed % len(actions)]
-            actions.remove(action)
-            new_state = game.simulate_action(state, action)
-            return new_state
-        except (InvalidMove, InvalidFence):
-            pass
-
-    raise InvalidMove('No possible move left for random agent!')
+    return game.simulate_action(state, action)
 
 
 def execute_belief_state_search(agent, initial_state: dict, logger: Logger):
     # Pop random agent action from the state
-    action_seed = initial_state.pop('random_action_indices')
+    action_seed = initial_state['random_action_indices']
 
     # Set up the given problem
     board = GameBoard()
@@ -63,7 +56,7 @@ def execute_belief_state_search(agent, initial_state: dict, logger: Logger):
         # Start to search
         logger.info(f'Begin to search using {a.name} agent.')
         time_start = time()
-        time_limit = time_start + HARD_TIME_LIMIT
+        time_limit = Deadline(time_start + HARD_TIME_LIMIT, soft=time_start + SOFT_TIME_LIMIT)
         try:
             solution = a.belief_state_search(board, time_limit=time_limit)
             assert isinstance(solution, list),\
@@ -149,7 +142,7 @@ def execute_belief_state_search(agent, initial_state: dict, logger: Logger):
         is_beating_ta_outcome = results['ta'].outcome <= res.outcome
 
     is_basic_stage = res.failure is None
-    is_intermediate_stage = is_basic_stage and (res.time <= 5)
+    is_intermediate_stage = is_basic_stage and (res.time <= SOFT_TIME_LIMIT)
     is_advanced_stage = is_intermediate_stage and is_beating_ta_outcome
     # TA computation time will be measured on online system.
 
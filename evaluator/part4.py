@@ -5,9 +5,12 @@ from typing import Literal
 
 from action import Action
 from board import GameBoard
+from clock import Deadline
 from .util import Performance, MEGABYTES, load_ta_agent, load_random_agent
 
 HARD_TIME_LIMIT = 60
+#: Time for reaching the intermediate stage (for each turn). Agents receive it as the soft limit of their deadline.
+SOFT_TIME_LIMIT = 5
 HARD_MEMORY_LIMIT = 1024
 
 
@@ -49,7 +52,7 @@ def execute_adversarial_search(agent, initial_state: dict, logger: Logger,
             try:
                 for a in order:
                     time_start = time()  # Time limit applies for each turn
-                    time_limit = time_start + HARD_TIME_LIMIT
+                    time_limit = Deadline(time_start + HARD_TIME_LIMIT, soft=time_start + SOFT_TIME_LIMIT)
 
                     action = a.adversarial_search(board, time_limit=time_limit)
                     assert isinstance(action, Action), 'Solution should be an Action.'
@@ -111,7 +114,7 @@ def execute_adversarial_search(agent, initial_state: dict, logger: Logger,
         is_beating_ta_outcome = results['ta'].outcome == 1.0
 
     is_basic_stage = (res.failure is None) and (res.outcome == 1.0)
-    is_intermediate_stage = is_basic_stage and (res.time <= 5)
+    is_intermediate_stage = is_basic_stage and (res.time <= SOFT_TIME_LIMIT)
     is_advanced_stage = is_intermediate_stage and is_beating_ta_outcome
     # TA computation time will be measured on online system.
 
@@ -1,4 +1,5 @@
 from collections import namedtuple
+from importlib import import_module
 from traceback import print_exc
 
 #: Size of MB in bytes
@@ -13,21 +14,38 @@ Performance = namedtuple('Performance',
                              'time', # Time for execution
                              'search', # Amount of search actions
                              'memory', # Memory consumption
-                             'point'])  # Point earned (basic/intermediate/high)
+                             'point',  # Point earned (basic/intermediate/high)
+                             'calls'],  # Summary of GameBoard calls by the agent (None if not counted)
+                         defaults=(None,))
+
+
+#: [PRIVATE] Agent modules loaded already, kept for later calls. (None if the module cannot be loaded)
+_AGENT_MODULES = {}
+
+
+def _load_agent_module(name):
+    if name not in _AGENT_MODULES:
+        try:
+            _AGENT_MODULES[name] = import_module(name)
+        except:
+            _AGENT_MODULES[name] = None
+    return _AGENT_MODULES[name]
 
 
 def load_ta_agent(board, is_opponent=False):
+    module = _load_agent_module('agents._ta')
+    if module is None:
+        return None
     try:
-        from importlib import import_module
-        module = import_module('agents._ta')
         return module.Agent(board.get_opponent_id() if is_opponent else board.get_player_id())
     except:
         return None
 
 def load_random_agent(board, is_opponent=False):
+    module = _load_agent_module('agents._random')
+    if module is None:
+        return None
     try:
-        from importlib import import_module
-        module = import_module('agents._random')
         return module.Agent(board.get_opponent_id() if is_opponent else board.get_player_id())
     except:
-        return None
\ No newline at end of file
+        return None
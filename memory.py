@@ -0,0 +1,239 @@
+# Logging method for memory tracking
+import logging
+# Library for OS environment
+import os
+# Package for background sampling
+import threading
+# Package for tracing allocations of Python objects
+import tracemalloc
+# Type specification for Python code
+from typing import Optional
+
+# Process information class: for memory usage tracking
+from psutil import Process as PUInfo, NoSuchProcess
+
+#: [PRIVATE] Status file of the current process. (Linux only)
+_STATUS_FILE = '/proc/self/status'
+#: [PRIVATE] Writing '5' to this file resets the high-water mark of the current process. (Linux 4.0+)
+_CLEAR_REFS_FILE = '/proc/self/clear_refs'
+
+
+def read_process_status(field: str = 'VmHWM') -> int:
+    """
+    Read a memory field of /proc/self/status.
+
+    :param field: Name of the field, e.g., VmHWM (peak resident set size) or VmRSS (current resident set size)
+    :return: Value of the field in bytes, or -1 if the field is not available on this system.
+    """
+    try:
+        with open(_STATUS_FILE, 'rb') as file:
+            for line in file:
+                if line.startswith(field.encode() + b':'):
+                    return int(line.split()[1]) * 1024  # Values are written in kB.
+    except (OSError, ValueError, IndexError):
+        pass
+    return -1
+
+
+def reset_high_water_mark() -> bool:
+    """
+    Reset the kernel's high-water mark (VmHWM) of the current process to its current resident set size.
+
+    :return: True if the mark has been reset.
+    """
+    try:
+        with open(_CLEAR_REFS_FILE, 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class MemoryTracker:
+    """
+    Tracks the current and the maximum resident set size (RSS) of this process, with small cost on hot paths.
+
+    Peaks are collected from three sources:
+    - Sampling on calls: tick() reads RSS once every `every` calls. (every=1 reads it on every call)
+    - Sampling on time: a background thread reads RSS every `interval` milliseconds. (interval=0 disables it)
+    - High-water mark: VmHWM of the kernel, read when the peak is reported. It records every peak exactly,
+      but only on Linux. The mark is reset by reset() when the kernel allows, and otherwise used only if it grows.
+
+    Usage:
+        - `tracker = MemoryTracker(every=64)` creates a tracker.
+        - `tracker.reset()` begins a new measurement, from the current RSS.
+        - `tracker.tick()` should be called on hot paths.
+        - `tracker.peak()` returns the maximum RSS increase (in bytes) since reset().
+    """
+
+    #: Default number of calls between samples, when the high-water mark reports peaks exactly.
+    DEFAULT_EVERY = 64
+
+    def __init__(self, every: int = None, interval: float = 0, high_water_mark: bool = True):
+        """
+        :param every: Read RSS once every this number of tick() calls.
+            (Default: DEFAULT_EVERY if the high-water mark is available, otherwise 1)
+        :param interval: Read RSS every this number of milliseconds, in a background thread. (0 = no thread)
+        :param high_water_mark: True if the kernel's high-water mark should be used when it is available.
+        """
+        #: [PRIVATE] Process information of this process
+        self._process = PUInfo(os.getpid())
+        #: [PRIVATE] Logger instance
+        self._logger = logging.getLogger('MemoryTracker')
+        #: [PRIVATE] Sampling configuration
+        self._use_hwm = high_water_mark and read_process_status('VmHWM') >= 0
+        self._every = every if every is not None else (self.DEFAULT_EVERY if self._use_hwm else 1)
+        self._interval = interval
+        assert self._every >= 1, 'every should be a positive integer.'
+        #: [PRIVATE] Remaining calls before the next sample
+        self._countdown = self._every
+        #: [PRIVATE] RSS at reset, and the maximum RSS sampled since then. (-1 if tracking failed)
+        self._initial = 0
+        self._maximum = 0
+        #: [PRIVATE] High-water mark at reset
+        self._hwm_base = -1
+        #: [PRIVATE] Background sampler and its stop signal
+        self._thread = None
+        self._stop = threading.Event()
+
+        if interval > 0:
+            self._thread = threading.Thread(target=self._run, name='MemoryTracker', daemon=True)
+            self._thread.start()
+
+    @property
+    def uses_high_water_mark(self) -> bool:
+        """
+        :return: True if the kernel's high-water mark is used to report peaks.
+        """
+        return self._use_hwm
+
+    def current(self) -> int:
+        """
+        Read the current RSS, and update the maximum.
+
+        :return: Current RSS in bytes, or -1 if the process cannot be tracked.
+        """
+        if self._maximum < 0:
+            return -1
+
+        try:
+            usage = self._process.memory_info().rss
+        except NoSuchProcess:
+            self._logger.warning('As tracking the process has been failed, '
+                                 'I turned off memory usage tracking ability.')
+            self._maximum = -1
+            return -1
+
+        if self._initial == 0:
+            self._initial = usage
+        if usage > self._maximum:
+            self._maximum = usage
+        return usage
+
+    def tick(self):
+        """
+        Count a call on hot paths. RSS is read only once every `every` calls.
+        """
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self._every
+            self.current()
+
+    def reset(self):
+        """
+        Begin a new measurement from the current RSS.
+        """
+        self._initial = 0
+        self._maximum = 0
+        self._countdown = self._every
+        if self._use_hwm:
+            reset_high_water_mark()
+            self._hwm_base = read_process_status('VmHWM')
+        self.current()
+
+    def peak(self) -> int:
+        """
+        :return: Maximum increase of RSS since reset(), in bytes. (0 if the process cannot be tracked)
+        """
+        self.current()
+        maximum = self._maximum
+        if self._use_hwm and maximum >= 0:
+            hwm = read_process_status('VmHWM')
+            if hwm > self._hwm_base:
+                # The mark grew after reset, so the exact peak is the mark itself.
+                maximum = max(maximum, hwm)
+        return max(0, maximum - self._initial)
+
+    def close(self):
+        """
+        Stop the background sampler, if any.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        """
+        [PRIVATE] Body of the background sampler.
+        """
+        while not self._stop.wait(self._interval / 1000):
+            self.current()
+
+
+class PeakMemory:
+    """
+    Measures the peak memory used by a block of code, without polling.
+
+    Backends:
+    - 'rss': Resets the kernel's high-water mark before the block and reads it after the block.
+      The peak includes everything the process allocated (same as RSS), and costs nothing during the block.
+      Available only on Linux; peak is None if the mark cannot be reset.
+    - 'tracemalloc': Peak of Python heap, traced by tracemalloc. It is exact for Python objects,
+      but it does not see memory allocated outside of Python allocators, and it slows down allocations.
+
+    Usage:
+        - `with PeakMemory('rss') as meter: agent.search(board)`
+        - `meter.peak` and `meter.current` are increases in bytes, from the beginning of the block.
+    """
+
+    #: Available backends
+    BACKENDS = ('rss', 'tracemalloc')
+
+    def __init__(self, backend: str = 'rss'):
+        assert backend in self.BACKENDS, f'backend should be one of {self.BACKENDS}'
+        #: Name of the backend
+        self.backend = backend
+        #: Peak and current usage after the block, as increases from the beginning in bytes. (None if unavailable)
+        self.peak: Optional[int] = None
+        self.current: Optional[int] = None
+        #: [PRIVATE] Usage at the beginning, and whether this object started tracemalloc.
+        self._base = -1
+        self._started_tracing = False
+
+    def __enter__(self):
+        self.peak = self.current = None
+        if self.backend == 'tracemalloc':
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+        else:
+            self._base = read_process_status('VmRSS') if reset_high_water_mark() else -1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.backend == 'tracemalloc':
+            current, peak = tracemalloc.get_traced_memory()
+            if self._started_tracing:
+                tracemalloc.stop()
+            self.peak, self.current = peak - self._base, current - self._base
+        elif self._base >= 0:
+            self.peak = max(0, read_process_status('VmHWM') - self._base)
+            self.current = read_process_status('VmRSS') - self._base
+        return False
+
+
+# Export tracker and helper functions
+__all__ = ['MemoryTracker', 'PeakMemory', 'read_process_status', 'reset_high_water_mark']
@@ -0,0 +1,176 @@
+# Package for counting stacks
+from collections import Counter
+# Package for wrapping methods
+from functools import wraps
+# Library for OS environment
+import os
+# Package for file handling
+from pathlib import Path
+# Package for reading stacks of the running thread
+import sys
+import threading
+# Type specification for Python code
+from typing import Dict, Iterable, Tuple
+
+#: Search methods of agents, which are profiled.
+SEARCH_METHODS = ('heuristic_search', 'local_search', 'belief_state_search', 'adversarial_search')
+#: Directory for profile files
+PROFILE_DIR = './profiles'
+#: Name of frames added to stacks that run inside GameBoard, so that flame graphs separate them from agent code.
+BOARD_FRAME = '[GameBoard]'
+
+#: [PRIVATE] Files that implement GameBoard. Time spent in these files (and pyquoridor) is time of the board.
+_BOARD_FILES = {'board.py', 'engine.py', 'distance.py', 'state.py', 'action.py'}
+
+
+def _frame_name(code) -> str:
+    name = getattr(code, 'co_qualname', code.co_name)  # Qualified names are available from Python 3.11
+    return f'{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+
+
+def _is_board_code(code) -> bool:
+    return os.path.basename(code.co_filename) in _BOARD_FILES or 'pyquoridor' in code.co_filename
+
+
+class StackSampler:
+    """
+    Sampling profiler for the thread that starts it.
+
+    A background thread reads the stack of the profiled thread every `interval` seconds,
+    only while a profiled method (See profile_methods) is running. Stacks are counted in the collapsed format
+    of flame-graph tools: frames from the root to the leaf, separated by semicolons.
+    When the stack enters GameBoard, BOARD_FRAME is inserted before the first frame of the board.
+
+    Usage:
+        - `sampler = StackSampler()`
+        - `profile_methods(agent, sampler)` makes the search methods of the agent profiled.
+        - `sampler.write(path)` writes the collapsed stacks; `sampler.board_ratio()` is the share of GameBoard.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        """
+        :param interval: Interval of sampling, in seconds
+        """
+        #: Number of samples for each stack
+        self.stacks: Dict[Tuple[str, ...], int] = Counter()
+        #: Number of samples taken inside GameBoard
+        self.board_samples = 0
+        #: [PRIVATE] Sampling configuration and state
+        self._interval = interval
+        self._target = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def board_ratio(self) -> float:
+        """
+        :return: Ratio of samples taken inside GameBoard (0 if no samples)
+        """
+        return self.board_samples / self.samples if self.stacks else 0.0
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='StackSampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        """
+        [PRIVATE] Body of the sampling thread.
+        """
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._target)
+            codes = []
+            while frame is not None and frame.f_code is not _call.__code__:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if frame is None or not codes or codes[-1] in _SAMPLER_CODES:  # Not inside a profiled method.
+                continue
+
+            stack = []
+            in_board = False
+            for code in reversed(codes):
+                if not in_board and _is_board_code(code):
+                    in_board = True
+                    stack.append(BOARD_FRAME)
+                stack.append(_frame_name(code))
+            self.stacks[tuple(stack)] += 1
+            self.board_samples += int(in_board)
+
+    def collapsed(self, root: str = None) -> Iterable[str]:
+        """
+        :param root: Name of the root frame to be added to every stack. (None if no root frame)
+        :return: Lines of collapsed stacks, e.g., 'agent;search (default.py:10);[GameBoard];... 42'
+        """
+        for stack, count in sorted(self.stacks.items()):
+            yield ';'.join(((root,) if root else ()) + stack) + f' {count}'
+
+    def write(self, path):
+        Path(path).write_text(''.join(line + '\n' for line in self.collapsed()))
+
+
+#: [PRIVATE] Code of the sampler, which runs around profiled methods.
+_SAMPLER_CODES = {StackSampler.start.__code__, StackSampler.stop.__code__}
+
+
+def _call(sampler: StackSampler, method, *args, **kwargs):
+    """
+    [PRIVATE] Call a method while the sampler is running. Stacks are read from the method called here.
+    """
+    sampler.start()
+    try:
+        return method(*args, **kwargs)
+    finally:
+        sampler.stop()
+
+
+def profile_methods(agent, sampler: StackSampler, methods: Iterable[str] = SEARCH_METHODS):
+    """
+    Make the search methods of an agent profiled by the sampler. Only the given agent instance is changed.
+    """
+    for name in methods:
+        method = getattr(agent, name, None)
+        if callable(method):
+            setattr(agent, name, wraps(method)(lambda *args, _method=method, **kwargs:
+                                               _call(sampler, _method, *args, **kwargs)))
+
+
+def profile_path(agent_name: str, trial: int) -> Path:
+    """
+    :return: Path of the collapsed-stack file for an agent and a trial
+    """
+    return Path(PROFILE_DIR) / f'{agent_name}_trial{trial}.folded'
+
+
+def merge_profiles(files: Dict[str, Iterable[Path]], output) -> int:
+    """
+    Merge collapsed-stack files into a file, adding the name of each agent as the root frame.
+
+    :param files: Dictionary of agent name -> collapsed-stack files of the agent
+    :param output: Path of the merged file
+    :return: The number of samples merged
+    """
+    merged = Counter()
+    for agent_name, paths in files.items():
+        for path in paths:
+            if not Path(path).exists():
+                continue
+            for line in Path(path).read_text().splitlines():
+                stack, _, count = line.rpartition(' ')
+                merged[f'{agent_name};{stack}'] += int(count)
+
+    Path(output).write_text(''.join(f'{stack} {count}\n' for stack, count in sorted(merged.items())))
+    return sum(merged.values())
+
+
+# Export profiling tools
+__all__ = ['StackSampler', 'profile_methods', 'profile_path', 'merge_profiles',
+           'SEARCH_METHODS', 'PROFILE_DIR', 'BOARD_FRAME']
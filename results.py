@@ -0,0 +1,102 @@
+# Package for hashing problems
+from hashlib import sha1
+# Package for reading and writing records
+import json
+# Library for OS environment
+import os
+# Package for file handling
+from pathlib import Path
+# Type specification for Python code
+from typing import Dict, Optional, Tuple, Union
+
+# Import compact state representation
+from state import BoardState
+# Import evaluation records
+from evaluator.util import Performance
+
+
+def problem_hash(problem: Union[BoardState, dict]) -> str:
+    """
+    Compute a short hash of a problem, which is the same across runs.
+
+    :param problem: Initial state of a problem, possibly with extra information (e.g., random_action_indices)
+    :return: Hexadecimal string of 16 digits
+    """
+    state = BoardState.from_dict(problem)
+    extra = {key: problem[key] for key in problem if key not in state}
+    return sha1(state.to_bytes() + json.dumps(extra, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class ResultStore:
+    """
+    Append-only store of evaluation results, written as a JSON-lines file.
+
+    Each line records a finished job, keyed by (part, trial, problem hash, agent).
+    Lines are flushed to the disk as soon as they are written, so a crashed or interrupted run can resume
+    from the jobs already finished. Broken lines (e.g., written partially when the run was killed) are ignored.
+
+    Usage:
+        - `store = ResultStore('results_part1.jsonl', resume=True)` opens a store, keeping previous results.
+        - `store.get(1, 0, problem_hash(problem), 'default')` returns a Performance or None.
+        - `store.append(1, 0, problem_hash(problem), 'default', performance)` records a result.
+    """
+
+    def __init__(self, path: Union[str, Path], resume: bool = False):
+        """
+        :param path: Path of the JSON-lines file
+        :param resume: True if results in the file should be kept. Otherwise, the file will be cleared.
+        """
+        #: Path of the store
+        self.path = Path(path)
+        #: [PRIVATE] Results read from the file. {(part, trial, problem hash, agent): Performance}
+        self._results: Dict[Tuple[int, int, str, str], Performance] = {}
+
+        if resume and self.path.exists():
+            with self.path.open('rt', encoding='UTF-8') as fp:
+                for line in fp:
+                    try:
+                        record = json.loads(line)
+                        key = (record['part'], record['trial'], record['problem'], record['agent'])
+                        self._results[key] = Performance(**record['performance'])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+        #: [PRIVATE] File handle for appending records
+        self._file = self.path.open('at' if resume else 'wt', encoding='UTF-8')
+        if resume and self.path.stat().st_size > 0:
+            with self.path.open('rb') as fp:
+                fp.seek(-1, os.SEEK_END)
+                if fp.read(1) != b'\n':  # Finish the broken line, so that new records start from a new line.
+                    self._file.write('\n')
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, part: int, trial: int, problem: str, agent: str) -> Optional[Performance]:
+        """
+        :return: Performance recorded for the job, or None if the job has not finished.
+        """
+        return self._results.get((part, trial, problem, agent))
+
+    def append(self, part: int, trial: int, problem: str, agent: str, performance: Performance):
+        """
+        Record a result of a finished job, and write it to the disk immediately.
+
+        :param part: Challenge part number
+        :param trial: Game trial number
+        :param problem: Hash of the problem (See problem_hash)
+        :param agent: Name of the agent
+        :param performance: Result of the job
+        """
+        self._results[(part, trial, problem, agent)] = performance
+        self._file.write(json.dumps({'part': part, 'trial': trial, 'problem': problem, 'agent': agent,
+                                     'performance': performance._asdict()}) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+# Export the store and the hash function
+__all__ = ['ResultStore', 'problem_hash']
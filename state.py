@@ -0,0 +1,330 @@
+# Abstract class for read-only dictionary-like objects
+from collections.abc import Mapping
+# Random number generator for Zobrist hashing
+from random import Random
+# Type specification for Python code
+from typing import Tuple, List, Literal, Union
+
+#: Size of the board (the number of rows/columns)
+BOARD_SIZE = 9
+#: Size of the fence center grid (the number of rows/columns)
+FENCE_GRID_SIZE = BOARD_SIZE - 1
+#: Order of players in the compact representation
+PLAYERS = ('black', 'white')
+#: Maximum number of fences for each player
+MAX_FENCES = 10
+
+#: [PRIVATE] Random bit-strings for Zobrist hashing.
+#: The seed is fixed, so the same state has the same key across processes and runs.
+_zobrist_rng = Random(57456)
+#: Bit-strings for pawn squares of each player
+ZOBRIST_PAWN = {p: tuple(_zobrist_rng.getrandbits(64) for _ in range(BOARD_SIZE ** 2)) for p in PLAYERS}
+#: Bit-strings for fence centers of each orientation
+ZOBRIST_FENCE = {o: tuple(_zobrist_rng.getrandbits(64) for _ in range(FENCE_GRID_SIZE ** 2)) for o in 'hv'}
+#: Bit-strings for the number of remaining fences of each player
+ZOBRIST_FENCES_LEFT = {p: tuple(_zobrist_rng.getrandbits(64) for _ in range(MAX_FENCES + 1)) for p in PLAYERS}
+#: Bit-strings for the player to move
+ZOBRIST_CURRENT_PLAYER = {p: _zobrist_rng.getrandbits(64) for p in PLAYERS}
+#: Bit-strings for the agent's player ID
+ZOBRIST_PLAYER_ID = {p: _zobrist_rng.getrandbits(64) for p in PLAYERS}
+
+
+def square_index(row: int, col: int) -> int:
+    """
+    Convert a coordinate of square into an index for compact representation.
+    """
+    return row * BOARD_SIZE + col
+
+
+def fence_index(row: int, col: int) -> int:
+    """
+    Convert a coordinate of fence center into a bit index of fence bitboard.
+    """
+    return row * FENCE_GRID_SIZE + col
+
+
+def iterate_bits(bits: int):
+    """
+    Iterate the index of bits set in the given integer, in increasing order.
+    """
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def _coordinate_string(row: int, col: int) -> str:
+    """
+    Coordinate string used in FEN. (Same as pyquoridor.utils.coord2str)
+    """
+    return f'{chr(col + 65)}{row + 1}'
+
+
+def zobrist_key(horizontal: int, vertical: int, black_pawn: int, white_pawn: int,
+                black_fences: int, white_fences: int,
+                player_id: Literal['black', 'white'], current_player: Literal['black', 'white']) -> int:
+    """
+    Compute the 64-bit Zobrist key of a state from scratch.
+    GameBoard updates the key incrementally, by XOR-ing the bit-strings of changed components.
+    """
+    key = (ZOBRIST_PAWN['black'][black_pawn] ^ ZOBRIST_PAWN['white'][white_pawn]
+           ^ ZOBRIST_FENCES_LEFT['black'][black_fences] ^ ZOBRIST_FENCES_LEFT['white'][white_fences]
+           ^ ZOBRIST_PLAYER_ID[player_id] ^ ZOBRIST_CURRENT_PLAYER[current_player])
+    for i in iterate_bits(horizontal):
+        key ^= ZOBRIST_FENCE['h'][i]
+    for i in iterate_bits(vertical):
+        key ^= ZOBRIST_FENCE['v'][i]
+    return key
+
+
+class BoardState(Mapping):
+    """
+    Compact and immutable state representation of a game.
+
+    - Fences are stored as two bitboards (horizontal/vertical) of fence centers. (bit = row * 8 + col)
+    - Pawns are stored as square indices. (index = row * 9 + col)
+    - Remaining fences and players are stored as small integers and strings, which are shared by all states.
+
+    The state is hashable and can be compared with other states.
+    Its 64-bit Zobrist key (`key`) identifies the state, and is the same across processes.
+    It also behaves as a read-only dictionary, which has the same keys and values as the state dictionary of
+    previous versions. (e.g., state['player']['black']['pawn'])
+    Such values are built on demand. Use `to_dict()` if you need a mutable dictionary.
+    """
+    __slots__ = ('horizontal', 'vertical', 'black_pawn', 'white_pawn',
+                 'black_fences', 'white_fences', 'player_id', 'current_player', 'key')
+
+    #: Keys of the state dictionary
+    _KEYS = ('state_id', 'player_id', 'current_player', 'board', 'player')
+    #: Size of the binary representation in bytes
+    BYTES = 8 + 8 + 1 + 1 + 1 + 1 + 1
+
+    def __init__(self, horizontal: int, vertical: int, black_pawn: int, white_pawn: int,
+                 black_fences: int, white_fences: int,
+                 player_id: Literal['black', 'white'], current_player: Literal['black', 'white'],
+                 key: int = None):
+        """
+        Create a state. Use `GameBoard.get_state()` or `BoardState.from_dict()` instead of calling this directly.
+
+        :param horizontal: Bitboard of horizontal fence centers
+        :param vertical: Bitboard of vertical fence centers
+        :param black_pawn: Square index of black pawn
+        :param white_pawn: Square index of white pawn
+        :param black_fences: The number of fences that black can use
+        :param white_fences: The number of fences that white can use
+        :param player_id: The agent's player ID
+        :param current_player: Currently playing player's ID
+        :param key: Zobrist key of this state. If None, the key will be computed from scratch.
+        """
+        setter = object.__setattr__
+        setter(self, 'horizontal', horizontal)
+        setter(self, 'vertical', vertical)
+        setter(self, 'black_pawn', black_pawn)
+        setter(self, 'white_pawn', white_pawn)
+        setter(self, 'black_fences', black_fences)
+        setter(self, 'white_fences', white_fences)
+        setter(self, 'player_id', player_id)
+        setter(self, 'current_player', current_player)
+        if key is None:
+            key = zobrist_key(horizontal, vertical, black_pawn, white_pawn, black_fences, white_fences,
+                              player_id, current_player)
+        setter(self, 'key', key)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('BoardState is immutable.')
+
+    def __delattr__(self, key):
+        raise AttributeError('BoardState is immutable.')
+
+    def _fields(self) -> tuple:
+        return (self.horizontal, self.vertical, self.black_pawn, self.white_pawn,
+                self.black_fences, self.white_fences, self.player_id, self.current_player)
+
+    def __hash__(self):
+        return self.key
+
+    def __eq__(self, other):
+        if isinstance(other, BoardState):
+            return self.key == other.key and self._fields() == other._fields()
+        if isinstance(other, Mapping):
+            return self.to_dict() == {k: other[k] for k in self._KEYS if k in other}
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return f'BoardState({self["state_id"]}, player_id={self.player_id}, current_player={self.current_player}, ' \
+               f'fences_left=({self.black_fences}, {self.white_fences}))'
+
+    def __reduce__(self):
+        # Pickle as a short byte string
+        return BoardState.from_bytes, (self.to_bytes(),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    # ---- Read-only dictionary interface ----
+    def __getitem__(self, key):
+        if key == 'state_id':
+            return self.partial_FEN()
+        if key == 'player_id':
+            return self.player_id
+        if key == 'current_player':
+            return self.current_player
+        if key == 'board':
+            return {
+                'fence_center': self.fence_centers(),
+                'horizontal_fences': self._blocked_edges(self.horizontal, 'h'),
+                'vertical_fences': self._blocked_edges(self.vertical, 'v')
+            }
+        if key == 'player':
+            return {
+                p: {
+                    'pawn': list(self.pawn(p)),
+                    'fences_left': self.fences_left(p)
+                }
+                for p in PLAYERS
+            }
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __contains__(self, key):
+        return key in self._KEYS
+
+    # ---- Accessors ----
+    def pawn(self, player: Literal['black', 'white']) -> Tuple[int, int]:
+        """
+        :return: Coordinate of the pawn of the given player
+        """
+        return divmod(self.black_pawn if player == 'black' else self.white_pawn, BOARD_SIZE)
+
+    def fences_left(self, player: Literal['black', 'white']) -> int:
+        """
+        :return: The number of fences that the given player can use
+        """
+        return self.black_fences if player == 'black' else self.white_fences
+
+    def fences(self) -> List[Tuple[Tuple[int, int], Literal['horizontal', 'vertical']]]:
+        """
+        :return: List of fences placed, in the same format as GameBoard.get_applicable_fences()
+        """
+        return sorted([(divmod(i, FENCE_GRID_SIZE), 'horizontal') for i in iterate_bits(self.horizontal)]
+                      + [(divmod(i, FENCE_GRID_SIZE), 'vertical') for i in iterate_bits(self.vertical)])
+
+    def fence_centers(self) -> List[List[int]]:
+        """
+        :return: List of fence centers, sorted by (row, col).
+        """
+        return [list(divmod(i, FENCE_GRID_SIZE)) for i in iterate_bits(self.horizontal | self.vertical)]
+
+    @staticmethod
+    def _blocked_edges(bits: int, orientation: str) -> List[List[int]]:
+        """
+        :return: List of squares whose upper(horizontal)/right(vertical) edge is blocked, sorted by (row, col).
+        """
+        edges = []
+        for i in iterate_bits(bits):
+            r, c = divmod(i, FENCE_GRID_SIZE)
+            edges.append([r, c])
+            edges.append([r, c + 1] if orientation == 'h' else [r + 1, c])
+        return sorted(edges)
+
+    def partial_FEN(self) -> str:
+        """
+        :return: Partial FEN string of this state. (Same as pyquoridor.board.Board.partial_FEN)
+        """
+        horizontal = ''.join(sorted(_coordinate_string(*divmod(i, FENCE_GRID_SIZE))
+                                    for i in iterate_bits(self.horizontal)))
+        vertical = ''.join(sorted(_coordinate_string(*divmod(i, FENCE_GRID_SIZE))
+                                  for i in iterate_bits(self.vertical)))
+        pawns = _coordinate_string(*self.pawn('white')) + _coordinate_string(*self.pawn('black'))
+        return f'{horizontal}/{vertical}/{pawns}'
+
+    # ---- Conversions ----
+    def to_dict(self) -> dict:
+        """
+        :return: A new state dictionary, in the format of previous versions.
+        """
+        return {k: self[k] for k in self._KEYS}
+
+    @classmethod
+    def from_dict(cls, state: Union['BoardState', dict]) -> 'BoardState':
+        """
+        Read a state dictionary. Keys other than the state keys are ignored.
+
+        :param state: State dictionary (or BoardState)
+        :return: BoardState instance
+        """
+        if isinstance(state, BoardState):
+            return state
+
+        players = state['player']
+        return cls(
+            horizontal=cls._read_fence_bits(state['board']['horizontal_fences'], 'h'),
+            vertical=cls._read_fence_bits(state['board']['vertical_fences'], 'v'),
+            black_pawn=square_index(*players['black']['pawn']),
+            white_pawn=square_index(*players['white']['pawn']),
+            black_fences=players['black']['fences_left'],
+            white_fences=players['white']['fences_left'],
+            player_id=state['player_id'],
+            current_player=state['current_player']
+        )
+
+    @staticmethod
+    def _read_fence_bits(edges: list, orientation: str) -> int:
+        """
+        Read fence centers from the list of blocked edges.
+        As fences cannot overlap, pairing the blocked edges greedily (left-to-right for horizontal fences,
+        bottom-to-top for vertical fences) recovers the fences exactly.
+
+        :return: Bitboard of fence centers
+        """
+        if orientation == 'h':
+            edges = sorted((r, c) for r, c in edges)
+            step = (0, 1)
+        else:
+            edges = [(r, c) for c, r in sorted((c, r) for r, c in edges)]
+            step = (1, 0)
+
+        bits = 0
+        paired = set()
+        for r, c in edges:
+            if (r, c) in paired:
+                continue
+            paired.add((r + step[0], c + step[1]))
+            bits |= 1 << fence_index(r, c)
+        return bits
+
+    def to_bytes(self) -> bytes:
+        """
+        :return: Binary representation of this state, of size BoardState.BYTES.
+        """
+        flags = PLAYERS.index(self.player_id) | (PLAYERS.index(self.current_player) << 1)
+        return (self.horizontal.to_bytes(8, 'little') + self.vertical.to_bytes(8, 'little')
+                + bytes((self.black_pawn, self.white_pawn, self.black_fences, self.white_fences, flags)))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BoardState':
+        """
+        Read a binary representation written by `to_bytes()`.
+        """
+        black_pawn, white_pawn, black_fences, white_fences, flags = data[16:21]
+        return cls(int.from_bytes(data[0:8], 'little'), int.from_bytes(data[8:16], 'little'),
+                   black_pawn, white_pawn, black_fences, white_fences,
+                   PLAYERS[flags & 1], PLAYERS[(flags >> 1) & 1])
+
+
+# Export the state class and helper functions
+__all__ = ['BoardState', 'PLAYERS', 'BOARD_SIZE', 'FENCE_GRID_SIZE', 'MAX_FENCES',
+           'square_index', 'fence_index', 'iterate_bits', 'zobrist_key',
+           'ZOBRIST_PAWN', 'ZOBRIST_FENCE', 'ZOBRIST_FENCES_LEFT', 'ZOBRIST_CURRENT_PLAYER', 'ZOBRIST_PLAYER_ID']
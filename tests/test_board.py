@@ -0,0 +1,72 @@
+# Package for unit tests
+import unittest
+
+# Import action specifications
+from action import MOVE
+# Import the board
+from board import GameBoard
+# Import the random opponent of part III, which moves first as white
+from evaluator.part3 import execute_random_action
+# Import compact state representation
+from state import zobrist_key
+
+
+class SideToMoveTest(unittest.TestCase):
+    def setUp(self):
+        self.board = GameBoard()
+
+    def test_initial_state_has_first_mover_of_evaluators(self):
+        # Evaluators of parts III and IV, and tournament.play_game, let white move first.
+        for fences in (0, 2, 4):
+            self.board._initialize(start_with_random_fence=fences)
+            state = self.board.get_initial_state()
+            self.assertEqual(state.current_player, 'white')
+            self.assertEqual(state.key, zobrist_key(state.horizontal, state.vertical, state.black_pawn,
+                                                    state.white_pawn, state.black_fences, state.white_fences,
+                                                    state.player_id, 'white'))
+
+            # Root APIs without a player act for white.
+            self.assertTrue(all(action.player == 'white' for action, _ in self.board.expand(state)))
+            self.assertTrue(all(action.player == 'white' for action in self.board.get_legal_actions(state)))
+            self.assertEqual(self.board.get_applicable_moves(), self.board.get_applicable_moves('white'))
+
+            # After the first move of white (as in part III), black is to move.
+            after = execute_random_action(self.board, 'white', state, seed=12345)
+            self.assertEqual(after.current_player, 'black')
+
+    def test_root_key_matches_position_reached_by_play(self):
+        self.board._initialize(start_with_random_fence=2)
+        state = self.board.get_initial_state()
+        white, black = state.pawn('white'), state.pawn('black')
+
+        self.board.set_to_state(state)
+        self.board.apply(MOVE('white', self.board.get_applicable_moves('white')[0]))
+        self.board.apply(MOVE('black', self.board.get_applicable_moves('black')[0]))
+        self.board.apply(MOVE('white', white))
+        self.board.apply(MOVE('black', black))
+
+        self.assertEqual(self.board.get_state(), state)
+        self.assertEqual(self.board.get_state_key(), state.key)
+
+
+class ActionOrderTest(unittest.TestCase):
+    def test_expand_and_legal_actions_share_order(self):
+        board = GameBoard()
+        for fences in (0, 2, 4):
+            board._initialize(start_with_random_fence=fences)
+            state = board.get_initial_state()
+            for _ in range(6):
+                for player in ('white', 'black'):
+                    legal = [str(action) for action in board.get_legal_actions(state, player)]
+                    expanded = [str(action) for action, _ in board.expand(state, player)]
+                    self.assertEqual(legal, expanded)
+                    moves = len(board.get_applicable_moves(player))
+                    self.assertTrue(all(line.startswith('MOVE') for line in legal[:moves]))
+
+                action, state = board.expand(state)[-1]  # Place a fence, so that later positions have more.
+                if board.is_game_end():
+                    break
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# Package for unit tests
+import unittest
+
+# Import the board
+from board import GameBoard
+# Import compact state representation
+from state import PLAYERS
+# Import the transposition table
+from transposition import TranspositionTable
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def setUp(self):
+        self.board = GameBoard()
+        self.board._initialize(start_with_random_fence=4)
+        self.state = self.board.get_state()
+        self.table = TranspositionTable(max_bytes=64 * 1024)
+
+    def test_store_path_costs_of_board(self):
+        costs = {p: self.board.get_path_cost(p) for p in PLAYERS}
+        self.assertIsInstance(costs['black'], float)
+
+        self.table.store(self.state, 3, 0.5, TranspositionTable.EXACT, path_lengths=costs)
+        self.assertEqual(self.table.probe(self.state).path_lengths, costs)
+
+        self.table.store_path_lengths(self.state, {'black': costs['white'], 'white': costs['black']})
+        entry = self.table.probe(self.state)
+        self.assertEqual(entry.path_lengths, {'black': costs['white'], 'white': costs['black']})
+        self.assertEqual((entry.depth, entry.value), (3, 0.5))
+
+    def test_store_unreachable_and_long_paths(self):
+        costs = {'black': float('inf'), 'white': 40000.0}
+        self.table.store_path_lengths(self.state, costs)
+        entry = self.table.probe(self.state)
+        self.assertEqual(entry.depth, -1)
+        self.assertEqual(entry.path_lengths, costs)
+
+    def test_failed_store_writes_nothing(self):
+        with self.assertRaises(ValueError):
+            self.table.store(self.state, 3, 0.5, path_lengths={'black': 'far', 'white': 1})
+        self.assertNotIn(self.state, self.table)
+        self.assertEqual(len(self.table), 0)
+
+        self.table.store(self.state, 3, 0.5, path_lengths={'black': 10, 'white': 12})
+        with self.assertRaises(ValueError):
+            self.table.store_path_lengths(self.state, {'black': 'far', 'white': 1})
+        self.assertEqual(self.table.probe(self.state).path_lengths, {'black': 10.0, 'white': 12.0})
+
+    def test_unknown_path_lengths(self):
+        self.table.store(self.state, 2, 1.0)
+        self.assertIsNone(self.table.probe(self.state).path_lengths)
+
+
+if __name__ == '__main__':
+    unittest.main()
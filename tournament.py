@@ -0,0 +1,456 @@
+# Parser for arguments
+from argparse import ArgumentParser
+# Package for pairing agents
+from itertools import combinations
+# Package for math functions
+import math
+# A queue for games scheduled to be played
+from collections import deque
+# Package for multiprocessing (games will be played with multiprocessing)
+from multiprocessing import cpu_count, get_context, get_all_start_methods
+# Function for waiting multiple processes and pipes at once
+from multiprocessing.connection import Connection, wait
+# Package for runtime importing
+from importlib import import_module
+# Package for file handling
+from pathlib import Path
+# Package for randomness and seed control
+import random
+# Package for confidence intervals
+from statistics import NormalDist
+# Package for time management
+from time import time, perf_counter
+# Package for writing exceptions
+from traceback import format_exc
+# Type specification for Python code
+from typing import Dict, List, Literal, Optional, Tuple
+
+# Import action specifications
+from action import Action
+# Function for loading your agents
+from agents.load import get_all_agents
+# Import the board
+from board import GameBoard
+# Import compact state representation
+from state import BoardState
+# Package for time limits of moves
+from clock import Deadline
+# Package for generating openings
+from corpus import make_problem
+# Package for measuring peak memory of moves
+from memory import PeakMemory
+# Package for evaluation settings of part IV
+from evaluator.part4 import HARD_TIME_LIMIT, SOFT_TIME_LIMIT
+from evaluator.util import MEGABYTES
+
+#: Context for starting worker processes. Forked workers share modules already imported by this process.
+CONTEXT = get_context('fork' if 'fork' in get_all_start_methods() else 'spawn')
+#: Elo points per natural-log unit of strength
+ELO_SCALE = 400 / math.log(10)
+#: Seconds after the time limit of a move, before the process playing the game is stopped
+KILL_GRACE = 1.0
+
+
+def _as_player(state: BoardState, side: Literal['black', 'white']) -> BoardState:
+    """
+    Helper function to show a state to an agent, as if the agent plays the side and it is the agent's turn.
+    """
+    return BoardState(state.horizontal, state.vertical, state.black_pawn, state.white_pawn,
+                      state.black_fences, state.white_fences, side, side)
+
+
+def play_game(names: Dict[str, str], opening: dict, time_limit: float, max_plies: int,
+              adjudicate: bool = False, connection: Connection = None) -> dict:
+    """
+    Play a game of part IV between two agents. White moves first, as in evaluate.py.
+    This checks the time limit only after a move returns. Run it with _start_game to stop moves that do not return.
+
+    :param names: Agent name of each side, e.g., {'black': 'default', 'white': '_random'}
+    :param opening: Initial state generated by corpus.make_problem
+    :param time_limit: Time limit of each move, in seconds. An agent exceeding it loses the game.
+    :param max_plies: The game is a draw after this number of moves.
+    :param adjudicate: True if the game ends as soon as both players have no fences left,
+        with the outcome of perfect play. (See GameBoard.solve_endgame)
+    :param connection: Connection to the tournament. If given, ('move', side) is sent before each move.
+    :return: Record of the game: {'winner': side or None (draw), 'plies': ..., 'failure': reason or None,
+        'seconds': {side: total seconds of moves}, 'moves': {side: number of moves}, 'memory': {side: peak MB}}
+    """
+    board = GameBoard()
+    board._initialize()
+    board.set_to_state(opening, is_initial=True)
+    state = board.get_initial_state()
+
+    record = {'winner': None, 'plies': 0, 'failure': None,
+              'seconds': {'black': 0.0, 'white': 0.0}, 'moves': {'black': 0, 'white': 0},
+              'memory': {'black': 0.0, 'white': 0.0}}
+    try:
+        agents = {side: import_module(f'agents.{name}').Agent(player=side) for side, name in names.items()}
+    except Exception:
+        record['failure'] = format_exc()
+        return record
+
+    side = 'white'
+    while record['plies'] < max_plies:
+        opponent = 'black' if side == 'white' else 'white'
+        if connection is not None:
+            connection.send(('move', side))
+        meter = PeakMemory('rss')
+        begin = perf_counter()
+        try:
+            view = _as_player(state, side)
+            board.set_to_state(view)
+            with meter:
+                action = agents[side].adversarial_search(
+                    board, time_limit=Deadline.after(time_limit, min(time_limit, SOFT_TIME_LIMIT)))
+            assert isinstance(action, Action), 'Solution should be an Action.'
+
+            elapsed = perf_counter() - begin
+            assert elapsed <= time_limit, f'Time limit exceeded! {elapsed:.1f} seconds passed!'
+            state = board.simulate_action(view, action)
+        except Exception:
+            # An agent failing to play a legal move within the time limit loses the game.
+            record['failure'] = f'{names[side]} ({side}): ' + format_exc()
+            record['winner'] = opponent
+            break
+        finally:
+            record['seconds'][side] += perf_counter() - begin
+            record['moves'][side] += 1
+            if meter.peak is not None:
+                record['memory'][side] = max(record['memory'][side], meter.peak / MEGABYTES)
+
+        record['plies'] += 1
+        if board.is_game_end():
+            record['winner'] = side
+            break
+        side = opponent
+
+        endgame = board.solve_endgame(state, side) if adjudicate else None
+        if endgame is not None:
+            record['winner'] = endgame.winner
+            break
+
+    return record
+
+
+def _game_process(connection: Connection, names: Dict[str, str], opening: dict, time_limit: float,
+                  max_plies: int, adjudicate: bool):
+    """
+    [PRIVATE] Body of a process playing a game. ('done', record) is sent at the end of the game.
+    """
+    record = play_game(names, opening, time_limit, max_plies, adjudicate, connection)
+    connection.send(('done', record))
+    connection.close()
+
+
+def _start_game(pair: Tuple[str, str], names: Dict[str, str], opening: dict, time_limit: float, max_plies: int,
+                adjudicate: bool):
+    """
+    Start a process playing a game (See play_game), which can be stopped when a move does not return.
+    Processes are forked (where available) from this process, so the modules imported here are already loaded.
+
+    :param pair: Pair of agents, whose score the game counts for
+    :param names: Agent name of each side
+    :return: A game process. Read it with _read_game.
+    """
+    connection, game_end = CONTEXT.Pipe(duplex=False)
+    game = CONTEXT.Process(name='TournamentGame', target=_game_process,
+                           args=(game_end, names, opening, time_limit, max_plies, adjudicate), daemon=True)
+    game.start()
+    game_end.close()
+    game.connection = connection  # Connection for receiving moves and the record
+    game.pair = pair
+    game.agents = names
+    game.side = None  # Side to move (None before the first move)
+    game.move_begin = time()  # Timestamp when the current move began
+    game.time_limit = time_limit
+    return game
+
+
+def _read_game(game) -> Optional[dict]:
+    """
+    Read messages from a game process. If a move runs over the time limit (plus KILL_GRACE seconds),
+    or the process died during a move, the process is stopped and the side to move loses the game.
+
+    :param game: A game process started by _start_game
+    :return: Record of the game (See play_game) with 'agents' added, or None if the game is still running.
+    """
+    record = None
+    try:
+        while record is None and game.connection.poll():
+            kind, value = game.connection.recv()
+            if kind == 'done':
+                record = value
+            else:
+                game.side, game.move_begin = value, time()
+    except EOFError:
+        pass  # The process died without sending its record.
+
+    if record is None:
+        overdue = time() - game.move_begin > game.time_limit + KILL_GRACE
+        if game.is_alive() and not overdue:
+            return None
+
+        # Statistics of moves before the stop are not kept.
+        game.terminate()
+        record = {'winner': None, 'plies': 0, 'failure': None,
+                  'seconds': {'black': 0.0, 'white': 0.0}, 'moves': {'black': 0, 'white': 0},
+                  'memory': {'black': 0.0, 'white': 0.0}}
+        reason = f'Time limit exceeded! The move did not return in {game.time_limit + KILL_GRACE:.1f} seconds.' \
+            if overdue else 'The process playing the game died.'
+        if game.side is not None:
+            record['winner'] = 'black' if game.side == 'white' else 'white'
+            reason = f'{game.agents[game.side]} ({game.side}): {reason}'
+        record['failure'] = reason
+
+    game.join()
+    game.connection.close()
+    record['agents'] = game.agents
+    return record
+
+
+class PairScore:
+    """
+    Score of a pair of agents, from the view of the first agent.
+    """
+
+    def __init__(self):
+        #: Number of wins, draws, and losses of the first agent
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def score(self) -> float:
+        """
+        :return: Average score of the first agent. (win = 1, draw = 0.5, loss = 0)
+        """
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.5
+
+    def log_likelihood_ratio(self, elo: float) -> float:
+        """
+        Log-likelihood ratio of 'the first agent is stronger by `elo` points' against 'both are equal',
+        with the normal approximation of the score per game. (Generalized SPRT, as used for testing chess engines)
+
+        :param elo: Elo difference of the alternative hypothesis (negative if the first agent is weaker)
+        :return: Log-likelihood ratio. (0 before any game)
+        """
+        if not self.games:
+            return 0.0
+        # Counts of zero are replaced by a small number, so that the variance is positive.
+        wins, draws, losses = (max(count, 1E-3) for count in (self.wins, self.draws, self.losses))
+        games = wins + draws + losses
+        score = (wins + draws / 2) / games
+        variance = (wins + draws / 4) / games - score ** 2
+        expected = 1 / (1 + 10 ** (-elo / 400))
+        return self.games * (expected - 0.5) * (2 * score - 0.5 - expected) / (2 * variance)
+
+    def is_decided(self, alpha: float, elo: float, min_games: int) -> bool:
+        """
+        Sequential probability ratio test (SPRT) of 'one agent is stronger by `elo` points' against 'both are equal'.
+        It can be checked after every game: the chance of deciding a pair of equal agents stays below alpha
+        however many times it is checked (approximately, because the score is approximated by a normal distribution).
+        A fixed-z test repeated after every game would decide such pairs far more often.
+
+        :param alpha: Allowed chance of deciding a pair of equal agents. (1 - confidence) Half is given to each side.
+        :param elo: Elo difference to be detected (positive)
+        :param min_games: Minimum number of games before deciding
+        :return: True if one agent is stronger than the other, at the required confidence.
+        """
+        if self.games < min_games:
+            return False
+        bound = math.log(2 / alpha)
+        return max(self.log_likelihood_ratio(elo), self.log_likelihood_ratio(-elo)) >= bound
+
+
+def elo_ratings(agents: List[str], scores: Dict[Tuple[str, str], PairScore], z: float, iterations: int = 1000) \
+        -> Dict[str, Tuple[float, float]]:
+    """
+    Estimate Elo ratings with the Bradley-Terry model, fitted by minorization-maximization.
+    Each pair gets one virtual draw, so that ratings stay finite when an agent wins or loses every game.
+
+    :param agents: Names of agents
+    :param scores: Scores of pairs (See PairScore)
+    :param z: Critical value of the normal distribution for confidence intervals
+    :param iterations: Maximum number of iterations
+    :return: Dictionary of agent name -> (Elo rating, half-width of confidence interval). Ratings average to 0.
+    """
+    games = {a: {} for a in agents}
+    points = {a: 0.0 for a in agents}
+    for (a, b), pair in scores.items():
+        games[a][b] = games[b][a] = pair.games + 1
+        points[a] += pair.wins + pair.draws / 2 + 0.5
+        points[b] += pair.losses + pair.draws / 2 + 0.5
+
+    strength = {a: 1.0 for a in agents}
+    for _ in range(iterations):
+        updated = {a: points[a] / sum(n / (strength[a] + strength[b]) for b, n in games[a].items())
+                   if games[a] else 1.0 for a in agents}
+        mean = math.exp(sum(math.log(s) for s in updated.values()) / len(updated))
+        updated = {a: s / mean for a, s in updated.items()}
+        converged = all(abs(updated[a] - strength[a]) < 1E-9 * strength[a] for a in agents)
+        strength = updated
+        if converged:
+            break
+
+    ratings = {}
+    for a in agents:
+        # Standard error from the Fisher information of the log-strength.
+        information = sum(n * strength[a] * strength[b] / (strength[a] + strength[b]) ** 2
+                          for b, n in games[a].items())
+        error = 1 / math.sqrt(information) if information > 0 else float('inf')
+        ratings[a] = (ELO_SCALE * math.log(strength[a]), z * ELO_SCALE * error)
+    return ratings
+
+
+def _print_table(agents: List[str], scores: Dict[Tuple[str, str], PairScore], records: Dict[str, dict], z: float,
+                 decided: set):
+    """
+    Helper function for printing ratings and pairs.
+    """
+    ratings = elo_ratings(agents, scores, z)
+    print(f'\n AgentName    | {"Elo":>6s} {"+/-":>6s} | {"Games":>6s} {"Wins":>6s} {"Draws":>6s} {"Losses":>6s} '
+          f'| {"AvgMove":>9s} {"PeakMem":>9s}')
+    print('=' * 14 + '|' + '=' * 15 + '|' + '=' * 29 + '|' + '=' * 21)
+    for a in sorted(agents, key=lambda name: -ratings[name][0]):
+        rating, interval = ratings[a]
+        wins = sum(p.wins for (x, _), p in scores.items() if x == a) + \
+            sum(p.losses for (_, y), p in scores.items() if y == a)
+        losses = sum(p.losses for (x, _), p in scores.items() if x == a) + \
+            sum(p.wins for (_, y), p in scores.items() if y == a)
+        draws = sum(p.draws for pair, p in scores.items() if a in pair)
+        record = records[a]
+        move = record['seconds'] / record['moves'] if record['moves'] else float('nan')
+        key_print = a if len(a) < 13 else a[:9] + '...'
+        print(f' {key_print:12s} | {rating:6.0f} {interval:6.0f} | {wins + draws + losses:6d} {wins:6d} {draws:6d} '
+              f'{losses:6d} | {move:6.3f}sec {record["memory"]:7.2f}MB')
+
+    print('\n Pair                        | Score  Games | Status')
+    for (a, b), pair in scores.items():
+        status = 'decided' if (a, b) in decided else 'undecided'
+        print(f' {a[:12]:>12s} vs. {b[:12]:12s} | {pair.score():5.3f} {pair.games:6d} | {status}')
+
+
+# Main function
+if __name__ == '__main__':
+    argparser = ArgumentParser(description='Round-robin tournament of part IV agents, with Elo ratings.')
+    argparser.add_argument('-a', '--agents', type=str, nargs='+', default=None,
+                           help='Agents to play (default: all agents, _random, and _ta if exists)')
+    argparser.add_argument('-g', '--games', type=int, default=1000,
+                           help='Maximum number of games for each pair of agents')
+    argparser.add_argument('-m', '--min-games', type=int, default=20,
+                           help='Minimum number of games for each pair, before stopping early')
+    argparser.add_argument('-c', '--confidence', type=float, default=0.95,
+                           help='Confidence for stopping early and for intervals of ratings')
+    argparser.add_argument('-e', '--elo-margin', type=float, default=50,
+                           help='Elo difference which stops a pair early, when one agent is stronger by it (SPRT)')
+    argparser.add_argument('-w', '--workers', type=int, default=cpu_count(),
+                           help='Number of worker processes')
+    argparser.add_argument('-t', '--time-limit', type=float, default=HARD_TIME_LIMIT,
+                           help='Time limit of each move, in seconds')
+    argparser.add_argument('--max-plies', type=int, default=400,
+                           help='Number of moves after which a game is a draw')
+    argparser.add_argument('--adjudicate', action='store_true', dest='adjudicate',
+                           help='End games when both players have no fences left, with the outcome of perfect play')
+    argparser.add_argument('-s', '--seed', type=int, default=42,
+                           help='Random seed of openings')
+    argparser.add_argument('--native', action='store_true', dest='native',
+                           help='Use the array-backed game engine instead of pyquoridor')
+    args = argparser.parse_args()
+
+    all_agents = args.agents
+    if all_agents is None:
+        all_agents = get_all_agents() + ['_random']
+        if Path(__file__).parent.joinpath('agents', '_ta.py').exists():
+            all_agents.append('_ta')
+    assert len(all_agents) >= 2, 'A tournament needs at least two agents.'
+
+    # Openings are shared by all pairs: round k of every pair starts from openings[k].
+    random.seed(args.seed)
+    generator = GameBoard()
+    openings = []
+    z_value = NormalDist().inv_cdf(0.5 + args.confidence / 2)
+
+    pairs = list(combinations(all_agents, 2))
+    scores = {pair: PairScore() for pair in pairs}
+    rounds = {pair: 0 for pair in pairs}  # Number of matches (2 games each) scheduled for each pair
+    finished = set()  # Pairs that are decided or have played all games
+    decided = set()
+    agent_records = {a: {'seconds': 0.0, 'moves': 0, 'memory': 0.0} for a in all_agents}
+    failures = []
+
+    # Preload agent modules, so that forked game processes do not pay for imports.
+    for name in all_agents:
+        try:
+            import_module(f'agents.{name}')
+        except Exception:
+            pass  # The failure will be reported by the games of that agent.
+
+    pending = deque()  # Games scheduled but not started: (pair, agent name of each side, opening)
+    running = []  # Game processes
+    begin_time = time()
+    print(f'Playing {len(pairs)} pairs of {len(all_agents)} agents with {args.workers} worker(s)...')
+    while True:
+        # Keep workers busy, scheduling the next match (two games with sides swapped) of each undecided pair in turn.
+        for pair in sorted(pairs, key=lambda p: rounds[p]):
+            if len(pending) + len(running) >= args.workers * 2:
+                break
+            if pair in finished or rounds[pair] * 2 >= args.games:
+                continue
+            while len(openings) <= rounds[pair]:
+                openings.append(make_problem(generator, 4))
+            for black, white in (pair, pair[::-1]):
+                pending.append((pair, {'black': black, 'white': white}, openings[rounds[pair]]))
+            rounds[pair] += 1
+
+        while pending and len(running) < max(1, args.workers):
+            pair, names, opening = pending.popleft()
+            running.append(_start_game(pair, names, opening, args.time_limit, args.max_plies, args.adjudicate))
+
+        if not running:
+            break
+
+        # Sleep until a move begins, a game ends, a process dies, or a move runs over the time limit.
+        deadline = min(g.move_begin for g in running) + args.time_limit + KILL_GRACE
+        wait([g.connection for g in running] + [g.sentinel for g in running], timeout=max(0.0, deadline - time()))
+
+        for game_process in list(running):
+            game = _read_game(game_process)
+            if game is None:
+                continue
+            running.remove(game_process)
+            pair = game_process.pair
+
+            first_side = 'black' if game['agents']['black'] == pair[0] else 'white'
+            if game['winner'] is None:
+                scores[pair].draws += 1
+            elif game['winner'] == first_side:
+                scores[pair].wins += 1
+            else:
+                scores[pair].losses += 1
+            if game['failure'] is not None:
+                failures.append(game['failure'])
+
+            for side, name in game['agents'].items():
+                record = agent_records[name]
+                record['seconds'] += game['seconds'][side]
+                record['moves'] += game['moves'][side]
+                record['memory'] = max(record['memory'], game['memory'][side])
+
+            # Stop the pair early, once its result is decided.
+            if scores[pair].is_decided(1 - args.confidence, args.elo_margin, args.min_games):
+                decided.add(pair)
+                finished.add(pair)
+            elif scores[pair].games >= args.games:
+                finished.add(pair)
+
+        played = sum(s.games for s in scores.values())
+        print(f'{played} games played, {len(decided)}/{len(pairs)} pairs decided, '
+              f'{time() - begin_time:.0f} second(s) passed.', end='\r')
+
+    _print_table(all_agents, scores, agent_records, z_value, decided)
+    if failures:
+        Path('./failure_tournament.txt').write_text('\n-----------------\n'.join(failures))
+        print(f'\n{len(failures)} game(s) ended with failures. See failure_tournament.txt.')
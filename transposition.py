@@ -0,0 +1,264 @@
+# Compact arrays of primitive values
+from array import array
+# Named tuple for returning table entries
+from collections import namedtuple
+# Type specification for Python code
+from typing import Optional, Tuple, Union
+
+# Import action specifications
+from action import Action, MOVE, BLOCK
+# Import compact state representation
+from state import BoardState, PLAYERS, BOARD_SIZE, FENCE_GRID_SIZE, square_index, fence_index
+
+#: Entry of the transposition table
+TableEntry = namedtuple('TableEntry',
+                        [
+                            'depth',  # Search depth of the stored value. (-1 if only path lengths are stored)
+                            'value',  # Value found by the search.
+                            'flag',  # Type of the value. EXACT, LOWER (bound), or UPPER (bound)
+                            'best_action',  # Best action found by the search. (None if unknown)
+                            'path_lengths'  # Dictionary of path costs for each player, as floats. (None if unknown)
+                        ])
+
+#: [PRIVATE] Bit of flags indicating that the slot is occupied.
+_OCCUPIED = 0x80
+#: [PRIVATE] Bit mask of flags for the type of the value.
+_VALUE_TYPE = 0x03
+#: [PRIVATE] Number of bytes used by a slot: key(8) + value(8) + depth(2) + action(2) + path lengths(2x8) + flag(1)
+_SLOT_BYTES = 8 + 8 + 2 + 2 + 2 * 8 + 1
+#: [PRIVATE] Stored path lengths when they are unknown. (Path lengths are never negative)
+_UNKNOWN_PATHS = (-1.0, -1.0)
+#: [PRIVATE] Offset of BLOCK actions in action codes
+_BLOCK_OFFSET = 1 + BOARD_SIZE ** 2
+#: [PRIVATE] Offset of white player's actions in action codes
+_WHITE_OFFSET = 256
+
+
+def _encode_action(action: Optional[Action]) -> int:
+    """
+    Encode an action as a small integer. 0 indicates no action.
+    """
+    if action is None:
+        return 0
+
+    code = _WHITE_OFFSET if action.player == 'white' else 0
+    if isinstance(action, BLOCK):
+        return code + _BLOCK_OFFSET + fence_index(*action.edge) * 2 + int(action.orientation == 'v')
+    return code + 1 + square_index(*action.position)
+
+
+def _decode_action(code: int) -> Optional[Action]:
+    """
+    Decode an action encoded by _encode_action.
+    """
+    if code == 0:
+        return None
+
+    player, code = divmod(code, _WHITE_OFFSET)
+    player = PLAYERS[player]
+    if code >= _BLOCK_OFFSET:
+        center, vertical = divmod(code - _BLOCK_OFFSET, 2)
+        return BLOCK(player, divmod(center, FENCE_GRID_SIZE), 'vertical' if vertical else 'horizontal')
+    return MOVE(player, divmod(code - 1, BOARD_SIZE))
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table keyed by the Zobrist key of states.
+
+    Each bucket has two slots:
+    - The first slot keeps the entry searched most deeply (depth-preferred).
+    - The second slot keeps the most recent entry (always-replace).
+    All slots are allocated at once as compact arrays, so the table never uses more bytes than the given budget.
+
+    Usage:
+        - `table = TranspositionTable(max_bytes=4 * MEGABYTES)` creates a table within 4MB.
+        - `table.store(board.get_state_key(), depth, value, TranspositionTable.EXACT, best_action)`
+        - `entry = table.probe(state)` returns TableEntry or None.
+        - `table.store_path_lengths(state, {p: board.get_path_cost(p) for p in PLAYERS})` caches path lengths.
+    """
+
+    #: Type of stored values: exact value, lower bound (fail-high), upper bound (fail-low).
+    EXACT, LOWER, UPPER = 0, 1, 2
+
+    def __init__(self, max_bytes: int):
+        """
+        Allocate a table.
+
+        :param max_bytes: Hard budget of memory for the table, in bytes. Keep this under the memory limit of the part.
+        """
+        buckets = max_bytes // (2 * _SLOT_BYTES)
+        assert buckets > 0, f'The budget should be at least {2 * _SLOT_BYTES} bytes.'
+
+        #: Number of buckets
+        self.buckets = buckets
+        slots = buckets * 2
+        self._keys = array('Q', [0]) * slots
+        self._values = array('d', [0.0]) * slots
+        self._depths = array('h', [0]) * slots
+        self._actions = array('H', [0]) * slots
+        self._paths = array('d', [0.0]) * (2 * slots)
+        self._flags = array('B', [0]) * slots
+
+        #: Statistics: the number of successful/failed probes, stores, and entries evicted by other entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: The number of bytes used by the slots of this table
+        """
+        return len(self._flags) * _SLOT_BYTES
+
+    def __len__(self):
+        return sum(1 for f in self._flags if f & _OCCUPIED)
+
+    def __contains__(self, key):
+        return self._find(self._key_of(key)) >= 0
+
+    @staticmethod
+    def _key_of(key: Union[int, BoardState]) -> int:
+        return key.key if isinstance(key, BoardState) else key
+
+    @staticmethod
+    def _path_pair(path_lengths: dict) -> Tuple[float, float]:
+        """
+        Convert path lengths to the stored pair, before anything is written to a slot.
+        Lengths are stored as floats, so get_path_cost() values and infinity (unreachable goal) are kept as they are.
+        """
+        paths = (float(path_lengths['black']), float(path_lengths['white']))
+        assert paths[0] >= 0 and paths[1] >= 0, f'Path lengths should not be negative: {path_lengths}'
+        return paths
+
+    def _find(self, key: int) -> int:
+        """
+        :return: Slot index that holds the key, or -1 if not found.
+        """
+        slot = (key % self.buckets) * 2
+        for i in (slot, slot + 1):
+            if self._flags[i] & _OCCUPIED and self._keys[i] == key:
+                return i
+        return -1
+
+    def _write(self, i: int, key: int, depth: int, value: float, flag: int, action: int,
+               paths: Tuple[float, float]):
+        self._keys[i] = key
+        self._depths[i] = depth
+        self._values[i] = value
+        self._flags[i] = _OCCUPIED | flag
+        self._actions[i] = action
+        self._paths[2 * i] = paths[0]
+        self._paths[2 * i + 1] = paths[1]
+
+    def _read(self, i: int) -> tuple:
+        return (self._keys[i], self._depths[i], self._values[i], self._flags[i] & _VALUE_TYPE, self._actions[i],
+                (self._paths[2 * i], self._paths[2 * i + 1]))
+
+    def probe(self, key: Union[int, BoardState]) -> Optional[TableEntry]:
+        """
+        Find the entry of a state.
+
+        :param key: Zobrist key of a state, or a BoardState.
+        :return: TableEntry if found, otherwise None.
+        """
+        i = self._find(self._key_of(key))
+        if i < 0:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        _, depth, value, flag, action, paths = self._read(i)
+        return TableEntry(depth=depth, value=value, flag=flag, best_action=_decode_action(action),
+                          path_lengths=None if paths[0] < 0 else dict(zip(PLAYERS, paths)))
+
+    def store(self, key: Union[int, BoardState], depth: int, value: float, flag: int = EXACT,
+              best_action: Action = None, path_lengths: dict = None):
+        """
+        Store a search result of a state.
+
+        :param key: Zobrist key of a state, or a BoardState.
+        :param depth: Remaining depth of the search. Deeper results are preferred when two entries collide.
+        :param value: Value found by the search.
+        :param flag: Type of the value. EXACT, LOWER, or UPPER.
+        :param best_action: Best action found by the search.
+        :param path_lengths: Dictionary of path lengths for each player, e.g., {'black': 10.0, 'white': inf}
+        """
+        key = self._key_of(key)
+        action = _encode_action(best_action)
+        i = self._find(key)
+        if path_lengths is not None:
+            paths = self._path_pair(path_lengths)
+        elif i >= 0:  # Keep path lengths already known
+            paths = self._read(i)[5]
+        else:
+            paths = _UNKNOWN_PATHS
+        self.stores += 1
+
+        first = (key % self.buckets) * 2
+        if i == first or (i < 0 and not self._flags[first] & _OCCUPIED):
+            # Same state or empty slot in the depth-preferred tier.
+            self._write(first, key, depth, value, flag, action, paths)
+        elif i < 0 and depth >= self._depths[first]:
+            # Deeper result takes the depth-preferred tier. The previous one goes to the always-replace tier.
+            if self._flags[first + 1] & _OCCUPIED:
+                self.evictions += 1
+            self._copy(first, first + 1)
+            self._write(first, key, depth, value, flag, action, paths)
+        elif i == first + 1 and depth >= self._depths[first]:
+            # Same state in the always-replace tier, which is now deeper: swap tiers.
+            self._copy(first, first + 1)
+            self._write(first, key, depth, value, flag, action, paths)
+        else:
+            # Always-replace tier.
+            if i < 0 and self._flags[first + 1] & _OCCUPIED:
+                self.evictions += 1
+            self._write(first + 1, key, depth, value, flag, action, paths)
+
+    def _copy(self, source: int, target: int):
+        key, depth, value, flag, action, paths = self._read(source)
+        self._write(target, key, depth, value, flag, action, paths)
+
+    def store_path_lengths(self, key: Union[int, BoardState], path_lengths: dict):
+        """
+        Cache path lengths of a state, without changing its search result.
+
+        :param key: Zobrist key of a state, or a BoardState.
+        :param path_lengths: Dictionary of path lengths for each player, e.g., {'black': 10.0, 'white': inf}
+        """
+        key = self._key_of(key)
+        i = self._find(key)
+        if i >= 0:
+            paths = self._path_pair(path_lengths)
+            self._paths[2 * i] = paths[0]
+            self._paths[2 * i + 1] = paths[1]
+            self.stores += 1
+        else:
+            # Path-only entries have the lowest depth, so search results will replace them first.
+            self.store(key, -1, 0.0, path_lengths=path_lengths)
+
+    def clear(self):
+        """
+        Remove all entries and reset statistics.
+        """
+        self._flags = array('B', [0]) * len(self._flags)
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        :return: Dictionary of statistics. (hits, misses, stores, evictions, entries, bytes)
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'entries': len(self),
+            'bytes': self.nbytes
+        }
+
+
+# Export the table class and its entry type
+__all__ = ['TranspositionTable', 'TableEntry']